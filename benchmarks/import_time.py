@@ -0,0 +1,68 @@
+"""
+Startup-time benchmark
+
+Measures how long a fresh interpreter takes to reach the CLI entry points and
+checks the result against the startup budget documented in the README.
+
+Usage:
+    python -m benchmarks.import_time [--repeat N]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Heavy dependencies that must not be imported just to start the CLI
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'vnstock', 'ta', 'tradingview_ta', 'tvDatafeed']
+
+# name -> (python code run in a fresh interpreter, budget in ms above a bare interpreter)
+SCENARIOS = {
+    'cli --version': ("import sys; sys.argv = ['trading-bot', '--version']\n"
+                      "from src.cli import main\n"
+                      "try:\n    main()\nexcept SystemExit:\n    pass", 50),
+    'import stock_ui (menu ready)': ("import src.stock_ui", 150),
+    'import utils': ("import src.utils", 50),
+}
+
+def _time_code(code: str, repeat: int) -> float:
+    """Median wall time in ms of running code in a fresh interpreter"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def _heavy_imports(code: str) -> list:
+    """Heavy modules loaded as a side effect of running code"""
+    probe = code + f"\nimport sys\nprint('HEAVY:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', probe], check=True, capture_output=True, text=True).stdout
+    marker = [line for line in output.splitlines() if line.startswith('HEAVY:')]
+    return [name for name in marker[-1][len('HEAVY:'):].split(',') if name] if marker else []
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading Bot startup-time benchmark')
+    parser.add_argument('--repeat', type=int, default=7, help='runs per scenario (median is reported)')
+    args = parser.parse_args()
+
+    baseline = _time_code('pass', args.repeat)
+    print(f"{'Scenario':<32} {'Time (ms)':>10} {'Budget':>8}  Result")
+    print("-" * 70)
+    print(f"{'bare interpreter':<32} {baseline:>10.1f} {'-':>8}")
+
+    failed = False
+    for name, (code, budget) in SCENARIOS.items():
+        elapsed = _time_code(code, args.repeat) - baseline
+        heavy = _heavy_imports(code)
+        ok = elapsed <= budget and not heavy
+        failed |= not ok
+        note = 'ok' if ok else 'OVER BUDGET'
+        if heavy:
+            note += f" (imported {', '.join(heavy)})"
+        print(f"{name:<32} {elapsed:>10.1f} {budget:>8}  {note}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Batch/per-symbol parity check
+
+Runs the batched analysis paths on synthetic bars with gaps (suspensions,
+no-trade days, late listings) and checks them against analyze_trend run on
+each symbol alone. Exits with a non-zero status on any mismatch.
+
+Usage:
+    python -m benchmarks.parity [--symbols N]
+"""
+import argparse
+import math
+import sys
+from typing import Optional
+
+import numpy as np
+
+from .stubs import synthetic_bars, synthetic_symbols
+
+TOLERANCE = 1e-9
+# Looser RSI / volatility thresholds than the defaults, so many symbols get a BUY or SELL to compare
+SIGNAL_PARAMS = {'rsi_oversold': 48, 'rsi_overbought': 52, 'bb_width_high': 1.0}
+
+def gappy_frames(count: int, seed: int = 7) -> dict:
+    """Daily bars of count symbols, most of them with bars missing inside the history"""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i, symbol in enumerate(synthetic_symbols(count)):
+        df = synthetic_bars(symbol, '2024-01-01', '2025-06-30')
+        if i % 4 == 1:
+            df = df.drop(index=len(df) - 10)  # One bar missing 10 sessions back
+        elif i % 4 == 2:
+            df = df.drop(index=rng.choice(len(df) - 1, size=15, replace=False))  # Scattered missing bars
+        elif i % 4 == 3:
+            df = df.iloc[rng.integers(60, 200):]  # Listed later than the others
+        frames[symbol] = df.reset_index(drop=True)
+    return frames
+
+def _mismatches(expected: dict, actual: dict) -> list:
+    """Keys whose values differ beyond TOLERANCE"""
+    keys = []
+    for key, value in expected.items():
+        other = actual.get(key)
+        if isinstance(value, (float, np.floating)):
+            if not (math.isclose(value, other, rel_tol=TOLERANCE, abs_tol=TOLERANCE)
+                    or (math.isnan(value) and math.isnan(other))):
+                keys.append(f"{key}: {value!r} != {other!r}")
+        elif value != other:
+            keys.append(f"{key}: {value!r} != {other!r}")
+    return keys
+
+def check_analyze_universe(frames: dict) -> list:
+    """analyze_universe against analyze_trend per symbol"""
+    from src.strategy import TradingStrategy
+    strategy = TradingStrategy(memoize=False)
+    batch = strategy.analyze_universe(frames)
+    errors = []
+    for symbol, df in frames.items():
+        expected = strategy.analyze_trend(df.copy())
+        if expected is None:
+            continue
+        if symbol not in batch:
+            errors.append(f"analyze_universe: {symbol} missing")
+            continue
+        errors.extend(f"analyze_universe: {symbol} {key}" for key in _mismatches(expected, batch[symbol]))
+    return errors
+
+def check_screen_frames(frames: dict, confirm_timeframe: Optional[str] = None) -> list:
+    """Screener.screen_frames candidates against signal_from_trend per symbol"""
+    from src.screener import Screener
+    from src.strategy import TradingStrategy
+    strategy = TradingStrategy(params=SIGNAL_PARAMS, memoize=False, confirm_timeframe=confirm_timeframe)
+    screened = Screener(stock_info=object(), strategy=strategy).screen_frames(frames, top_n=len(frames))
+    last_time = max(df['time'].iloc[-1] for df in frames.values())
+    errors = []
+    for side, candidates in screened.items():
+        actual = {candidate['symbol']: candidate for candidate in candidates}
+        for symbol, df in frames.items():
+            trend = strategy.analyze_trend(df.copy())
+            if trend is None or df['time'].iloc[-1] != last_time or strategy.signal_from_trend(trend) != side:
+                if symbol in actual:
+                    errors.append(f"screen_frames: {symbol} screened as {side}")
+                continue
+            if symbol not in actual:
+                errors.append(f"screen_frames: {symbol} missing from {side}")
+                continue
+            expected = {key: trend[key] for key in ('price', 'trend', 'momentum', 'volatility', 'rsi',
+                                                    'stop_loss', 'take_profit')}
+            errors.extend(f"screen_frames: {symbol} {key}" for key in _mismatches(expected, actual[symbol]))
+    return errors
+
+def check_screen_frames_confirmed(frames: dict) -> list:
+    """check_screen_frames with a weekly confirm_timeframe"""
+    return [f"{error} (1W)" for error in check_screen_frames(frames, confirm_timeframe='1W')]
+
+CHECKS = [check_analyze_universe, check_screen_frames, check_screen_frames_confirmed]
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the batched analysis against the per-symbol one')
+    parser.add_argument('--symbols', type=int, default=40, help='number of synthetic symbols (default: 40)')
+    args = parser.parse_args()
+
+    frames = gappy_frames(args.symbols)
+    errors = [error for check in CHECKS for error in check(frames)]
+    for error in errors:
+        print(error)
+    print(f"{len(CHECKS)} checks on {len(frames)} symbols: {'FAILED' if errors else 'ok'}")
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Offline stand-ins for the data sources used by the benchmarks
+
+``install_vnstock_stub`` registers a fake ``vnstock`` module that serves
+deterministic synthetic OHLCV bars and listings, so the benchmarks never touch
+the network and give the same numbers on every run.
+"""
+import functools
+import sys
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+EXCHANGES = ['HOSE', 'HNX', 'UPCOM']
+HISTORY_START = '2015-01-01'
+HISTORY_END = '2030-12-31'
+
+def synthetic_symbols(count: int) -> list:
+    """Deterministic three-letter symbol codes (up to 12,167)"""
+    letters = 'ABCDEFGHIKLMNOPQRSTUVXY'
+    symbols = []
+    for i in range(count):
+        code, n = '', i
+        for _ in range(3):
+            code = letters[n % len(letters)] + code
+            n //= len(letters)
+        symbols.append(code)
+    return symbols
+
+def synthetic_bars(symbol: str, start: str = HISTORY_START, end: str = HISTORY_END) -> pd.DataFrame:
+    """
+    Daily OHLCV bars for a symbol as returned by Vnstock (prices in thousand VND)
+
+    The series depends only on the symbol, so any date range of the same
+    symbol is a consistent slice of one price path.
+    """
+    df = _price_path(symbol)
+    times = df['time'].to_numpy()
+    first = np.searchsorted(times, np.datetime64(pd.Timestamp(start)), side='left')
+    last = np.searchsorted(times, np.datetime64(pd.Timestamp(end)), side='right')
+    return df.iloc[first:last].reset_index(drop=True)
+
+@functools.lru_cache(maxsize=4096)
+def _price_path(symbol: str) -> pd.DataFrame:
+    """Whole synthetic history of a symbol, generated once so the stub stays cheap"""
+    days = np.arange(np.datetime64(HISTORY_START), np.datetime64(HISTORY_END) + 1, dtype='datetime64[D]')
+    days = days[np.is_busday(days)].astype('datetime64[ns]')
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+    returns = rng.normal(0.0003, 0.012, len(days))
+    close = 20 * np.exp(np.cumsum(returns))
+    spread = close * rng.uniform(0.002, 0.02, len(days))
+    df = pd.DataFrame({
+        'time': days,
+        'open': np.round(close * (1 + rng.normal(0, 0.003, len(days))), 2),
+        'high': np.round(close + spread, 2),
+        'low': np.round(close - spread, 2),
+        'close': np.round(close, 2),
+        'volume': rng.integers(10_000, 5_000_000, len(days)),
+    })
+    df['high'] = df[['open', 'high', 'close']].max(axis=1)
+    df['low'] = df[['open', 'low', 'close']].min(axis=1)
+    return df
+
+def synthetic_listing(count: int) -> pd.DataFrame:
+    """Listing in the format of Vnstock's symbols_by_exchange"""
+    symbols = synthetic_symbols(count)
+    return pd.DataFrame({
+        'symbol': symbols,
+        'exchange': [EXCHANGES[i % len(EXCHANGES)] for i in range(count)],
+        'type': ['STOCK'] * count,
+        'organ_short_name': [f"Company {symbol}" for symbol in symbols],
+        'organ_name': [f"Joint Stock Company {symbol}" for symbol in symbols],
+    })
+
+class _Quote:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, start: str, end: str, interval: str = '1D') -> pd.DataFrame:
+        return synthetic_bars(self.symbol, start, end)
+
+class _Listing:
+    def __init__(self, count: int):
+        self.count = count
+
+    def symbols_by_exchange(self) -> pd.DataFrame:
+        return synthetic_listing(self.count)
+
+    def symbols_by_group(self, group: str) -> pd.Series:
+        return pd.Series(synthetic_symbols(self.count)[:30 if group == 'VN30' else self.count], name='symbol')
+
+def install_vnstock_stub(listing_size: int = 1600):
+    """Register the fake vnstock module (must run before vnstock is first used)"""
+    module = types.ModuleType('vnstock')
+
+    class Stock:
+        def __init__(self, symbol=None):
+            self.quote = _Quote(symbol)
+            self.listing = _Listing(listing_size)
+
+    class Vnstock:
+        def stock(self, symbol=None, source=None):
+            return Stock(symbol)
+
+    module.Vnstock = Vnstock
+    sys.modules['vnstock'] = module
@@ -0,0 +1,237 @@
+"""
+Offline performance benchmark suite
+
+Runs the hot paths of the bot on synthetic OHLCV data with a stubbed vnstock
+(see benchmarks/stubs.py), so results are reproducible and need no network:
+
+- TradingStrategy.analyze_trend and _calculate_atr on one symbol
+- TradingStrategy.generate_recommendations for 10 / 100 / 1,600 symbols
+  (bar store already filled, plus a cold run that downloads every symbol)
+- ExchangeInfo._load_all_symbols_by_exchanges index building
+- StockInfo.calculate_position_size (scalar and vectorized)
+- Screener over 1,600 symbols
+- RollingCorrelation update of one bar for 1,600 symbols
+- QuoteStream ingesting a batch of 2,000 quotes for the HOSE-sized universe
+
+Every benchmark is repeated and the median is reported. Results can be saved
+and compared against an earlier run to catch regressions.
+
+Usage:
+    python -m benchmarks.suite [--filter TEXT] [--repeat N]
+                               [--save results.json] [--compare baseline.json] [--threshold 1.25]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.stubs import install_vnstock_stub, synthetic_bars, synthetic_listing, synthetic_symbols
+
+UNIVERSE_SIZES = (10, 100, 1600)
+HISTORY_BARS = 250
+
+# name -> setup() returning (function to time, number of calls per timed sample)
+BENCHMARKS: Dict[str, Callable[[], Tuple[Callable[[], object], int]]] = {}
+
+def benchmark(name: str):
+    """Register a benchmark setup function"""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def _frame(symbol: str = 'AAA', bars: int = HISTORY_BARS):
+    return synthetic_bars(symbol).tail(bars).reset_index(drop=True)
+
+@benchmark('analyze_trend (1 symbol, 250 bars)')
+def _analyze_trend():
+    from src.strategy import TradingStrategy
+    strategy, df = TradingStrategy(), _frame()
+    return lambda: strategy.analyze_trend(df.copy()), 20
+
+@benchmark('analyze_trend (1 symbol, 2,500 bars)')
+def _analyze_trend_long():
+    from src.strategy import TradingStrategy
+    strategy, df = TradingStrategy(), _frame(bars=2500)
+    return lambda: strategy.analyze_trend(df.copy()), 10
+
+@benchmark('_calculate_atr (1 symbol, 250 bars)')
+def _calculate_atr():
+    from src.strategy import TradingStrategy
+    strategy, df = TradingStrategy(), _frame()
+    return lambda: strategy._calculate_atr(df), 50
+
+def _recommendations(count: int, warm: bool):
+    from src.bar_store import BarStore
+    from src.stock_info import StockInfo
+    from src.strategy import TradingStrategy
+    store_dir = tempfile.mkdtemp(prefix='bars-', dir='.')
+    stock_info = StockInfo(bar_store=BarStore(store_dir))
+    strategy = TradingStrategy()
+    symbols = synthetic_symbols(count)
+    if warm:
+        strategy.generate_recommendations(stock_info, symbols)
+        return lambda: strategy.generate_recommendations(stock_info, symbols), 1
+
+    def cold():
+        # Empty the store so every symbol is downloaded and written again
+        for path in Path(store_dir).glob('*.parquet'):
+            path.unlink()
+        strategy.generate_recommendations(stock_info, symbols)
+    return cold, 1
+
+for _count in UNIVERSE_SIZES:
+    benchmark(f"generate_recommendations ({_count:,} symbols, warm store)")(
+        lambda count=_count: _recommendations(count, warm=True))
+benchmark('generate_recommendations (100 symbols, cold store)')(lambda: _recommendations(100, warm=False))
+
+@benchmark('_load_all_symbols_by_exchanges index (1,600 symbols)')
+def _listing_index():
+    from src.exchange_info import ExchangeInfo
+    from src.listing_cache import ListingCache
+    cache = ListingCache(root=tempfile.mkdtemp(prefix='listings-', dir='.'))
+    listing = synthetic_listing(1600)
+    cache.get('exchanges', lambda: listing)
+    # A fresh ExchangeInfo on a warm cache measures building the symbol index
+    return lambda: ExchangeInfo(cache)._load_all_symbols_by_exchanges(), 10
+
+@benchmark('get_symbol_info (1,600 lookups)')
+def _symbol_info():
+    from src.exchange_info import ExchangeInfo
+    from src.listing_cache import ListingCache
+    cache = ListingCache(root=tempfile.mkdtemp(prefix='listings-', dir='.'))
+    cache.get('exchanges', lambda: synthetic_listing(1600))
+    info = ExchangeInfo(cache)
+    symbols = synthetic_symbols(1600)
+    return lambda: [info.get_symbol_info(symbol) for symbol in symbols], 5
+
+@benchmark('calculate_position_size (1,600 calls)')
+def _position_size():
+    from src.stock_info import StockInfo
+    stock_info = StockInfo(bar_store=None)
+    prices = [20 + i * 0.01 for i in range(1600)]
+    return lambda: [stock_info.calculate_position_size('AAA', price, price * 0.95) for price in prices], 10
+
+@benchmark('calculate_position_sizes (1,600 vectorized)')
+def _position_sizes():
+    import numpy as np
+    from src.stock_info import StockInfo
+    prices = 20 + np.arange(1600) * 0.01
+    return lambda: StockInfo.calculate_position_sizes(prices, prices * 0.95), 100
+
+@benchmark('Screener.screen_frames (1,600 symbols)')
+def _screener():
+    from src.screener import Screener
+    frames = {symbol: _frame(symbol) for symbol in synthetic_symbols(1600)}
+    screener = Screener(stock_info=object())
+    return lambda: screener.screen_frames(frames), 1
+
+@benchmark('RollingCorrelation.update (1,600 symbols)')
+def _correlation_update():
+    import numpy as np
+    import pandas as pd
+    from src.correlation import RollingCorrelation, DEFAULT_RETURN_WINDOW
+    symbols = synthetic_symbols(1600)
+    closes = np.stack([synthetic_bars(symbol)['close'].to_numpy()[-DEFAULT_RETURN_WINDOW - 2:] for symbol in symbols])
+    times = pd.date_range('2024-01-01', periods=closes.shape[1])
+    matrix = RollingCorrelation(symbols)
+    matrix.extend(times[:-1], closes[:, :-1])
+    # Re-sending the last bar replaces it, so every call does the same work
+    return lambda: matrix.update(times[-1], closes[:, -1]), 20
+
+@benchmark('QuoteStream.ingest (2,000 quotes, 400 symbols)')
+def _quote_stream():
+    import numpy as np
+    from src.quote_stream import QuoteBatch, QuoteStream, ReplaySource
+    symbols = synthetic_symbols(400)
+    rng = np.random.default_rng(0)
+    # The batches are passed to ingest directly, so the replay file is never read
+    stream = QuoteStream(ReplaySource(os.devnull), symbols, interval=1, on_bar=lambda *args: None)
+    state = {'time': np.datetime64('2024-06-03T09:15', 'ns').astype(np.int64)}
+
+    def ingest():
+        # Every batch covers the next 2 seconds, so bars keep closing like in a live session
+        times = state['time'] + np.sort(rng.integers(0, 2 * 10**9, 2000))
+        state['time'] += 2 * 10**9
+        batch = QuoteBatch([symbols[i] for i in rng.integers(0, 400, 2000)], times,
+                           20 + rng.random(2000), rng.integers(1, 50, 2000) * 100.0)
+        stream.ingest(batch)
+    return ingest, 10
+
+def run(names: List[str], repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run the benchmarks, returning per-call timings in milliseconds"""
+    results = {}
+    for name in names:
+        func, number = BENCHMARKS[name]()
+        func()  # Warm-up (imports, caches)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - start) * 1000 / number)
+        results[name] = {'median_ms': statistics.median(samples), 'min_ms': min(samples)}
+        print(f"{name:<58} {results[name]['median_ms']:>10.3f} {results[name]['min_ms']:>10.3f}", flush=True)
+    return results
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print the change against a baseline; False if any benchmark got slower than threshold"""
+    ok = True
+    print(f"\n{'Benchmark':<58} {'Baseline':>10} {'Now':>10} {'Ratio':>7}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median_ms'] / baseline[name]['median_ms']
+        slower = ratio > threshold
+        ok &= not slower
+        print(f"{name:<58} {baseline[name]['median_ms']:>10.3f} {result['median_ms']:>10.3f} "
+              f"{ratio:>6.2f}x{'  REGRESSION' if slower else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading Bot offline benchmark suite')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5, help='timed samples per benchmark (median is reported)')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    args = parser.parse_args()
+
+    for path in (args.save, args.compare):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    save_path = os.path.abspath(args.save) if args.save else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    install_vnstock_stub()
+    logging.disable(logging.INFO)  # generate_recommendations logs every symbol
+    names = [name for name in BENCHMARKS if args.filter.lower() in name.lower()]
+
+    with tempfile.TemporaryDirectory(prefix='trading-bot-bench-') as workdir:
+        # StockInfo keeps its favorites and caches under ./data
+        os.chdir(workdir)
+        print(f"{'Benchmark':<58} {'Median ms':>10} {'Min ms':>10}")
+        print("-" * 80)
+        results = run(names, args.repeat)
+
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    if compare_path:
+        with open(compare_path) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,70 @@
-from src.trading_bot import TradingBot
-import schedule
-import time
+import argparse
 import logging
+from src.log_config import configure_logging
+from src.scheduler import MarketScheduler, INTRADAY_INTERVALS
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+_bot = None
+_bot_options = {}
 
 def run_trading_bot():
     """Execute the trading bot analysis"""
-    bot = TradingBot()
-    bot.run()
+    global _bot
+    if _bot is None:
+        # Imported on first run so the scheduler process starts without loading pandas/vnstock
+        from src.trading_bot import TradingBot
+        from src.recommendation_sink import create_sink
+        options = dict(_bot_options)
+        options['sink'] = create_sink(options['sink'])
+        _bot = TradingBot(**options)  # Kept between runs so clients and caches stay warm
+    _bot.run()
+
+def _close_bot():
+    """Flush the bot's recommendation sink before exiting"""
+    if _bot is not None:
+        _bot.close()
 
 def main():
-    # Run immediately when starting
+    parser = argparse.ArgumentParser(description='Scheduled trading bot')
+    parser.add_argument('--interval', type=int, choices=INTRADAY_INTERVALS, default=None,
+                        help='run on every N-minute bar close during trading sessions (default: daily at 15:30)')
+    parser.add_argument('--no-initial-run', action='store_true', help='wait for the first trigger instead of running at start-up')
+    parser.add_argument('--prometheus-file', default=None, help='write run metrics in the Prometheus text format to this file')
+    parser.add_argument('--profile', action='store_true', help='run once under cProfile, save the dump to data/profiles and exit')
+    parser.add_argument('--paper', action='store_true', help='place the recommendations as paper-trading orders')
+    parser.add_argument('--confirm-timeframe', choices=['1W', '1M'], default=None,
+                        help='only keep signals that agree with the weekly or monthly trend')
+    parser.add_argument('--dedupe-threshold', type=float, default=None,
+                        help='drop BUY signals whose return correlation with a stronger BUY or a held position reaches this value')
+    parser.add_argument('--correlation-group', default=None,
+                        help='group the correlation matrix covers, e.g. VN30 or HOSE (default: favorite and held symbols)')
+    parser.add_argument('--watchlist', default='favorites',
+                        help='watchlist whose symbols are analyzed (default: favorites, shared with the stock UI)')
+    parser.add_argument('--sink', choices=['parquet', 'sqlite', 'none'], default='parquet',
+                        help='where recommendations are stored (default: parquet files under data/recommendations)')
+    args = parser.parse_args()
+    _bot_options['prometheus_file'] = args.prometheus_file
+    _bot_options['sink'] = args.sink
+    _bot_options['paper_trading'] = args.paper
+    _bot_options['confirm_timeframe'] = args.confirm_timeframe
+    _bot_options['dedupe_threshold'] = args.dedupe_threshold
+    _bot_options['correlation_group'] = args.correlation_group
+    _bot_options['watchlist'] = args.watchlist
+    configure_logging()
+
+    if args.profile:
+        from src.instrumentation import profile_call
+        profile_call(run_trading_bot)
+        _close_bot()
+        return
+
     logging.info("Starting trading bot...")
-    run_trading_bot()
-    
-    # Schedule to run every day at 15:30 (market close)
-    schedule.every().day.at("15:30").do(run_trading_bot)
-    
-    logging.info("Trading bot scheduled to run daily at 15:30")
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    scheduler = MarketScheduler(run_trading_bot, interval=args.interval)
+    try:
+        scheduler.run_forever(run_on_start=not args.no_initial_run)
+    except KeyboardInterrupt:
+        logging.info("Trading bot stopped.")
+    finally:
+        _close_bot()
 
 if __name__ == "__main__":
     main()
@@ -1 +1,187 @@
-# maybe dont nneed to imple a new server class, just use the existing one
\ No newline at end of file
+"""
+Local market-data server
+
+Owns the bar store (data/bars) and the listing cache (data/listings) and
+serves them over HTTP to any number of StockInfo clients running in remote
+mode, so the scheduled bot, the interactive UI and notebooks share one warm
+cache and one rate limit against Vnstock. Frames are sent as Arrow IPC
+streams.
+
+Endpoints:
+    GET /health                                   -> "ok"
+    GET /bars?symbol=VNM[&start=YYYY-MM-DD][&end=YYYY-MM-DD][&interval=1D|1m]
+    GET /listing/exchanges
+    GET /listing/group?name=VN30
+
+Usage:
+    python -m server.data_server [--host 127.0.0.1] [--port 8765] [--rps 5]
+
+Clients:
+    export DATA_SERVER_URL=http://127.0.0.1:8765
+"""
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.data_client import ARROW_STREAM_TYPE, DEFAULT_DATA_SERVER_HOST, DEFAULT_DATA_SERVER_PORT, encode_frame
+from src.log_config import configure_logging
+from src.stock_info import StockInfo
+from src.timeframes import DAILY_BASE, INTRADAY_BASE
+
+DEFAULT_REFRESH_INTERVAL = 60  # Seconds a topped-up symbol is served from the store without refetching
+
+class MarketDataService:
+    """
+    Bars and listings shared by all clients of the data server
+
+    StockInfo already skips Vnstock once the store holds the last closed
+    session, but while a session is open (or before its bars are stored)
+    every request for a symbol tops it up again. The service only dedupes
+    those top-ups: it remembers when each symbol was last topped up and
+    serves repeated requests within ``refresh_interval`` seconds straight
+    from the bar store; concurrent requests for the same symbol wait for
+    the one fetch in flight.
+    """
+
+    def __init__(self, stock_info: Optional[StockInfo] = None, refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        """
+        Initialize the service
+
+        Args:
+            stock_info (Optional[StockInfo]): Local (non-remote) data handler owning the caches
+            refresh_interval (float): Seconds before a symbol is topped up again (default: 60)
+        """
+        self.stock_info = stock_info if stock_info is not None else StockInfo(data_server_url='')
+        if self.stock_info.is_remote:
+            raise ValueError("The data server needs a local StockInfo, not a remote one")
+        self.refresh_interval = refresh_interval
+        # (symbol, interval) -> (topped up at, start, end)
+        self._topped_up: Dict[Tuple[str, str], Tuple[float, pd.Timestamp, pd.Timestamp]] = {}
+        self._symbol_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _symbol_lock(self, symbol: str) -> threading.Lock:
+        with self._lock:
+            if symbol not in self._symbol_locks:
+                self._symbol_locks[symbol] = threading.Lock()
+            return self._symbol_locks[symbol]
+
+    def bars(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             interval: str = DAILY_BASE) -> Optional[pd.DataFrame]:
+        """Stored-resolution ('1D' or '1m') bars for a symbol, topping up at most once per refresh interval"""
+        if interval not in (DAILY_BASE, INTRADAY_BASE):
+            raise ValueError(f"Invalid interval: {interval} (the server serves {DAILY_BASE} and {INTRADAY_BASE} bars)")
+        if start_date is None:
+            start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+        key = (symbol, interval)
+        with self._symbol_lock(symbol):
+            entry = self._topped_up.get(key)
+            if entry is not None and time.time() - entry[0] < self.refresh_interval and entry[1] <= start and entry[2] >= end:
+                store = self.stock_info.bar_store if interval == DAILY_BASE else self.stock_info.intraday_store
+                df = store.read(symbol)
+                return self.stock_info.slice_bars(df, start, end) if df is not None else None
+
+            df = self.stock_info.get_historical_data(symbol, start_date, end_date, interval)
+            if df is not None:
+                if entry is not None and time.time() - entry[0] < self.refresh_interval:
+                    start, end = min(start, entry[1]), max(end, entry[2])
+                self._topped_up[key] = (time.time(), start, end)
+            return df
+
+    def symbols_by_exchange(self) -> pd.DataFrame:
+        """Listing of all symbols, from the listing cache"""
+        return self.stock_info._load_all_symbols_by_exchanges()
+
+    def symbols_by_group(self, group: str) -> pd.DataFrame:
+        """Members of a group, from the listing cache"""
+        return self.stock_info._load_all_symbols_by_group(group).to_frame(name='symbol')
+
+class DataRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a MarketDataService (set as the ``service`` class attribute)"""
+
+    service: MarketDataService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/health':
+                self._send(200, b'ok', 'text/plain')
+            elif url.path == '/bars':
+                if 'symbol' not in params:
+                    self._send(400, b'missing symbol', 'text/plain')
+                    return
+                df = self.service.bars(params['symbol'].upper(), params.get('start'), params.get('end'),
+                                       params.get('interval', DAILY_BASE))
+                self._send_frame(df)
+            elif url.path == '/listing/exchanges':
+                self._send_frame(self.service.symbols_by_exchange())
+            elif url.path == '/listing/group':
+                self._send_frame(self.service.symbols_by_group(params.get('name', '')))
+            else:
+                self._send(404, b'not found', 'text/plain')
+        except ValueError as e:
+            self._send(400, str(e).encode(), 'text/plain')
+        except Exception as e:
+            logging.error(f"Error serving {self.path}: {str(e)}")
+            self._send(500, str(e).encode(), 'text/plain')
+
+    def _send_frame(self, df: Optional[pd.DataFrame]):
+        if df is None:
+            self._send(404, b'no data', 'text/plain')
+        else:
+            self._send(200, encode_frame(df), ARROW_STREAM_TYPE)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} - {format % args}")
+
+def create_server(host: str = DEFAULT_DATA_SERVER_HOST, port: int = DEFAULT_DATA_SERVER_PORT,
+                  service: Optional[MarketDataService] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a threaded data server bound to host:port"""
+    handler = type('BoundDataRequestHandler', (DataRequestHandler,), {
+        'service': service if service is not None else MarketDataService()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading Bot market-data server')
+    parser.add_argument('--host', default=DEFAULT_DATA_SERVER_HOST, help='address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_DATA_SERVER_PORT, help='port to listen on (default: 8765)')
+    parser.add_argument('--rps', type=float, default=None, help='maximum Vnstock requests per second')
+    parser.add_argument('--refresh-interval', type=float, default=DEFAULT_REFRESH_INTERVAL,
+                        help='seconds before a symbol is topped up again (default: 60)')
+    args = parser.parse_args()
+
+    configure_logging(log_file=None)
+    service = MarketDataService(StockInfo(requests_per_second=args.rps, data_server_url=''), args.refresh_interval)
+    server = create_server(args.host, args.port, service)
+    logging.info(f"Data server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ setup(
         "pandas",
         "vnstock",
         "python-dotenv",
+        "pyarrow",
     ],
     entry_points={
         'console_scripts': [
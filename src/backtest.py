@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+import logging
+from typing import Dict, List, Optional
+
+from .bar_store import BarStore
+from .indicators import BarPanel
+from .stock_info import StockInfo, DEFAULT_ACCOUNT_BALANCE
+from .portfolio import LOT_SIZE, PRICE_UNIT
+from .strategy import TradingStrategy, SIGNAL_BUY, SIGNAL_SELL
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Exit reasons recorded in the trade table
+EXIT_SIGNAL = 'signal'
+EXIT_STOP = 'stop_loss'
+EXIT_TARGET = 'take_profit'
+EXIT_END = 'end_of_data'
+EXIT_REASONS = [EXIT_SIGNAL, EXIT_STOP, EXIT_TARGET, EXIT_END]
+
+class BacktestResult:
+    """Trades, equity curve and summary metrics of a backtest run"""
+
+    def __init__(self, trades: pd.DataFrame, equity: pd.Series, metrics: Dict):
+        self.trades = trades
+        self.equity = equity
+        self.metrics = metrics
+
+    def __repr__(self) -> str:
+        return f"BacktestResult({self.metrics})"
+
+class Backtester:
+    """
+    Event-driven backtester replaying stored bars through TradingStrategy rules
+
+    Signals are evaluated on the close of each bar and executed at the open of
+    the next one, long only:
+
+    - BUY opens a position sized by StockInfo.calculate_position_size rules
+      against the current equity, in board lots, with the 2 ATR stop loss and
+      4 ATR take profit of analyze_trend; entries are skipped once the cash
+      cannot pay for them (in symbol order within a bar)
+    - SELL closes an open position
+    - with the strategy's confirm_timeframe, BUY/SELL signals must agree with
+      the higher timeframe trend at their bar, like generate_recommendations
+    - stop loss / take profit are checked against every bar's open (gaps fill
+      at the open) and then its low / high; the stop wins if both are touched
+
+    Time advances bar by bar while all symbols are processed together as
+    NumPy arrays, so the cost grows with the number of bars, not trades.
+    """
+
+    def __init__(self, strategy: Optional[TradingStrategy] = None, bar_store: Optional[BarStore] = None,
+                 initial_capital: float = DEFAULT_ACCOUNT_BALANCE, risk_per_trade: Optional[float] = None,
+                 max_position_size: Optional[float] = None, commission: float = 0.0,
+                 lot_size: int = LOT_SIZE, price_unit: float = PRICE_UNIT):
+        """
+        Initialize the backtester
+
+        Args:
+            strategy (Optional[TradingStrategy]): Strategy whose rules and performance metrics are used
+            bar_store (Optional[BarStore]): Source of the replayed bars (default: data/bars)
+            initial_capital (float): Starting cash in VND (default: 100M VND)
+            risk_per_trade (Optional[float]): Maximum risk per trade as a percentage of capital
+                (default: the strategy's risk_per_trade parameter)
+            max_position_size (Optional[float]): Maximum position size as a percentage of capital
+                (default: the strategy's max_position_size parameter)
+            commission (float): Commission per side as a fraction of traded value (default: 0)
+            lot_size (int): Shares per board lot (default: 100)
+            price_unit (float): VND per quoted price unit (default: 1000)
+        """
+        self.strategy = strategy if strategy is not None else TradingStrategy()
+        self.bar_store = bar_store
+        self.initial_capital = initial_capital
+        self.risk_per_trade = risk_per_trade if risk_per_trade is not None else self.strategy.params['risk_per_trade']
+        self.max_position_size = max_position_size if max_position_size is not None else self.strategy.params['max_position_size']
+        self.commission = commission
+        self.lot_size = lot_size
+        self.price_unit = price_unit
+
+    def load_panel(self, symbols: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None) -> BarPanel:
+        """Load the stored bars of many symbols into a panel"""
+        if self.bar_store is None:
+            self.bar_store = BarStore()
+        frames = {}
+        for symbol in symbols:
+            df = self.bar_store.read(symbol)
+            if df is None or df.empty:
+                logging.warning(f"No stored bars for {symbol}, skipping")
+                continue
+            if start_date is not None:
+                df = df[df['time'] >= pd.Timestamp(start_date)]
+            if end_date is not None:
+                df = df[df['time'] <= pd.Timestamp(end_date)]
+            frames[symbol] = df
+        return BarPanel.from_frames(frames, fields=('open', 'high', 'low', 'close'))
+
+    def run(self, panel: BarPanel, update_metrics: bool = True, trade_from: int = 0,
+            indicators: Optional[Dict[str, np.ndarray]] = None) -> BacktestResult:
+        """
+        Backtest the strategy over a bar panel
+
+        Args:
+            panel (BarPanel): Bars with open/high/low/close fields
+            update_metrics (bool): Feed every closed trade to strategy.update_performance_metrics
+            trade_from (int): First bar on which orders may execute; earlier bars only warm up
+                the indicators, and the equity curve starts there
+            indicators (Optional[Dict[str, np.ndarray]]): Precomputed strategy.compute_indicators
+                output for the panel, to share between runs with the same indicator windows
+
+        Returns:
+            BacktestResult: Trade table, daily equity curve (cash plus positions at the
+            close, in VND) and summary metrics; profits are in VND after commissions
+        """
+        open_, high, low, close = panel['open'], panel['high'], panel['low'], panel['close']
+        n_symbols, n_bars = close.shape
+
+        if indicators is None:
+            indicators = self.strategy.compute_indicators(close, high, low)
+        signals = self.strategy.generate_signal_panel(indicators, panel.times)
+        stop_levels, target_levels = self.strategy.risk_levels(indicators)
+        mark_prices = pd.DataFrame(close.T).ffill().to_numpy().T
+
+        shares = np.zeros(n_symbols, dtype=np.int64)
+        entry_price = np.zeros(n_symbols)
+        entry_bar = np.zeros(n_symbols, dtype=np.int64)
+        stop = np.zeros(n_symbols)
+        target = np.zeros(n_symbols)
+        lowest = np.zeros(n_symbols)
+        cash = float(self.initial_capital)
+        equity = np.full(n_bars, float(self.initial_capital))
+        unit = self.price_unit
+        closed: List[Dict[str, np.ndarray]] = []
+
+        def close_positions(mask: np.ndarray, price: np.ndarray, bar: int, reason: str):
+            nonlocal cash
+            idx = np.flatnonzero(mask)
+            if idx.size == 0:
+                return
+            exit_price = price[idx]
+            qty = shares[idx]
+            cost = self.commission * qty * (entry_price[idx] + exit_price) * unit
+            profit = qty * (exit_price - entry_price[idx]) * unit - cost
+            cash += float(np.sum(qty * exit_price * unit * (1.0 - self.commission)))
+            closed.append({
+                'row': idx,
+                'entry_bar': entry_bar[idx],
+                'exit_bar': np.full(idx.size, bar),
+                'entry_price': entry_price[idx],
+                'exit_price': exit_price,
+                'shares': qty,
+                'profit': profit,
+                'drawdown': (entry_price[idx] - np.minimum(lowest[idx], exit_price)) / entry_price[idx],
+                'reason': np.full(idx.size, EXIT_REASONS.index(reason), dtype=np.int8),
+            })
+            shares[idx] = 0
+
+        for bar in range(max(trade_from, 1), n_bars):
+            o, h, l = open_[:, bar], high[:, bar], low[:, bar]
+            traded = ~np.isnan(o)
+            prev_signal = signals[:, bar - 1]
+
+            # Orders from the previous close execute at this open
+            holding = (shares > 0) & traded
+            close_positions(holding & (prev_signal == SIGNAL_SELL), o, bar, EXIT_SIGNAL)
+
+            entering = ((shares == 0) & traded & (prev_signal == SIGNAL_BUY)
+                        & (o > stop_levels[:, bar - 1]))
+            if entering.any():
+                entering, size = self._fund_entries(entering, close[:, bar - 1], stop_levels[:, bar - 1],
+                                                    o, equity[bar - 1], cash)
+                shares[entering] = size[entering]
+                cash -= float(np.sum(size[entering] * o[entering] * unit * (1.0 + self.commission)))
+            entry_price[entering] = o[entering]
+            entry_bar[entering] = bar
+            stop[entering] = stop_levels[entering, bar - 1]
+            target[entering] = target_levels[entering, bar - 1]
+            lowest[entering] = o[entering]
+
+            # Gaps through the stop or target fill at the open
+            holding = (shares > 0) & traded
+            close_positions(holding & (o <= stop), o, bar, EXIT_STOP)
+            holding = (shares > 0) & traded
+            close_positions(holding & (o >= target), o, bar, EXIT_TARGET)
+
+            # Intrabar stop / target touches fill at the level
+            holding = (shares > 0) & traded
+            lowest[holding] = np.minimum(lowest[holding], l[holding])
+            close_positions(holding & (l <= stop), stop, bar, EXIT_STOP)
+            holding = (shares > 0) & traded
+            close_positions(holding & (h >= target), target, bar, EXIT_TARGET)
+
+            equity[bar] = cash + np.sum(shares * np.nan_to_num(mark_prices[:, bar])) * unit
+
+        if n_bars:
+            close_positions(shares > 0, np.nan_to_num(mark_prices[:, -1]), n_bars - 1, EXIT_END)
+            equity[-1] = cash
+
+        trades = self._build_trade_table(panel, closed)
+        equity_curve = pd.Series(equity[trade_from:], index=panel.times[trade_from:], name='equity')
+        if update_metrics:
+            for trade in trades.itertuples(index=False):
+                self.strategy.update_performance_metrics(trade.symbol, {
+                    'profit': trade.profit,
+                    'drawdown': trade.drawdown
+                })
+        return BacktestResult(trades, equity_curve, self._summarize(trades, equity_curve))
+
+    def _fund_entries(self, entering: np.ndarray, signal_close: np.ndarray, stop_levels: np.ndarray,
+                      open_: np.ndarray, equity: float, cash: float):
+        """
+        Size the entries of a bar against the equity and keep those the cash can pay for
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (funded entry mask, shares per symbol)
+        """
+        size = StockInfo.calculate_position_sizes(
+            signal_close, stop_levels, self.risk_per_trade, self.max_position_size, equity / self.price_unit
+        )
+        size = size // self.lot_size * self.lot_size
+        cost = size * open_ * self.price_unit * (1.0 + self.commission)
+        funded = np.zeros_like(entering)
+        for row in np.flatnonzero(entering & (size > 0)):
+            if cost[row] <= cash:
+                funded[row] = True
+                cash -= cost[row]
+        return funded, size
+
+    def run_symbols(self, symbols: List[str], start_date: Optional[str] = None, end_date: Optional[str] = None) -> BacktestResult:
+        """Load stored bars for symbols and backtest them"""
+        return self.run(self.load_panel(symbols, start_date, end_date))
+
+    @staticmethod
+    def _build_trade_table(panel: BarPanel, closed: List[Dict[str, np.ndarray]]) -> pd.DataFrame:
+        columns = ['symbol', 'entry_time', 'exit_time', 'entry_price', 'exit_price',
+                   'shares', 'profit', 'drawdown', 'reason']
+        if not closed:
+            return pd.DataFrame(columns=columns)
+        data = {key: np.concatenate([batch[key] for batch in closed]) for key in closed[0]}
+        trades = pd.DataFrame({
+            'symbol': np.asarray(panel.symbols, dtype=object)[data['row']],
+            'entry_time': panel.times[data['entry_bar']],
+            'exit_time': panel.times[data['exit_bar']],
+            'entry_price': data['entry_price'],
+            'exit_price': data['exit_price'],
+            'shares': data['shares'],
+            'profit': data['profit'],
+            'drawdown': data['drawdown'],
+            'reason': pd.Categorical.from_codes(data['reason'], EXIT_REASONS),
+        })
+        return trades.sort_values(['exit_time', 'symbol'], kind='stable').reset_index(drop=True)
+
+    def _summarize(self, trades: pd.DataFrame, equity: pd.Series) -> Dict:
+        """Summary metrics named like TradingStrategy.performance_metrics"""
+        total_trades = len(trades)
+        winning_trades = int((trades['profit'] > 0).sum()) if total_trades else 0
+        total_profit = float(trades['profit'].sum()) if total_trades else 0.0
+
+        peak = equity.cummax()
+        drawdown = ((peak - equity) / peak).max() if len(equity) else 0.0
+        returns = equity.pct_change().dropna()
+        std = returns.std()
+        sharpe = float(returns.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR)) if len(returns) > 1 and std > 0 else 0.0
+
+        return {
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'losing_trades': total_trades - winning_trades,
+            'total_profit': total_profit,
+            'max_drawdown': float(drawdown),
+            'sharpe_ratio': sharpe,
+            'win_rate': winning_trades / total_trades if total_trades else 0.0,
+            'avg_profit': total_profit / total_trades if total_trades else 0.0,
+            'final_equity': float(equity.iloc[-1]) if len(equity) else float(self.initial_capital),
+        }
+
+if __name__ == "__main__":
+    stock_info = StockInfo()
+    backtester = Backtester(bar_store=stock_info.bar_store)
+    print(backtester.run_symbols(stock_info.symbols).metrics)
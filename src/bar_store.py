@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Tuple
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+BAR_STORE_DIR = 'data/bars'
+BAR_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'volume']
+COVERAGE_START_KEY = b'coverage_start'
+
+class BarStore:
+    """
+    On-disk per-symbol OHLCV store
+
+    Every symbol is kept in its own Parquet file (``data/bars/<SYMBOL>.parquet``)
+    sorted by ``time``. The file metadata also records the earliest date that
+    has been requested from the data source, so a symbol that was listed after
+    the requested start date is not backfilled again on every run.
+    """
+
+    def __init__(self, root: str = BAR_STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.parquet"
+
+    def lock(self, symbol: str) -> threading.Lock:
+        """Get the lock guarding read-modify-write cycles on a symbol file"""
+        with self._locks_guard:
+            if symbol not in self._locks:
+                self._locks[symbol] = threading.Lock()
+            return self._locks[symbol]
+
+    def has(self, symbol: str) -> bool:
+        """Check whether bars are stored for a symbol"""
+        return self._path(symbol).exists()
+
+    def read(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Read all stored bars for a symbol, or None if nothing is stored"""
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            return pq.read_table(path).to_pandas()
+        except Exception as e:
+            logging.error(f"Error reading bars for {symbol}: {str(e)}")
+            return None
+
+    def modified(self, symbol: str) -> Optional[datetime]:
+        """When the stored bars were last written or confirmed current (touch), or None if nothing is stored"""
+        try:
+            return datetime.fromtimestamp(self._path(symbol).stat().st_mtime, timezone.utc)
+        except FileNotFoundError:
+            return None
+
+    def touch(self, symbol: str):
+        """Record that the stored bars were just confirmed against the source without changes"""
+        try:
+            os.utime(self._path(symbol))
+        except FileNotFoundError:
+            pass
+
+    def coverage(self, symbol: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Get the date range covered by the stored bars
+
+        Returns:
+            Optional[Tuple[pd.Timestamp, pd.Timestamp]]: (coverage start, last bar time),
+            where coverage start is the earliest date already requested from the source
+        """
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            metadata = pq.read_metadata(path)
+            schema_meta = metadata.schema.to_arrow_schema().metadata or {}
+            times = pq.read_table(path, columns=['time']).column('time').to_pandas()
+        except Exception as e:
+            logging.error(f"Error reading bar metadata for {symbol}: {str(e)}")
+            return None
+        if times.empty:
+            return None
+        first = times.iloc[0]
+        if COVERAGE_START_KEY in schema_meta:
+            first = min(first, pd.Timestamp(schema_meta[COVERAGE_START_KEY].decode()))
+        return first, times.iloc[-1]
+
+    def write(self, symbol: str, df: pd.DataFrame, coverage_start: Optional[pd.Timestamp] = None):
+        """Atomically replace the stored bars for a symbol"""
+        df = self._normalize(df)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if coverage_start is None and not df.empty:
+            coverage_start = df['time'].iloc[0]
+        if coverage_start is not None:
+            metadata[COVERAGE_START_KEY] = pd.Timestamp(coverage_start).strftime('%Y-%m-%d').encode()
+        table = table.replace_schema_metadata(metadata)
+
+        path = self._path(symbol)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def append(self, symbol: str, df: pd.DataFrame, coverage_start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Merge new bars into the stored bars for a symbol
+
+        Bars with a time that is already stored replace the old ones, so a
+        partial bar of the current session is overwritten by the final one.
+        When the new bars are all stored already with the same values (a
+        refresh of a closed session) the file is not rewritten.
+
+        Returns:
+            pd.DataFrame: All stored bars after the merge
+        """
+        existing = self.read(symbol)
+        if existing is not None and not existing.empty:
+            if self._contains(existing, df) and (coverage_start is None or
+                                                 coverage_start >= self._coverage_start(symbol, existing)):
+                return existing
+            old_coverage = self.coverage(symbol)
+            if old_coverage is not None:
+                coverage_start = old_coverage[0] if coverage_start is None else min(coverage_start, old_coverage[0])
+            if df is not None and not df.empty:
+                df = pd.concat([existing, self._normalize(df)], ignore_index=True)
+            else:
+                df = existing
+        merged = self._normalize(df)
+        self.write(symbol, merged, coverage_start)
+        return merged
+
+    def _coverage_start(self, symbol: str, existing: pd.DataFrame) -> pd.Timestamp:
+        """Coverage start from the file metadata, or the first stored bar"""
+        first = existing['time'].iloc[0]
+        try:
+            schema_meta = pq.read_schema(self._path(symbol)).metadata or {}
+        except Exception:
+            return first
+        if COVERAGE_START_KEY in schema_meta:
+            first = min(first, pd.Timestamp(schema_meta[COVERAGE_START_KEY].decode()))
+        return first
+
+    @staticmethod
+    def _contains(existing: pd.DataFrame, df: Optional[pd.DataFrame]) -> bool:
+        """Whether every bar of df is already stored with the same values"""
+        if df is None or df.empty:
+            return True
+        times = pd.to_datetime(df['time']).to_numpy(dtype='datetime64[ns]')
+        stored = existing['time'].to_numpy(dtype='datetime64[ns]')
+        rows = np.searchsorted(stored, times)
+        if (rows >= len(stored)).any() or (stored[rows] != times).any():
+            return False
+        columns = [column for column in BAR_COLUMNS[1:] if column in df.columns]
+        if len(columns) != len(BAR_COLUMNS) - 1:
+            return False
+        new_values = df[columns].to_numpy(dtype=float)
+        return bool(np.array_equal(existing[columns].to_numpy(dtype=float)[rows], new_values, equal_nan=True))
+
+    @staticmethod
+    def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """Sort bars by time and drop duplicate timestamps, keeping the latest"""
+        if df is None or df.empty:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        df = df.copy()
+        df['time'] = pd.to_datetime(df['time'])
+        df = df.drop_duplicates(subset='time', keep='last')
+        return df.sort_values('time').reset_index(drop=True)
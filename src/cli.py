@@ -1,4 +1,3 @@
-from .stock_ui import StockUI
 import sys
 import argparse
 
@@ -8,6 +7,8 @@ def main():
     
     args = parser.parse_args()
     
+    # Imported after argument parsing so --help / --version stay instant
+    from .stock_ui import StockUI
     try:
         ui = StockUI()
         ui.run()
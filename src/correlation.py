@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+from .lazy import lazy_import
+from .pipeline import fetch_in_order, DEFAULT_FETCH_WORKERS
+from .timeframes import DAILY_BASE, base_interval
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+CORRELATION_DIR = 'data/correlation'
+DEFAULT_RETURN_WINDOW = 60        # Returns in the rolling window
+DEFAULT_MIN_PERIODS = 20          # Valid returns a symbol needs before it gets a correlation
+DEFAULT_DEDUPE_THRESHOLD = 0.8    # BUY signals correlated above this with a kept one are dropped
+INTRADAY_SEED_DAYS = 30           # History loaded to seed an intraday window
+
+# Cross products are rebuilt from the window this often to stop float32 drift
+RESUM_INTERVAL = 1000
+
+class RollingCorrelation:
+    """
+    Rolling covariance / correlation of the bar returns of a fixed symbol set
+
+    The last ``window`` return vectors are kept in a ring buffer, together
+    with the per-symbol return sums and the N x N matrix of summed cross
+    products. A new bar adds the outer product of its returns and subtracts
+    the one of the return leaving the window, a single rank-2 update of
+    O(N^2) instead of recomputing O(window * N^2) from scratch. A bar with
+    the same time as the last one replaces it (e.g. a still-forming
+    intraday bar).
+
+    With a ``path`` the ring buffer and the cross products live in float32
+    ``.npy`` memory maps (1,600 symbols take 10 MB), so the state survives
+    restarts and several processes can read the same matrix.
+
+    A symbol without a bar (suspended, not yet listed) contributes a zero
+    return to that row; the close it resumes from is its last known one.
+    Symbols with fewer than ``min_periods`` valid returns in the window get
+    NaN covariances.
+    """
+
+    def __init__(self, symbols: Sequence[str], window: int = DEFAULT_RETURN_WINDOW,
+                 min_periods: int = DEFAULT_MIN_PERIODS, path: Optional[str] = None):
+        """
+        Open the saved state at path, or start an empty window
+
+        Saved state is discarded when it was built for other symbols or
+        another window.
+
+        Args:
+            symbols (Sequence[str]): Symbols of the matrix, in row order
+            window (int): Returns in the rolling window (default: 60)
+            min_periods (int): Valid returns a symbol needs for a covariance (default: 20)
+            path (Optional[str]): Directory holding the memory-mapped state (default: in memory only)
+        """
+        self.symbols: List[str] = list(symbols)
+        self.index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.min_periods = min(min_periods, window)
+        self.path = Path(path) if path else None
+        self.position = 0      # Ring slot the next bar is written to
+        self.filled = 0        # Return rows in the window
+        self.updates = 0
+        self.last_time = None  # np.datetime64 of the last bar
+        self._lock = threading.Lock()
+        if not (self.path and self._open()):
+            self._create()
+
+    def _create(self):
+        n = len(self.symbols)
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+            open_memmap = np.lib.format.open_memmap
+            self.returns = open_memmap(self.path / 'returns.npy', mode='w+', dtype=np.float32, shape=(self.window, n))
+            self.cross = open_memmap(self.path / 'cross.npy', mode='w+', dtype=np.float32, shape=(n, n))
+            self.vectors = open_memmap(self.path / 'vectors.npy', mode='w+', dtype=np.float64, shape=(4, n))
+        else:
+            self.returns = np.zeros((self.window, n), dtype=np.float32)
+            self.cross = np.zeros((n, n), dtype=np.float32)
+            self.vectors = np.zeros((4, n))
+        self.returns[:] = np.nan
+        self.cross[:] = 0
+        self.vectors[:2] = 0
+        self.vectors[2:] = np.nan
+        self.position = self.filled = self.updates = 0
+        self.last_time = None
+
+    def _open(self) -> bool:
+        """Map the saved state if it matches the symbols and window"""
+        try:
+            with open(self.path / 'meta.json', 'r') as f:
+                meta = json.load(f)
+            if meta['symbols'] != self.symbols or meta['window'] != self.window:
+                return False
+            open_memmap = np.lib.format.open_memmap
+            self.returns = open_memmap(self.path / 'returns.npy', mode='r+')
+            self.cross = open_memmap(self.path / 'cross.npy', mode='r+')
+            self.vectors = open_memmap(self.path / 'vectors.npy', mode='r+')
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+            logging.error(f"Error loading correlation state from {self.path}: {str(e)}")
+            return False
+        self.position, self.filled, self.updates = meta['position'], meta['filled'], meta['updates']
+        self.last_time = np.datetime64(meta['last_time']) if meta['last_time'] else None
+        return True
+
+    # Rows of self.vectors
+    @property
+    def sums(self) -> np.ndarray:
+        return self.vectors[0]
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.vectors[1]
+
+    @property
+    def closes(self) -> np.ndarray:
+        """Last known close of every symbol"""
+        return self.vectors[2]
+
+    @property
+    def prev_closes(self) -> np.ndarray:
+        """Closes before the last bar, which a replacement of the last bar is measured from"""
+        return self.vectors[3]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def update(self, time, closes: np.ndarray):
+        """
+        Add the closes of one bar
+
+        Args:
+            time: Bar time (anything np.datetime64 accepts)
+            closes (np.ndarray): Close of every symbol in row order, NaN when it has no bar
+        """
+        time = np.datetime64(pd.Timestamp(time).to_datetime64(), 'ns')
+        closes = np.asarray(closes, dtype=float)
+        with self._lock:
+            if self.last_time is not None and time < self.last_time:
+                raise ValueError(f"Bar at {time} is older than the last processed bar at {self.last_time}")
+            replace = self.last_time is not None and time == self.last_time
+            if replace:
+                slot = (self.position - 1) % self.window
+            else:
+                slot = self.position
+                self.prev_closes[:] = self.closes
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                new = np.where(self.prev_closes > 0, closes / self.prev_closes - 1, np.nan)
+            leaving = self.returns[slot] if replace or self.filled == self.window else None
+            self._apply(new, leaving)
+            self.returns[slot] = new
+            self.closes[:] = np.where(np.isfinite(closes), closes, self.prev_closes)
+
+            if not replace:
+                self.position = (self.position + 1) % self.window
+                self.filled = min(self.filled + 1, self.window)
+            self.last_time = time
+            self.updates += 1
+            if self.updates % RESUM_INTERVAL == 0:
+                self._resum()
+
+    def _apply(self, new: np.ndarray, leaving: Optional[np.ndarray]):
+        """Add one return row to the running sums and remove the row leaving the window"""
+        valid = np.isfinite(new)
+        new = np.where(valid, new, 0).astype(np.float32)
+        if leaving is None:
+            self.cross += np.outer(new, new)
+        else:
+            left = np.isfinite(leaving)
+            leaving = np.where(left, leaving, 0).astype(np.float32)
+            # Rank-2 update: new new^T - leaving leaving^T in one matrix product
+            self.cross += np.stack([new, leaving], axis=1) @ np.stack([new, -leaving])
+            self.sums[:] -= leaving
+            self.counts[:] -= left
+        self.sums[:] += new
+        self.counts[:] += valid
+
+    def _resum(self):
+        """Rebuild the sums and cross products from the returns in the window"""
+        rows = np.asarray(self.returns)[self._rows()]
+        valid = np.isfinite(rows)
+        rows = np.where(valid, rows, 0).astype(np.float64)
+        self.cross[:] = rows.T @ rows
+        self.sums[:] = rows.sum(axis=0)
+        self.counts[:] = valid.sum(axis=0)
+
+    def _rows(self) -> np.ndarray:
+        """Ring slots holding returns, oldest first"""
+        if self.filled < self.window:
+            return np.arange(self.filled)
+        return (self.position + np.arange(self.window)) % self.window
+
+    def extend(self, times: Sequence, closes: np.ndarray):
+        """
+        Add many bars at once
+
+        Args:
+            times (Sequence): Bar times, ascending
+            closes (np.ndarray): (symbols x bars) closes, NaN where a symbol has no bar
+        """
+        for column, time in enumerate(times):
+            self.update(time, closes[:, column])
+
+    def ids(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row of each symbol in the matrix (-1 for symbols not covered)"""
+        return np.fromiter((self.index.get(symbol, -1) for symbol in symbols), dtype=np.int64, count=len(symbols))
+
+    def covariance(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Sample covariance matrix of the returns in the window
+
+        Args:
+            ids (Optional[np.ndarray]): Rows to include (default: all symbols)
+
+        Returns:
+            np.ndarray: float32 matrix, NaN for symbols with fewer than min_periods returns
+        """
+        with self._lock:
+            n = self.filled
+            if ids is None:
+                cross, sums, counts = np.array(self.cross), np.array(self.sums), np.array(self.counts)
+            else:
+                ids = np.asarray(ids)
+                cross = np.asarray(self.cross)[np.ix_(ids, ids)]
+                sums, counts = self.sums[ids], self.counts[ids]
+        if n < 2:
+            return np.full(cross.shape, np.nan, dtype=np.float32)
+        cov = (cross - np.outer(sums, sums / n).astype(np.float32)) / np.float32(n - 1)
+        missing = counts < self.min_periods
+        cov[missing, :] = np.nan
+        cov[:, missing] = np.nan
+        return cov
+
+    def correlation(self, ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Correlation matrix of the returns in the window (same layout as covariance)"""
+        cov = self.covariance(ids)
+        std = np.sqrt(np.maximum(np.diagonal(cov), 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        np.clip(corr, -1, 1, out=corr)
+        corr[std == 0, :] = np.nan
+        corr[:, std == 0] = np.nan
+        np.fill_diagonal(corr, np.where(np.isfinite(np.diagonal(corr)), 1, np.nan))
+        return corr
+
+    def flush(self):
+        """Write the memory-mapped state and its metadata to disk"""
+        if not self.path:
+            return
+        with self._lock:
+            for array in (self.returns, self.cross, self.vectors):
+                array.flush()
+            meta = {
+                'symbols': self.symbols,
+                'window': self.window,
+                'position': self.position,
+                'filled': self.filled,
+                'updates': self.updates,
+                'last_time': str(self.last_time) if self.last_time is not None else None,
+            }
+            tmp_path = self.path / f"meta.json.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self.path / 'meta.json')
+
+class CorrelationService:
+    """
+    Rolling return correlations of a universe, kept current from the bar store
+
+    The universe is an ExchangeInfo.VN_EXCHANGES group (e.g. 'VN30' or
+    'HOSE') or an explicit symbol list. ``refresh`` loads only the bars
+    since the last processed one and feeds them to a RollingCorrelation
+    saved under data/correlation, so every cycle costs one rank-2 update
+    per new bar. The matrix is rebuilt from history when the membership
+    of the universe changes.
+
+    ``deduplicate`` uses it to keep one BUY signal per cluster of
+    correlated symbols.
+    """
+
+    def __init__(self, stock_info, universe: Union[str, Sequence[str]], interval: str = DAILY_BASE,
+                 window: int = DEFAULT_RETURN_WINDOW, min_periods: int = DEFAULT_MIN_PERIODS,
+                 threshold: float = DEFAULT_DEDUPE_THRESHOLD, root: Optional[str] = CORRELATION_DIR,
+                 fetch_workers: int = DEFAULT_FETCH_WORKERS):
+        """
+        Initialize the correlation service
+
+        Args:
+            stock_info (StockInfo): Source of listings and bars
+            universe (Union[str, Sequence[str]]): Group name or symbols covered by the matrix
+            interval (str): Bar interval of the returns, one of timeframes.TIMEFRAMES (default: '1D')
+            window (int): Returns in the rolling window (default: 60)
+            min_periods (int): Valid returns a symbol needs for a correlation (default: 20)
+            threshold (float): Correlation at which a BUY signal counts as a duplicate (default: 0.8)
+            root (Optional[str]): Directory of the saved matrices (default: data/correlation, None keeps them in memory)
+            fetch_workers (int): Number of symbols loaded concurrently (default: 8)
+        """
+        base_interval(interval)
+        self.stock_info = stock_info
+        self.universe = universe
+        self.interval = interval
+        self.window = window
+        self.min_periods = min_periods
+        self.threshold = threshold
+        self.root = root
+        self.fetch_workers = fetch_workers
+        self.matrix: Optional[RollingCorrelation] = None
+
+    def _members(self) -> List[str]:
+        if isinstance(self.universe, str):
+            return sorted(set(self.stock_info._load_all_symbols_by_group(self.universe)))
+        return sorted(set(self.universe))
+
+    def _path(self) -> Optional[str]:
+        if not self.root:
+            return None
+        name = self.universe if isinstance(self.universe, str) else 'symbols'
+        return str(Path(self.root) / f"{name}-{self.interval}")
+
+    def refresh(self) -> RollingCorrelation:
+        """
+        Feed the bars since the last update into the matrix
+
+        The last processed bar is loaded again and replaces the stored one,
+        since it may have been saved before the close.
+
+        Returns:
+            RollingCorrelation: The up-to-date matrix
+        """
+        members = self._members()
+        if self.matrix is None or self.matrix.symbols != members:
+            self.matrix = RollingCorrelation(members, self.window, self.min_periods, self._path())
+
+        matrix = self.matrix
+        if matrix.last_time is not None:
+            start = pd.Timestamp(matrix.last_time)
+        elif base_interval(self.interval) == DAILY_BASE:
+            # Enough calendar days for window + 1 sessions (weekends and holidays included)
+            start = pd.Timestamp(datetime.now() - timedelta(days=self.window * 2 + 14))
+        else:
+            start = pd.Timestamp(datetime.now() - timedelta(days=INTRADAY_SEED_DAYS))
+
+        start_date = start.strftime('%Y-%m-%d')
+        fetch = lambda symbol: self.stock_info.get_historical_data(symbol, start_date, interval=self.interval)
+        frames = {symbol: df for symbol, df in fetch_in_order(fetch, members, self.fetch_workers)
+                  if df is not None and not df.empty}
+        if not frames:
+            return matrix
+
+        from .indicators import BarPanel
+        panel = BarPanel.from_frames(frames, fields=('close',))
+        times = panel.times.to_numpy()
+        if matrix.last_time is not None:
+            first = int(np.searchsorted(times, matrix.last_time))
+        else:
+            first = max(len(times) - self.window - 1, 0)
+        closes = np.full((len(matrix), len(times) - first), np.nan)
+        closes[matrix.ids(panel.symbols)] = panel['close'][:, first:]
+        matrix.extend(times[first:], closes)
+        matrix.flush()
+        logging.info(f"Correlation matrix of {len(matrix)} symbols updated with {len(times) - first} bars")
+        return matrix
+
+    def deduplicate(self, recommendations: List[Dict], held: Sequence[str] = ()) -> List[Dict]:
+        """
+        Drop BUY signals that duplicate a stronger or already held one
+
+        BUY recommendations are taken in priority order ('score' when
+        present, otherwise list order). A BUY whose correlation with a held
+        symbol or a BUY kept before it reaches the threshold is turned into
+        a HOLD with a position size of 0. Symbols outside the matrix, or
+        without enough history, are always kept.
+
+        Returns:
+            List[Dict]: The recommendations that were turned into HOLD
+        """
+        buys = [rec for rec in recommendations if rec['signal'] == 'BUY']
+        if self.matrix is None or not buys:
+            return []
+        if all('score' in rec for rec in buys):
+            buys.sort(key=lambda rec: -rec['score'])
+
+        held = [symbol for symbol in held if symbol in self.matrix.index]
+        symbols = held + [rec['symbol'] for rec in buys]
+        ids = self.matrix.ids(symbols)
+        covered = np.flatnonzero(ids >= 0)
+        corr = np.full((len(symbols), len(symbols)), np.nan, dtype=np.float32)
+        corr[np.ix_(covered, covered)] = self.matrix.correlation(ids[covered])
+
+        kept = list(range(len(held)))
+        dropped = []
+        for offset, rec in enumerate(buys):
+            row = len(held) + offset
+            with np.errstate(invalid='ignore'):
+                duplicates = [k for k in kept if corr[row, k] >= self.threshold]
+            if duplicates:
+                match = duplicates[int(np.argmax(corr[row, duplicates]))]
+                logging.info(f"{rec['symbol']} BUY dropped: correlation {corr[row, match]:.2f} "
+                             f"with {symbols[match]}")
+                rec['signal'] = 'HOLD'
+                rec['position_size'] = 0
+                dropped.append(rec)
+            else:
+                kept.append(row)
+        return dropped
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Optional
+from .lazy import lazy_import
+from .instrumentation import Counters
+
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+
+DATA_SERVER_URL_ENV = 'DATA_SERVER_URL'
+DEFAULT_DATA_SERVER_HOST = '127.0.0.1'
+DEFAULT_DATA_SERVER_PORT = 8765
+ARROW_STREAM_TYPE = 'application/vnd.apache.arrow.stream'
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    """Serialize a DataFrame as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def decode_frame(payload: bytes) -> pd.DataFrame:
+    """Deserialize an Arrow IPC stream into a DataFrame"""
+    return pa.ipc.open_stream(payload).read_pandas()
+
+class DataClient:
+    """
+    Client for the local market-data server (server/data_server.py)
+
+    Bars and listings are transferred as Arrow IPC streams, so the frames
+    arrive with their column types intact and without any CSV/JSON parsing.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        Initialize the client
+
+        Args:
+            url (str): Base URL of the data server, e.g. http://127.0.0.1:8765
+            timeout (float): Seconds to wait for a response
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.stats = Counters()  # requests, bytes_received, not_found
+
+    def _get(self, path: str, **params) -> Optional[bytes]:
+        """GET a path, returning the body or None when the server has no data (404)"""
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        url = f"{self.url}{path}" + (f"?{query}" if query else '')
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                self.stats.add('not_found')
+                return None
+            raise
+        self.stats.add('requests')
+        self.stats.add('bytes_received', len(body))
+        return body
+
+    def get_bars(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                 interval: str = '1D') -> Optional[pd.DataFrame]:
+        """Stored-resolution bars ('1D' or '1m') for a symbol (see StockInfo.get_historical_data)"""
+        payload = self._get('/bars', symbol=symbol, start=start_date, end=end_date,
+                            interval=interval if interval != '1D' else None)
+        return decode_frame(payload) if payload is not None else None
+
+    def get_symbols_by_exchange(self) -> pd.DataFrame:
+        """Listing of all symbols with their exchange, type and names"""
+        return decode_frame(self._get('/listing/exchanges'))
+
+    def get_symbols_by_group(self, group: str) -> pd.DataFrame:
+        """Member symbols of a group, as a frame with a 'symbol' column"""
+        return decode_frame(self._get('/listing/group', name=group))
+
+    def is_alive(self) -> bool:
+        """Check whether the server answers"""
+        try:
+            return self._get('/health') == b'ok'
+        except Exception as e:
+            logging.warning(f"Data server at {self.url} is not reachable: {str(e)}")
+            return False
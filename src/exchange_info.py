@@ -1,7 +1,14 @@
-import pandas as pd
-from vnstock import Vnstock
+from __future__ import annotations
+
 import logging
 from typing import Optional, Dict, List, Union
+from .lazy import lazy_import
+from .listing_cache import ListingCache
+from .symbol_master import SymbolMaster
+from .symbol_search import SymbolSearchIndex
+
+pd = lazy_import('pandas')
+vnstock = lazy_import('vnstock')
 
 class ExchangeInfo:
     # Vietnamese exchange symbols
@@ -32,12 +39,34 @@ class ExchangeInfo:
         'CW'        # Covered Warrants
     ]
 
-    def __init__(self):
-        """Initialize the exchange information handler"""
-        self.vnstock = Vnstock()
-        self.stock_info = self.vnstock.stock()
+    def __init__(self, listing_cache: Optional[ListingCache] = None):
+        """
+        Initialize the exchange information handler
+
+        Args:
+            listing_cache (Optional[ListingCache]): Cache for listings and group memberships
+                (default: data/listings with a one-day TTL)
+        """
+        self._vnstock = None
+        self._stock_info = None
         self._exchange_data = None
-        self._symbol_info_map = {}
+        self._symbol_master = None
+        self._search_index = None
+        self.listing_cache = listing_cache if listing_cache is not None else ListingCache()
+
+    @property
+    def vnstock(self):
+        """Vnstock client, created on first use"""
+        if self._vnstock is None:
+            self._vnstock = vnstock.Vnstock()
+        return self._vnstock
+
+    @property
+    def stock_info(self):
+        """Default Vnstock stock handle used for listings, created on first use"""
+        if self._stock_info is None:
+            self._stock_info = self.vnstock.stock()
+        return self._stock_info
 
     def get_all_available_groups(self) -> List[str]:
         """Get all available groups"""
@@ -55,8 +84,24 @@ class ExchangeInfo:
         """
         if group not in self.VN_EXCHANGES:
             raise ValueError(f"Invalid group: {group}")
+        members = self.listing_cache.get(
+            f"group_{group}",
+            lambda: self._fetch_symbols_by_group(group)
+        )
+        return members['symbol']
+
+    def _group_version(self, group: str) -> Optional[float]:
+        """Version of a group's cached membership, for the symbol master's group masks"""
+        return self.listing_cache.version(f"group_{group}", lambda: self._fetch_symbols_by_group(group))
+
+    def _fetch_symbols_by_group(self, group: str) -> pd.Series:
+        """Download the members of a group from the listing source"""
         return self.stock_info.listing.symbols_by_group(group)
 
+    def _fetch_symbols_by_exchange(self) -> pd.DataFrame:
+        """Download the listing of all symbols from the listing source"""
+        return self.stock_info.listing.symbols_by_exchange()
+
     def _load_all_symbols_by_exchanges(self) -> pd.DataFrame:
         """
         Load all symbols from Vnstock
@@ -67,25 +112,43 @@ class ExchangeInfo:
         - organ_short_name: short name of the organization
         - organ_name: full name of the organization
         """
-        if self._exchange_data is None:
-            self._exchange_data = self.stock_info.listing.symbols_by_exchange()
-            # Create a mapping of symbol to its info
-            self._symbol_info_map = {
-                row['symbol']: {
-                    'exchange': row['exchange'],
-                    'type': row['type'],
-                    'organ_short_name': row['organ_short_name'],
-                    'organ_name': row['organ_name']
-                }
-                for _, row in self._exchange_data.iterrows()
-            }
+        exchange_data = self.listing_cache.get(
+            'exchanges',
+            self._fetch_symbols_by_exchange
+        )
+        if exchange_data is not self._exchange_data:
+            # Rebuild the symbol index (later rows win, as before)
+            self._symbol_master = SymbolMaster(exchange_data, self._load_all_symbols_by_group,
+                                               self._group_version)
+            self._search_index = None
+            self._exchange_data = exchange_data
         return self._exchange_data
 
+    def get_symbol_master(self) -> SymbolMaster:
+        """
+        Get the array-backed symbol master with integer symbol IDs
+
+        The master is rebuilt whenever the cached listing is refreshed.
+        """
+        self._load_all_symbols_by_exchanges()
+        return self._symbol_master
+
+    def get_search_index(self) -> SymbolSearchIndex:
+        """
+        Get the symbol / company name search index
+
+        Built on first use and rebuilt with the symbol master.
+        """
+        master = self.get_symbol_master()
+        if self._search_index is None or self._search_index.master is not master:
+            self._search_index = SymbolSearchIndex(master)
+        return self._search_index
+
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """Get detailed information for a specific symbol"""
-        if not self._symbol_info_map:
-            self._load_all_symbols_by_exchanges()
-        return self._symbol_info_map.get(symbol)
+        master = self.get_symbol_master()
+        symbol_id = master.id_of(symbol)
+        return master.info(symbol_id) if symbol_id >= 0 else None
 
     def get_formatted_symbols_by_group(self, group: str) -> List[Dict[str, str]]:
         """
@@ -104,9 +167,8 @@ class ExchangeInfo:
         if group not in self.VN_EXCHANGES:
             raise ValueError(f"Invalid group: {group}")
             
-        # Load all symbols if not already loaded
-        if self._exchange_data is None:
-            self._load_all_symbols_by_exchanges()
+        # Load all symbols (served from the listing cache after the first load)
+        master = self.get_symbol_master()
             
         # Get symbols for the group
         symbols = self._load_all_symbols_by_group(group)
@@ -114,11 +176,12 @@ class ExchangeInfo:
         # Format the data
         formatted_data = []
         for symbol in symbols:
-            info = self._symbol_info_map.get(symbol, {})
+            symbol_id = master.id_of(symbol)
+            info = master.info(symbol_id) if symbol_id >= 0 else {}
             formatted_data.append({
                 'symbol': symbol,
-                'type': info.get('type', 'Unknown'),
-                'organ_short_name': info.get('organ_short_name', 'Unknown')
+                'type': info.get('type') or 'Unknown',
+                'organ_short_name': info.get('organ_short_name') or 'Unknown'
             })
             
         return formatted_data 
\ No newline at end of file
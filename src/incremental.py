@@ -0,0 +1,460 @@
+import json
+import logging
+import math
+import os
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+INDICATOR_STATE_DIR = 'data/indicator_state'
+NAN = float('nan')
+
+# Running sums are rebuilt from the window this often to stop float drift on long streams
+RESUM_INTERVAL = 1000
+
+# Components of IndicatorState, by type
+WINDOW_NAMES = ('sma_20', 'sma_50', 'bollinger', 'stoch_high', 'stoch_low', 'stoch_k', 'true_range')
+EMA_NAMES = ('ema_20', 'rsi_up', 'rsi_down', 'macd_fast', 'macd_slow', 'macd_signal')
+
+def _isnan(x: float) -> bool:
+    return x is None or (isinstance(x, float) and math.isnan(x))
+
+class RollingWindow:
+    """
+    Fixed-size trailing window with running sums
+
+    Values are pushed one at a time. Mean and variance are O(1); min and max
+    scan the window, which is bounded by the (small, fixed) window size.
+    Missing values (NaN) make every statistic NaN while they are inside the
+    window, like pandas ``rolling(window, min_periods=window)``. The last push
+    can be undone in O(1).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+        self._pushes = 0
+        self._evicted: Optional[tuple] = None  # Value dropped by the last push, () if none; None: no undo
+
+    def push(self, x: float):
+        self._evicted = ()
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self._evicted = (old,)
+            self._remove(old)
+        self.values.append(x)
+        self._add(x)
+
+        self._pushes += 1
+        if self._pushes % RESUM_INTERVAL == 0:
+            self._resum()
+
+    def undo(self):
+        """Revert the last push"""
+        if self._evicted is None:
+            raise ValueError("Nothing to undo")
+        self._remove(self.values.pop())
+        for old in self._evicted:
+            self.values.appendleft(old)
+            self._add(old)
+        self._pushes -= 1
+        self._evicted = None
+
+    def _add(self, x: float):
+        if _isnan(x):
+            self.nan_count += 1
+        else:
+            self.total += x
+            self.total_sq += x * x
+
+    def _remove(self, x: float):
+        if _isnan(x):
+            self.nan_count -= 1
+        else:
+            self.total -= x
+            self.total_sq -= x * x
+
+    def _resum(self):
+        valid = [v for v in self.values if not _isnan(v)]
+        self.total = math.fsum(valid)
+        self.total_sq = math.fsum(v * v for v in valid)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def mean(self) -> float:
+        return self.total / self.window if self.full else NAN
+
+    def variance(self) -> float:
+        """Population variance (ddof=0)"""
+        if not self.full:
+            return NAN
+        mean = self.total / self.window
+        return max(self.total_sq / self.window - mean * mean, 0.0)
+
+    def min(self) -> float:
+        return min(self.values) if self.full else NAN
+
+    def max(self) -> float:
+        return max(self.values) if self.full else NAN
+
+    def to_dict(self) -> Dict:
+        data = {'window': self.window, 'values': list(self.values)}
+        if self._evicted is not None:
+            data['evicted'] = list(self._evicted)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RollingWindow':
+        rolling = cls(data['window'])
+        for value in data['values']:
+            rolling.push(NAN if value is None else value)
+        evicted = data.get('evicted')
+        rolling._evicted = None if evicted is None else tuple(NAN if v is None else v for v in evicted)
+        return rolling
+
+class EMAState:
+    """
+    Exponential moving average (pandas ``ewm(adjust=False)``)
+
+    Missing values (NaN) follow pandas' default ``ignore_na=False``, like
+    indicators.ewm_mean: the state is kept, but the older values keep
+    decaying across the gap, so streaming and batch results agree. The last
+    update can be undone.
+    """
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.state = NAN
+        self.count = 0
+        self.weight = 1.0  # Weight of the state relative to a new value, decayed across missing values
+        self._previous: Optional[tuple] = None
+
+    @classmethod
+    def with_span(cls, window: int) -> 'EMAState':
+        return cls(2.0 / (window + 1), window)
+
+    def update(self, x: float) -> float:
+        self._previous = (self.state, self.count, self.weight)
+        started = not _isnan(self.state)
+        if started:
+            self.weight *= 1.0 - self.alpha
+        if not _isnan(x):
+            if started:
+                self.state = (self.weight * self.state + self.alpha * x) / (self.weight + self.alpha)
+            else:
+                self.state = x
+            self.weight = 1.0
+            self.count += 1
+        return self.value
+
+    def undo(self):
+        """Revert the last update"""
+        if self._previous is None:
+            raise ValueError("Nothing to undo")
+        self.state, self.count, self.weight = self._previous
+        self._previous = None
+
+    @property
+    def value(self) -> float:
+        return self.state if self.count >= self.min_periods else NAN
+
+    def to_dict(self) -> Dict:
+        data = {'alpha': self.alpha, 'min_periods': self.min_periods, 'state': self.state, 'count': self.count,
+                'weight': self.weight}
+        if self._previous is not None:
+            data['previous'] = list(self._previous)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'EMAState':
+        ema = cls(data['alpha'], data['min_periods'])
+        ema.state = NAN if data['state'] is None else data['state']
+        ema.count = data['count']
+        ema.weight = data.get('weight', 1.0)
+        previous = data.get('previous')
+        if previous is not None:
+            ema._previous = (NAN if previous[0] is None else previous[0], previous[1], previous[2])
+        return ema
+
+class IndicatorState:
+    """
+    Streaming versions of every indicator analyze_trend uses
+
+    Seed once from history, then call update(bar) for each new bar; every
+    update is O(1) in the length of the history. Sending a bar with the same
+    time as the last one replaces it (e.g. a still-forming intraday bar): every
+    component undoes its last update (an evicted window value or the previous
+    EMA scalars) before the new bar is applied.
+
+    ``latest`` and ``previous`` hold the indicator snapshots of the last two
+    bars in the format TradingStrategy._build_trend expects.
+    """
+
+    def __init__(self, sma_fast: int = 20, sma_slow: int = 50, ema_window: int = 20):
+        """
+        Args:
+            sma_fast, sma_slow, ema_window (int): Moving average windows, as in the
+                strategy parameters of the same names
+        """
+        self.last_time: Optional[pd.Timestamp] = None
+        self.prev_close = NAN
+        self.sma_20 = RollingWindow(sma_fast)
+        self.sma_50 = RollingWindow(sma_slow)
+        self.ema_20 = EMAState.with_span(ema_window)
+        self.bollinger = RollingWindow(20)
+        self.rsi_up = EMAState(1.0 / 14, 14)
+        self.rsi_down = EMAState(1.0 / 14, 14)
+        self.stoch_high = RollingWindow(14)
+        self.stoch_low = RollingWindow(14)
+        self.stoch_k = RollingWindow(3)
+        self.macd_fast = EMAState.with_span(12)
+        self.macd_slow = EMAState.with_span(26)
+        self.macd_signal = EMAState.with_span(9)
+        self.true_range = RollingWindow(14)
+        self.latest: Dict[str, float] = {}
+        self.previous: Dict[str, float] = {}
+        self._undo: Optional[Dict] = None  # Scalars before the last bar, None when it cannot be undone
+
+    @property
+    def windows(self) -> Dict[str, int]:
+        """The moving average windows the state was created with, as constructor arguments"""
+        return {'sma_fast': self.sma_20.window, 'sma_slow': self.sma_50.window, 'ema_window': self.ema_20.min_periods}
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, **windows) -> 'IndicatorState':
+        """Seed the state from historical bars (one pass over the history)"""
+        state = cls(**windows)
+        state.catch_up(df)
+        return state
+
+    def catch_up(self, df: Optional[pd.DataFrame]) -> int:
+        """
+        Feed the bars of df that are not older than the last processed bar
+
+        The bar at the last processed time replaces it when it can be undone,
+        and is skipped otherwise (a state saved before undo records existed).
+
+        Returns:
+            int: Number of bars applied
+        """
+        if df is None or df.empty:
+            return 0
+        if self.last_time is not None:
+            times = pd.to_datetime(df['time'])
+            df = df[times >= self.last_time] if self._undo is not None else df[times > self.last_time]
+        for time, high, low, close in zip(df['time'], df['high'], df['low'], df['close']):
+            self.update({'time': time, 'high': high, 'low': low, 'close': close})
+        return len(df)
+
+    def update(self, bar: Dict) -> Dict[str, float]:
+        """
+        Advance every indicator by one bar
+
+        Args:
+            bar (Dict): Bar with 'high', 'low', 'close' and optionally 'time'
+
+        Returns:
+            Dict[str, float]: Indicator snapshot for the bar
+        """
+        time = pd.Timestamp(bar['time']) if bar.get('time') is not None else None
+        if time is not None and self.last_time is not None:
+            if time < self.last_time:
+                raise ValueError(f"Bar at {time} is older than the last processed bar at {self.last_time}")
+            if time == self.last_time and self._undo is not None:
+                self._rollback()
+        self._undo = {'last_time': self.last_time, 'prev_close': self.prev_close,
+                      'latest': self.latest, 'previous': self.previous}
+
+        high, low, close = float(bar['high']), float(bar['low']), float(bar['close'])
+
+        self.sma_20.push(close)
+        self.sma_50.push(close)
+        ema_20 = self.ema_20.update(close)
+        self.bollinger.push(close)
+
+        # Wilder RSI; the first bar counts as an unchanged close like in ta
+        diff = 0.0 if _isnan(self.prev_close) else close - self.prev_close
+        up = self.rsi_up.update(max(diff, 0.0))
+        down = self.rsi_down.update(max(-diff, 0.0))
+        if _isnan(up) or _isnan(down):
+            rsi = NAN
+        elif down == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + up / down)
+
+        self.stoch_high.push(high)
+        self.stoch_low.push(low)
+        lowest, highest = self.stoch_low.min(), self.stoch_high.max()
+        if _isnan(lowest) or _isnan(highest) or highest == lowest:
+            stoch_k = NAN
+        else:
+            stoch_k = 100.0 * (close - lowest) / (highest - lowest)
+        self.stoch_k.push(stoch_k)
+
+        bb_mean = self.bollinger.mean()
+        bb_std = math.sqrt(self.bollinger.variance()) if self.bollinger.full else NAN
+
+        fast, slow = self.macd_fast.update(close), self.macd_slow.update(close)
+        macd = fast - slow if not (_isnan(fast) or _isnan(slow)) else NAN
+        macd_signal = self.macd_signal.update(macd)
+
+        if _isnan(self.prev_close):
+            true_range = high - low
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.true_range.push(true_range)
+
+        self.prev_close = close
+        self.last_time = time if time is not None else self.last_time
+        self.previous = self.latest
+        self.latest = {
+            'close': close,
+            'sma_20': self.sma_20.mean(),
+            'sma_50': self.sma_50.mean(),
+            'ema_20': ema_20,
+            'rsi': rsi,
+            'stoch_k': stoch_k,
+            'stoch_d': self.stoch_k.mean(),
+            'bb_upper': bb_mean + 2 * bb_std,
+            'bb_lower': bb_mean - 2 * bb_std,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'atr': self.true_range.mean(),
+        }
+        return self.latest
+
+    def _rollback(self):
+        """Undo the last bar (O(1): one value per window, three scalars per EMA)"""
+        for name in WINDOW_NAMES + EMA_NAMES:
+            getattr(self, name).undo()
+        self.last_time = self._undo['last_time']
+        self.prev_close = self._undo['prev_close']
+        self.latest = self._undo['latest']
+        self.previous = self._undo['previous']
+        self._undo = None
+
+    def to_dict(self) -> Dict:
+        """Serialize the state to plain JSON-compatible data"""
+        data = {
+            'last_time': self.last_time.isoformat() if self.last_time is not None else None,
+            'prev_close': self.prev_close,
+            'windows': {name: getattr(self, name).to_dict() for name in WINDOW_NAMES},
+            'emas': {name: getattr(self, name).to_dict() for name in EMA_NAMES},
+            'latest': self.latest,
+            'previous': self.previous,
+        }
+        if self._undo is not None:
+            data['undo'] = {
+                'last_time': self._undo['last_time'].isoformat() if self._undo['last_time'] is not None else None,
+                'prev_close': self._undo['prev_close'],
+                'latest': self._undo['latest'],
+                'previous': self._undo['previous'],
+            }
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'IndicatorState':
+        state = cls()
+        state.last_time = pd.Timestamp(data['last_time']) if data['last_time'] else None
+        state.prev_close = NAN if data['prev_close'] is None else data['prev_close']
+        for name, window in data['windows'].items():
+            setattr(state, name, RollingWindow.from_dict(window))
+        for name, ema in data['emas'].items():
+            setattr(state, name, EMAState.from_dict(ema))
+        state.latest = dict(data['latest'])
+        state.previous = dict(data['previous'])
+        undo = data.get('undo')
+        # States saved before undo records existed cannot replace their last bar
+        if undo is not None and all(getattr(state, name)._evicted is not None for name in WINDOW_NAMES):
+            state._undo = {
+                'last_time': pd.Timestamp(undo['last_time']) if undo['last_time'] else None,
+                'prev_close': NAN if undo['prev_close'] is None else undo['prev_close'],
+                'latest': dict(undo['latest']),
+                'previous': dict(undo['previous']),
+            }
+        return state
+
+class IndicatorStateStore:
+    """
+    Persist IndicatorState per symbol as JSON under data/indicator_state
+
+    Use one root per bar interval (e.g. data/indicator_state/1m). A saved
+    state is only used with the moving average windows it was built with.
+    """
+
+    def __init__(self, root: str = INDICATOR_STATE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol.upper()}.json"
+
+    def load(self, symbol: str, **windows) -> Optional[IndicatorState]:
+        """
+        Load the saved state of a symbol
+
+        Args:
+            symbol (str): Trading symbol
+            **windows: sma_fast, sma_slow and ema_window the state must have been built with
+                (defaults as in IndicatorState)
+
+        Returns:
+            Optional[IndicatorState]: The state, or None if missing, unreadable or built
+            with other windows
+        """
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                state = IndicatorState.from_dict(json.load(f))
+        except Exception as e:
+            logging.error(f"Error loading indicator state for {symbol}: {str(e)}")
+            return None
+        expected = IndicatorState(**windows).windows
+        if state.windows != expected:
+            logging.info(f"Saved indicator state of {symbol} uses windows {state.windows}, not {expected}; reseeding")
+            return None
+        return state
+
+    def save(self, symbol: str, state: IndicatorState):
+        """Atomically save the state of a symbol"""
+        path = self._path(symbol)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state.to_dict(), f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error saving indicator state for {symbol}: {str(e)}")
+
+    def get(self, symbol: str, df: Optional[pd.DataFrame], **windows) -> Optional[IndicatorState]:
+        """
+        Load the state of a symbol and advance it with the new bars of df
+
+        The state is seeded from df when nothing usable is saved (see load),
+        and saved back after any bars were applied.
+
+        Args:
+            symbol (str): Trading symbol
+            df (Optional[pd.DataFrame]): Bars of the symbol, at least those after the saved state
+            **windows: sma_fast, sma_slow and ema_window of the strategy
+        """
+        state = self.load(symbol, **windows)
+        if state is None:
+            if df is None or df.empty:
+                return None
+            state = IndicatorState.from_history(df, **windows)
+            self.save(symbol, state)
+        elif state.catch_up(df):
+            self.save(symbol, state)
+        return state
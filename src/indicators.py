@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PANEL_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# Indicator columns produced by compute_indicators, in the order analyze_trend adds them
+INDICATOR_COLUMNS = [
+    'sma_20', 'sma_50', 'ema_20', 'rsi', 'stoch_k', 'stoch_d',
+    'bb_upper', 'bb_lower', 'macd', 'macd_signal'
+]
+
+class BarPanel:
+    """
+    2-D (symbols x bars) view over the OHLCV data of many symbols
+
+    Rows follow ``symbols``. Panels built by ``from_frames`` align the bars on
+    the union of all timestamps (``times`` is a DatetimeIndex over the
+    columns); a symbol without a bar at a timestamp (not yet listed,
+    suspended) holds NaN there. Panels built by ``from_sequences`` keep each
+    symbol's own bar sequence, right-aligned so the last column is every
+    symbol's latest bar; ``times`` is then a 2-D datetime64 array and NaN/NaT
+    only pad the start of shorter histories. Rolling indicators need the
+    latter to match a per-symbol computation across gaps.
+    """
+
+    def __init__(self, symbols: List[str], times: pd.DatetimeIndex, data: Dict[str, np.ndarray]):
+        self.symbols = symbols
+        self.times = times
+        self.data = data
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.data[field]
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def last_times(self) -> np.ndarray:
+        """Time of each symbol's latest bar (NaT for rows without data)"""
+        if isinstance(self.times, np.ndarray) and self.times.ndim == 2:
+            return self.times[:, -1] if self.times.shape[1] else np.full(len(self.symbols), np.datetime64('NaT', 'ns'))
+        columns = last_valid_index(self['close'])
+        times = np.asarray(self.times, dtype='datetime64[ns]')
+        if len(times) == 0:
+            return np.full(len(self.symbols), np.datetime64('NaT', 'ns'))
+        return np.where(columns >= 0, times[np.maximum(columns, 0)], np.datetime64('NaT', 'ns'))
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], fields: Sequence[str] = PANEL_FIELDS,
+                    length: Optional[int] = None) -> 'BarPanel':
+        """
+        Build a panel from per-symbol bar DataFrames
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): Bars per symbol with a 'time' column
+            fields (Sequence[str]): Columns to load into the panel
+            length (Optional[int]): Keep only the last ``length`` timestamps
+
+        Returns:
+            BarPanel: Panel with one row per symbol that had data
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        symbols = list(frames)
+        if not symbols:
+            return cls([], pd.DatetimeIndex([]), {field: np.empty((0, 0)) for field in fields})
+
+        lengths = np.array([len(frames[symbol]) for symbol in symbols])
+        all_times = np.concatenate([
+            np.asarray(frames[symbol]['time'].to_numpy(), dtype='datetime64[ns]') for symbol in symbols
+        ])
+        times = np.unique(all_times)
+        if length is not None:
+            times = times[-length:]
+
+        # Scatter every bar of every symbol into the panel in one vectorized step
+        rows = np.repeat(np.arange(len(symbols)), lengths)
+        columns = np.searchsorted(times, all_times)
+        keep = (columns < len(times)) & (times[np.minimum(columns, len(times) - 1)] == all_times)
+        rows, columns = rows[keep], columns[keep]
+
+        data = {}
+        for field in fields:
+            values = np.concatenate([frames[symbol][field].to_numpy(dtype=float) for symbol in symbols])
+            data[field] = np.full((len(symbols), len(times)), np.nan)
+            data[field][rows, columns] = values[keep]
+        times = pd.DatetimeIndex(times)
+        return cls(symbols, times, data)
+
+    @classmethod
+    def from_sequences(cls, frames: Dict[str, pd.DataFrame], fields: Sequence[str] = PANEL_FIELDS,
+                       length: Optional[int] = None) -> 'BarPanel':
+        """
+        Build a panel of each symbol's own bar sequence, right-aligned
+
+        Unlike from_frames, a bar missing for one symbol (suspension, no
+        trade) does not open a NaN gap in its row, so rolling windows span the
+        same bars as an analysis of that symbol alone.
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): Bars per symbol with a 'time' column, sorted by time
+            fields (Sequence[str]): Columns to load into the panel
+            length (Optional[int]): Keep only the last ``length`` bars of each symbol
+
+        Returns:
+            BarPanel: Panel with one row per symbol that had data
+        """
+        frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+        symbols = list(frames)
+        lengths = np.array([len(frames[symbol]) for symbol in symbols], dtype=np.int64)
+        width = int(lengths.max()) if symbols else 0
+        if length is not None:
+            width = min(width, length)
+
+        # Column of every bar: its position in its own row, shifted right by the row's padding
+        rows = np.repeat(np.arange(len(symbols)), lengths)
+        positions = np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        columns = positions + (width - lengths)[rows]
+        keep = columns >= 0
+        rows, columns = rows[keep], columns[keep]
+
+        def scatter(values: np.ndarray, fill) -> np.ndarray:
+            out = np.full((len(symbols), width), fill, dtype=values.dtype)
+            out[rows, columns] = values[keep]
+            return out
+
+        data = {
+            field: scatter(np.concatenate([frames[symbol][field].to_numpy(dtype=float) for symbol in symbols])
+                           if symbols else np.empty(0), np.nan)
+            for field in fields
+        }
+        times = scatter(np.concatenate([np.asarray(frames[symbol]['time'].to_numpy(), dtype='datetime64[ns]')
+                                        for symbol in symbols]) if symbols else np.empty(0, dtype='datetime64[ns]'),
+                        np.datetime64('NaT', 'ns'))
+        return cls(symbols, times, data)
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean along bars; NaN until ``window`` valid values are in the window"""
+    return _rolling_moments(x, window)[0]
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling population standard deviation (ddof=0) along bars"""
+    mean, mean_sq = _rolling_moments(x, window, second=True)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+def _rolling_moments(x: np.ndarray, window: int, second: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    n, t = x.shape
+    mean = np.full((n, t), np.nan)
+    mean_sq = np.full((n, t), np.nan) if second else None
+    if t < window:
+        return mean, mean_sq
+
+    valid = ~np.isnan(x)
+    complete = valid.all()
+    xz = x if complete else np.where(valid, x, 0.0)
+    full = None
+    if not complete:
+        full = _window_sums(valid.astype(np.int32), window) == window
+
+    mean[:, window - 1:] = _window_sums(xz, window) / window
+    if second:
+        mean_sq[:, window - 1:] = _window_sums(xz * xz, window) / window
+    if full is not None:
+        mean[:, window - 1:][~full] = np.nan
+        if second:
+            mean_sq[:, window - 1:][~full] = np.nan
+    return mean, mean_sq
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Sums over each complete trailing window, shape (n, t - window + 1)"""
+    csum = np.cumsum(x, axis=1)
+    sums = csum[:, window - 1:].copy()
+    sums[:, 1:] -= csum[:, :-window]
+    return sums
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling minimum along bars; NaN if any value in the window is missing"""
+    return _rolling_reduce(x, window, np.minimum)
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling maximum along bars; NaN if any value in the window is missing"""
+    return _rolling_reduce(x, window, np.maximum)
+
+def _rolling_reduce(x: np.ndarray, window: int, combine) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    t = x.shape[1]
+    if t >= window:
+        # Fold the window shift by shift; much faster than reducing a strided window view
+        acc = x[:, window - 1:].copy()
+        for shift in range(1, window):
+            combine(acc, x[:, window - 1 - shift:t - shift], out=acc)
+        out[:, window - 1:] = acc
+    return out
+
+# Below this many symbols pandas' per-column ewm beats stepping all symbols bar by bar
+EWM_PANDAS_MAX_ROWS = 64
+
+def ewm_mean(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    Exponentially weighted mean along bars (pandas ``ewm(adjust=False)``)
+
+    Small panels use pandas' compiled column-wise recursion directly. Wide
+    panels step through the bars once with every symbol as a vector, using
+    the same weighting pandas applies across missing values.
+    """
+    if x.shape[0] < EWM_PANDAS_MAX_ROWS:
+        frame = pd.DataFrame(x.T, copy=False)
+        return frame.ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean().to_numpy().T
+
+    xt = np.ascontiguousarray(x.T)
+    t, n = xt.shape
+    out = np.full((t, n), np.nan)
+    state = np.full(n, np.nan)
+    old_weight = np.ones(n)
+    count = np.zeros(n)
+    decay = 1.0 - alpha
+    for i in range(t):
+        xi = xt[i]
+        valid = ~np.isnan(xi)
+        started = ~np.isnan(state)
+        old_weight = np.where(started, old_weight * decay, old_weight)
+        blended = (old_weight * state + alpha * xi) / (old_weight + alpha)
+        state = np.where(valid, np.where(started, blended, xi), state)
+        old_weight = np.where(valid, 1.0, old_weight)
+        count += valid
+        out[i] = np.where(count >= min_periods, state, np.nan)
+    return out.T
+
+def ema(x: np.ndarray, window: int) -> np.ndarray:
+    """Exponential moving average with span ``window`` (same as ta's EMAIndicator)"""
+    return ewm_mean(x, 2.0 / (window + 1), window)
+
+def rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Wilder RSI (same as ta's RSIIndicator)"""
+    diff = np.diff(close, axis=1, prepend=np.nan)
+    missing = np.isnan(close)
+    up = np.where(missing, np.nan, np.where(diff > 0, diff, 0.0))
+    down = np.where(missing, np.nan, np.where(diff < 0, -diff, 0.0))
+    ema_up = ewm_mean(up, 1.0 / window, window)
+    ema_down = ewm_mean(down, 1.0 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+    return np.where(np.isnan(ema_up) | np.isnan(ema_down), np.nan, result)
+
+def stochastic(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14,
+               smooth_window: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """Stochastic oscillator %K and %D (same as ta's StochasticOscillator)"""
+    lowest = rolling_min(low, window)
+    highest = rolling_max(high, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch_k = 100.0 * (close - lowest) / (highest - lowest)
+    return stoch_k, rolling_mean(stoch_k, smooth_window)
+
+def bollinger(close: np.ndarray, window: int = 20, window_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bands (upper, middle, lower) with population std (same as ta's BollingerBands)"""
+    mean, mean_sq = _rolling_moments(close, window, second=True)
+    std = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+    return mean + window_dev * std, mean, mean - window_dev * std
+
+def macd(close: np.ndarray, window_fast: int = 12, window_slow: int = 26,
+         window_sign: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """MACD line and signal line (same as ta's MACD)"""
+    line = ema(close, window_fast) - ema(close, window_slow)
+    return line, ema(line, window_sign)
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range; the first bar of a row falls back to high - low"""
+    prev_close = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Average true range as a simple rolling mean (same as TradingStrategy._calculate_atr)"""
+    return rolling_mean(true_range(high, low, close), window)
+
+def compute_indicators(close: np.ndarray, high: np.ndarray, low: np.ndarray, sma_fast: int = 20,
+                       sma_slow: int = 50, ema_window: int = 20) -> Dict[str, np.ndarray]:
+    """
+    Compute every indicator used by analyze_trend for a whole panel in one pass
+
+    Args:
+        close, high, low (np.ndarray): 2-D (symbols x bars) price arrays
+        sma_fast, sma_slow, ema_window (int): Moving average windows; the results keep
+            the 'sma_20', 'sma_50' and 'ema_20' keys analyze_trend reports
+
+    Returns:
+        Dict[str, np.ndarray]: 2-D arrays keyed by INDICATOR_COLUMNS plus 'close' and 'atr'
+    """
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+
+    stoch_k, stoch_d = stochastic(high, low, close)
+    bb_upper, _, bb_lower = bollinger(close)
+    macd_line, macd_signal = macd(close)
+    return {
+        'close': close,
+        'sma_20': rolling_mean(close, sma_fast),
+        'sma_50': rolling_mean(close, sma_slow),
+        'ema_20': ema(close, ema_window),
+        'rsi': rsi(close),
+        'stoch_k': stoch_k,
+        'stoch_d': stoch_d,
+        'bb_upper': bb_upper,
+        'bb_lower': bb_lower,
+        'macd': macd_line,
+        'macd_signal': macd_signal,
+        'atr': atr(high, low, close),
+    }
+
+def last_valid_index(close: np.ndarray) -> np.ndarray:
+    """Column of the last non-NaN close per row (-1 for rows without data)"""
+    if close.shape[1] == 0:
+        return np.full(close.shape[0], -1)
+    valid = ~np.isnan(close)
+    last = close.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), last, -1)
+
+def latest_snapshot(indicators: Dict[str, np.ndarray], offset: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Take the indicator values at each symbol's latest bar
+
+    Args:
+        indicators (Dict[str, np.ndarray]): Output of compute_indicators
+        offset (int): Bars back from the latest one (1 gives the previous bar)
+
+    Returns:
+        Dict[str, np.ndarray]: 1-D arrays (one value per symbol), NaN where unavailable
+    """
+    close = indicators['close']
+    columns = last_valid_index(close) - offset
+    ok = columns >= 0
+    rows = np.arange(close.shape[0])
+    safe_columns = np.where(ok, columns, 0)
+    return {
+        name: np.where(ok, values[rows, safe_columns], np.nan)
+        for name, values in indicators.items()
+    }
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+RUN_METRICS_FILE = 'data/metrics/runs.jsonl'
+PROFILES_DIR = 'data/profiles'
+PROMETHEUS_PREFIX = 'trading_bot'
+SLOWEST_SYMBOLS = 10  # Symbols listed in the summary, slowest first
+
+def profile_call(func, profiles_dir: str = PROFILES_DIR, top: int = 30) -> str:
+    """
+    Run func under cProfile, save the stats and log the most expensive calls
+
+    Returns:
+        str: Path of the .prof dump (open with pstats or snakeviz)
+    """
+    import cProfile
+    import io
+    import pstats
+
+    Path(profiles_dir).mkdir(parents=True, exist_ok=True)
+    path = str(Path(profiles_dir) / f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(func)
+    finally:
+        profiler.dump_stats(path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+        logging.info(f"Profile saved to {path}\n{report.getvalue()}")
+    return path
+
+class Counters:
+    """Thread-safe cumulative counters (cache hits, bytes fetched, ...) kept by a component"""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float = 1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+class RunMetrics:
+    """
+    Wall times and counters of one run
+
+    Stages are timed with ``stage(name, symbol)`` from any thread; the
+    summary aggregates them per stage (total, count, max) and per symbol.
+    Components that keep Counters are attached with ``watch``, and the
+    summary reports how much each counter grew during the run.
+    """
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._wall_time: Optional[float] = None
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._symbols: Dict[str, Dict[str, float]] = {}
+        self._watched: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, symbol: Optional[str] = None) -> Iterator[None]:
+        """Time a block as one occurrence of a stage, optionally attributed to a symbol"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, symbol)
+
+    def record(self, name: str, seconds: float, symbol: Optional[str] = None):
+        """Add a measured duration to a stage"""
+        with self._lock:
+            stats = self._stages.setdefault(name, {'seconds': 0.0, 'count': 0, 'max_seconds': 0.0})
+            stats['seconds'] += seconds
+            stats['count'] += 1
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if symbol is not None:
+                per_symbol = self._symbols.setdefault(symbol, {})
+                per_symbol[name] = per_symbol.get(name, 0.0) + seconds
+
+    def watch(self, name: str, counters: Counters):
+        """Report the growth of a component's counters during the run under a name"""
+        self._watched[name] = (counters, counters.snapshot())
+
+    def finish(self):
+        """Stop the run clock"""
+        self._wall_time = time.perf_counter() - self._start
+
+    def summary(self) -> Dict:
+        """Structured summary of the run"""
+        wall_time = self._wall_time if self._wall_time is not None else time.perf_counter() - self._start
+        counters = {}
+        for name, (source, before) in self._watched.items():
+            for key, value in source.snapshot().items():
+                counters[f"{name}_{key}"] = value - before.get(key, 0)
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self._stages.items()}
+            symbol_totals = {symbol: sum(times.values()) for symbol, times in self._symbols.items()}
+            slowest = sorted(symbol_totals, key=symbol_totals.get, reverse=True)[:SLOWEST_SYMBOLS]
+            symbols = {symbol: dict(self._symbols[symbol]) for symbol in slowest}
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_seconds': wall_time,
+            'symbols_analyzed': len(symbol_totals),
+            'stages': stages,
+            'counters': counters,
+            'slowest_symbols': symbols,
+        }
+
+    def write_jsonl(self, path: str = RUN_METRICS_FILE):
+        """Append the summary as one JSON line"""
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(json.dumps(self.summary()) + '\n')
+        except Exception as e:
+            logging.error(f"Error writing run metrics to {path}: {str(e)}")
+
+    def write_prometheus(self, path: str):
+        """Write the summary in the Prometheus text format (e.g. for the node_exporter textfile collector)"""
+        summary = self.summary()
+        lines = [
+            f"# TYPE {PROMETHEUS_PREFIX}_run_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_seconds {summary['wall_seconds']:.6f}",
+            f"# TYPE {PROMETHEUS_PREFIX}_run_timestamp_seconds gauge",
+            f"{PROMETHEUS_PREFIX}_run_timestamp_seconds {self.started_at.timestamp():.0f}",
+            f"# TYPE {PROMETHEUS_PREFIX}_symbols_analyzed gauge",
+            f"{PROMETHEUS_PREFIX}_symbols_analyzed {summary['symbols_analyzed']}",
+            f"# TYPE {PROMETHEUS_PREFIX}_stage_seconds gauge",
+        ]
+        lines += [f'{PROMETHEUS_PREFIX}_stage_seconds{{stage="{name}"}} {stats["seconds"]:.6f}'
+                  for name, stats in summary['stages'].items()]
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_stage_count gauge")
+        lines += [f'{PROMETHEUS_PREFIX}_stage_count{{stage="{name}"}} {stats["count"]}'
+                  for name, stats in summary['stages'].items()]
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_run_counter gauge")
+        lines += [f'{PROMETHEUS_PREFIX}_run_counter{{name="{name}"}} {value}'
+                  for name, value in summary['counters'].items()]
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.error(f"Error writing Prometheus metrics to {path}: {str(e)}")
+
+    def log_summary(self):
+        """Log a one-line overview of the stages"""
+        summary = self.summary()
+        stages = ', '.join(f"{name} {stats['seconds']:.2f}s" for name, stats in summary['stages'].items())
+        logging.info(f"Run {self.run_id} took {summary['wall_seconds']:.2f}s for "
+                     f"{summary['symbols_analyzed']} symbols ({stages})")
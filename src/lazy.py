@@ -0,0 +1,39 @@
+import importlib
+import threading
+import types
+
+class LazyModule(types.ModuleType):
+    """
+    Module proxy that imports the real module on first attribute access
+
+    Used for heavy dependencies (pandas, pyarrow, vnstock, TradingView) so
+    that importing this package, printing the CLI menu or ``--version`` does
+    not pay for them. The first access is serialized with a lock so worker
+    threads cannot observe a half-imported module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        # Only called for names not found on the proxy itself
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Return a proxy for module ``name`` that is imported on first use"""
+    return LazyModule(name)
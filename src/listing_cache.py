@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from .lazy import lazy_import
+from .instrumentation import Counters
+
+pd = lazy_import('pandas')
+
+LISTING_CACHE_DIR = 'data/listings'
+DEFAULT_LISTING_TTL = 24 * 60 * 60  # Refresh listings once a day
+DEFAULT_REFRESH_RETRY = 5 * 60      # Seconds after a failed refresh before the next attempt
+
+class ListingCache:
+    """
+    On-disk cache for symbol listings and group memberships with a TTL
+
+    Every entry is a Parquet file under ``data/listings`` whose modification
+    time is its fetch time. Lookups are served from memory, then from disk.
+    A stale entry is still returned immediately while a background thread
+    fetches the fresh one; only a missing entry blocks on the network. After
+    a failed refresh the stale entry is served without new attempts for
+    retry_after seconds, so an outage of the source is not hit on every get.
+    """
+
+    def __init__(self, root: str = LISTING_CACHE_DIR, ttl: float = DEFAULT_LISTING_TTL,
+                 retry_after: float = DEFAULT_REFRESH_RETRY):
+        """
+        Initialize the listing cache
+
+        Args:
+            root (str): Cache directory (default: data/listings)
+            ttl (float): Seconds before an entry is refreshed (default: one day)
+            retry_after (float): Seconds after a failed refresh before the next one (default: 5 minutes)
+        """
+        self.root = Path(root)
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._memory: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        self._refreshing = set()
+        self._failed: Dict[str, float] = {}  # key -> time of the last failed refresh
+        self._lock = threading.Lock()
+        self.stats = Counters()  # memory_hits, disk_hits, misses, refreshes, refresh_failures
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def get(self, key: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Get a cached listing, loading it with loader() when missing
+
+        Args:
+            key (str): Cache entry name (e.g. 'exchanges', 'group_VN30')
+            loader (Callable[[], pd.DataFrame]): Fetches the listing from the source
+
+        Returns:
+            pd.DataFrame: Cached (possibly stale, refreshing in the background) or freshly loaded listing
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read(key)
+            if entry is not None:
+                self.stats.add('disk_hits')
+                with self._lock:
+                    self._memory[key] = entry
+        else:
+            self.stats.add('memory_hits')
+        if entry is None:
+            self.stats.add('misses')
+            return self._load(key, loader)
+
+        fetched_at, df = entry
+        if time.time() - fetched_at > self.ttl:
+            self._refresh_in_background(key, loader)
+        return df
+
+    def version(self, key: str, loader: Callable[[], pd.DataFrame]) -> Optional[float]:
+        """
+        Fetch time of the entry get() serves, loading or refreshing it like get()
+
+        Callers caching data derived from an entry rebuild it when the
+        version changes, e.g. once a background refresh has landed.
+        """
+        self.get(key, loader)
+        with self._lock:
+            entry = self._memory.get(key)
+        return entry[0] if entry is not None else None
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one entry (or all entries) from memory and disk"""
+        with self._lock:
+            keys = [key] if key is not None else list(self._memory)
+            if key is None:
+                keys += [path.stem for path in self.root.glob('*.parquet')]
+            for name in keys:
+                self._memory.pop(name, None)
+                try:
+                    self._path(name).unlink()
+                except FileNotFoundError:
+                    pass
+
+    def _read(self, key: str) -> Optional[Tuple[float, pd.DataFrame]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return path.stat().st_mtime, pd.read_parquet(path)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable listing cache {path}: {str(e)}")
+            return None
+
+    def _load(self, key: str, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        df = loader()
+        if isinstance(df, pd.Series):
+            df = df.to_frame(name='symbol')
+        self._write(key, df)
+        with self._lock:
+            self._memory[key] = (time.time(), df)
+        return df
+
+    def _write(self, key: str, df: pd.DataFrame):
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Could not write listing cache for {key}: {str(e)}")
+
+    def _refresh_in_background(self, key: str, loader: Callable[[], pd.DataFrame]):
+        with self._lock:
+            if key in self._refreshing or time.time() - self._failed.get(key, -math.inf) < self.retry_after:
+                return
+            self._refreshing.add(key)
+
+        self.stats.add('refreshes')
+
+        def refresh():
+            try:
+                self._load(key, loader)
+                with self._lock:
+                    self._failed.pop(key, None)
+            except Exception as e:
+                self.stats.add('refresh_failures')
+                with self._lock:
+                    self._failed[key] = time.time()
+                logging.warning(f"Background refresh of listing {key} failed, keeping cached copy "
+                                f"(retrying in {self.retry_after:.0f}s): {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"listing-refresh-{key}", daemon=True).start()
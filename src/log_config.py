@@ -0,0 +1,52 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional
+
+LOG_FILE = 'trading_bot.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_configured = False
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+def configure_logging(log_file: Optional[str] = LOG_FILE, level: int = logging.INFO, queued: bool = True):
+    """
+    Configure the root logger once per process
+
+    Entry points (main.py, the module __main__ blocks, the data server) call
+    this; library modules never configure logging on import, so records are
+    not handled twice. Later calls are ignored.
+
+    Args:
+        log_file (Optional[str]): File receiving the log next to stderr (default: trading_bot.log, None disables it)
+        level (int): Root log level (default: INFO)
+        queued (bool): Hand records to a background thread so file and console I/O
+            never blocks the caller (default: True)
+    """
+    global _configured, _listener
+    with _lock:
+        if _configured:
+            return
+        _configured = True
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if log_file:
+            handlers.append(logging.FileHandler(log_file))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        if queued:
+            records = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+            root.addHandler(logging.handlers.QueueHandler(records))
+        else:
+            for handler in handlers:
+                root.addHandler(handler)
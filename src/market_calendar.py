@@ -0,0 +1,178 @@
+import json
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Vietnam has no daylight saving time, so a fixed offset is exact
+VN_TZ = timezone(timedelta(hours=7), 'ICT')
+
+MARKET_HOLIDAYS_FILE = 'data/market_holidays.json'
+
+# Public holidays on fixed solar dates (month, day). Tet and Hung Kings'
+# Commemoration follow the lunar calendar and, like compensatory days off, are
+# announced every year; list them in data/market_holidays.json.
+FIXED_HOLIDAYS = [
+    (1, 1),   # New Year's Day
+    (4, 30),  # Reunification Day
+    (5, 1),   # Labour Day
+    (9, 2),   # National Day
+]
+
+# Trading phases (local time). Order matching runs in the morning and afternoon
+# sessions; ATC is the closing auction, after which only put-through deals trade.
+SESSIONS = {
+    'HOSE': {
+        'ato': (time(9, 0), time(9, 15)),
+        'morning': (time(9, 15), time(11, 30)),
+        'afternoon': (time(13, 0), time(14, 30)),
+        'atc': (time(14, 30), time(14, 45)),
+    },
+    'HNX': {
+        'morning': (time(9, 0), time(11, 30)),
+        'afternoon': (time(13, 0), time(14, 30)),
+        'atc': (time(14, 30), time(14, 45)),
+    },
+}
+SESSIONS['UPCOM'] = {
+    'morning': SESSIONS['HNX']['morning'],
+    'afternoon': SESSIONS['HNX']['afternoon'],
+}
+
+class MarketCalendar:
+    """
+    Trading calendar of the Vietnamese exchanges
+
+    Knows the trading phases of a day (SESSIONS), weekends and holidays, and
+    derives the bar-close times of intraday intervals from them: bars are
+    aligned to the start of each half-day and the last bar of a half-day
+    closes with it, so 15m bars close at 9:15, 9:30, ..., 11:30 and
+    13:15, ..., 14:30, 14:45 (ATC) on HOSE.
+    """
+
+    def __init__(self, exchange: str = 'HOSE', holidays: Optional[Iterable[date]] = None,
+                 holidays_file: Optional[str] = MARKET_HOLIDAYS_FILE):
+        """
+        Initialize the calendar
+
+        Args:
+            exchange (str): 'HOSE', 'HNX' or 'UPCOM' (default: HOSE)
+            holidays (Optional[Iterable[date]]): Extra non-trading days
+            holidays_file (Optional[str]): JSON list of 'YYYY-MM-DD' non-trading days
+                (default: data/market_holidays.json, ignored when missing)
+        """
+        if exchange not in SESSIONS:
+            raise ValueError(f"Invalid exchange: {exchange}")
+        self.exchange = exchange
+        self.holidays: Set[date] = set(holidays or [])
+        if holidays_file is not None:
+            self.holidays |= self._load_holidays(holidays_file)
+
+        phases = sorted(SESSIONS[exchange].values())
+        # Half-day windows: consecutive phases are merged (ATO + morning, afternoon + ATC)
+        self.windows: List[Tuple[time, time]] = []
+        for start, end in phases:
+            if self.windows and self.windows[-1][1] == start:
+                self.windows[-1] = (self.windows[-1][0], end)
+            else:
+                self.windows.append((start, end))
+
+    @staticmethod
+    def _load_holidays(path: str) -> Set[date]:
+        try:
+            with open(path, 'r') as f:
+                return {date.fromisoformat(day) for day in json.load(f)}
+        except FileNotFoundError:
+            return set()
+        except (ValueError, json.JSONDecodeError) as e:
+            logging.error(f"Error loading market holidays from {path}: {str(e)}")
+            return set()
+
+    @staticmethod
+    def now() -> datetime:
+        """Current time in Vietnam"""
+        return datetime.now(VN_TZ)
+
+    def is_trading_day(self, day: date) -> bool:
+        """Whether the exchange trades on a date"""
+        return (day.weekday() < 5
+                and (day.month, day.day) not in FIXED_HOLIDAYS
+                and day not in self.holidays)
+
+    def sessions(self, day: date) -> List[Tuple[datetime, datetime]]:
+        """Trading windows of a date (empty on non-trading days)"""
+        if not self.is_trading_day(day):
+            return []
+        return [(datetime.combine(day, start, VN_TZ), datetime.combine(day, end, VN_TZ))
+                for start, end in self.windows]
+
+    def is_open(self, when: Optional[datetime] = None) -> bool:
+        """Whether the exchange is trading at a time"""
+        when = self._localize(when)
+        return any(start <= when < end for start, end in self.sessions(when.date()))
+
+    def close_time(self, day: date) -> Optional[datetime]:
+        """End of the last trading window (the ATC on HOSE/HNX), or None on non-trading days"""
+        sessions = self.sessions(day)
+        return sessions[-1][1] if sessions else None
+
+    def last_closed_day(self, when: Optional[datetime] = None) -> Optional[date]:
+        """Latest trading day whose close is at or before a time (None if none in the last 30 days)"""
+        when = self._localize(when)
+        day = when.date()
+        for _ in range(30):
+            close = self.close_time(day)
+            if close is not None and close <= when:
+                return day
+            day -= timedelta(days=1)
+        return None
+
+    def bar_closes(self, day: date, minutes: int) -> List[datetime]:
+        """Close times of the intraday bars of an interval on a date"""
+        closes = []
+        step = timedelta(minutes=minutes)
+        for start, end in self.sessions(day):
+            close = start + step
+            while close < end:
+                closes.append(close)
+                close += step
+            closes.append(end)
+        return closes
+
+    def next_bar_close(self, after: Optional[datetime] = None, minutes: int = 15) -> datetime:
+        """First bar close of an interval strictly after a time"""
+        after = self._localize(after)
+        day = after.date()
+        while True:
+            for close in self.bar_closes(day, minutes):
+                if close > after:
+                    return close
+            day += timedelta(days=1)
+
+    def next_time_on_trading_day(self, at: time, after: Optional[datetime] = None) -> datetime:
+        """First occurrence of a local time of day on a trading day strictly after a time"""
+        after = self._localize(after)
+        day = after.date()
+        while True:
+            candidate = datetime.combine(day, at, VN_TZ)
+            if self.is_trading_day(day) and candidate > after:
+                return candidate
+            day += timedelta(days=1)
+
+    def traded_between(self, start: datetime, end: datetime) -> bool:
+        """Whether any trading happened in the interval (start, end]"""
+        start, end = self._localize(start), self._localize(end)
+        day = start.date()
+        while day <= end.date():
+            for session_start, session_end in self.sessions(day):
+                if session_start < end and session_end > start:
+                    return True
+            day += timedelta(days=1)
+        return False
+
+    @staticmethod
+    def _localize(when: Optional[datetime]) -> datetime:
+        if when is None:
+            return datetime.now(VN_TZ)
+        if when.tzinfo is None:
+            return when.replace(tzinfo=VN_TZ)
+        return when.astimezone(VN_TZ)
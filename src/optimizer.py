@@ -0,0 +1,294 @@
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtest import Backtester
+from .indicators import BarPanel
+from .strategy import TradingStrategy, DEFAULT_STRATEGY_PARAMS
+
+OPTIMIZER_RESULTS_DIR = 'data/optimizer'
+PANEL_FIELDS = ('open', 'high', 'low', 'close')
+
+# Parameters that change the indicator arrays; runs sharing them reuse one indicator pass
+INDICATOR_PARAMS = ('sma_fast', 'sma_slow', 'ema_window')
+
+# Example search space over the strategy's hard-coded thresholds
+DEFAULT_PARAM_GRID = {
+    'sma_fast': [10, 20, 30],
+    'sma_slow': [50, 100],
+    'rsi_overbought': [65, 70, 75],
+    'rsi_oversold': [25, 30, 35],
+    'bb_width_high': [0.05, 0.08],
+    'stop_loss_atr': [1.5, 2.0, 3.0],
+    'take_profit_atr': [3.0, 4.0, 6.0],
+}
+
+# Metrics kept in the results table
+RESULT_METRICS = ('total_trades', 'win_rate', 'total_profit', 'max_drawdown', 'sharpe_ratio', 'final_equity')
+
+def grid_search(param_grid: Dict[str, Sequence]) -> List[Dict]:
+    """Expand a parameter grid into every combination"""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+def random_search(param_grid: Dict[str, Sequence], n_samples: int, seed: Optional[int] = None) -> List[Dict]:
+    """Draw up to n_samples distinct combinations from a parameter grid"""
+    combos = grid_search(param_grid)
+    if n_samples >= len(combos):
+        return combos
+    return random.Random(seed).sample(combos, n_samples)
+
+class SharedPanel:
+    """
+    BarPanel price arrays placed in shared memory for worker processes
+
+    The owning process copies the arrays once; workers attach by name and
+    wrap the same memory in NumPy arrays, so no bar data is pickled per task.
+    """
+
+    def __init__(self, panel: BarPanel):
+        self.symbols = panel.symbols
+        self.times = panel.times
+        self.shape = panel['close'].shape
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        for field in PANEL_FIELDS:
+            source = np.ascontiguousarray(panel[field], dtype=np.float64)
+            block = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            np.ndarray(self.shape, dtype=np.float64, buffer=block.buf)[...] = source
+            self._blocks[field] = block
+
+    def spec(self) -> Dict:
+        """Picklable description used by workers to attach"""
+        return {
+            'symbols': self.symbols,
+            'times': self.times,
+            'shape': self.shape,
+            'blocks': {field: block.name for field, block in self._blocks.items()},
+        }
+
+    def close(self):
+        """Release and unlink the shared memory blocks"""
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+
+    def __enter__(self) -> 'SharedPanel':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Per-worker state, set by _attach_worker
+_worker_panel: Optional[BarPanel] = None
+_worker_blocks: List[shared_memory.SharedMemory] = []
+_worker_indicator_cache: Dict[Tuple, Dict[str, np.ndarray]] = {}
+WORKER_INDICATOR_CACHE_SIZE = 4
+
+def _attach_worker(spec: Dict):
+    """Process pool initializer: map the shared panel into this worker"""
+    global _worker_panel
+    data = {}
+    for field, name in spec['blocks'].items():
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks.append(block)
+        data[field] = np.ndarray(spec['shape'], dtype=np.float64, buffer=block.buf)
+    _worker_panel = BarPanel(spec['symbols'], spec['times'], data)
+
+def _slice_panel(panel: BarPanel, start: int, end: int) -> BarPanel:
+    return BarPanel(panel.symbols, panel.times[start:end], {field: values[:, start:end] for field, values in panel.data.items()})
+
+def _evaluate(task: Tuple[int, Dict, int, int, int]) -> Dict:
+    """Backtest one parameter combination on bars [start, end), trading from trade_from"""
+    task_id, params, start, end, trade_from = task
+    panel = _slice_panel(_worker_panel, start, end)
+    strategy = TradingStrategy(params=params)
+
+    key = (start, end) + tuple(strategy.params[name] for name in INDICATOR_PARAMS)
+    indicators = _worker_indicator_cache.get(key)
+    if indicators is None:
+        indicators = strategy.compute_indicators(panel['close'], panel['high'], panel['low'])
+        if len(_worker_indicator_cache) >= WORKER_INDICATOR_CACHE_SIZE:
+            _worker_indicator_cache.pop(next(iter(_worker_indicator_cache)))
+        _worker_indicator_cache[key] = indicators
+
+    try:
+        result = Backtester(strategy=strategy).run(
+            panel, update_metrics=False, trade_from=trade_from - start, indicators=indicators
+        )
+        metrics = result.metrics
+    except Exception as e:
+        logging.error(f"Error evaluating parameters {params}: {str(e)}")
+        metrics = {name: np.nan for name in RESULT_METRICS}
+    row = {'task_id': task_id}
+    row.update(params)
+    row.update({name: metrics[name] for name in RESULT_METRICS})
+    return row
+
+class StrategyOptimizer:
+    """
+    Parallel parameter search and walk-forward optimization over a bar panel
+
+    Every parameter combination is backtested by a process pool whose workers
+    read the bars from shared memory. Tasks are ordered so that combinations
+    sharing the same indicator windows land next to each other and reuse the
+    worker's cached indicator arrays.
+    """
+
+    def __init__(self, panel: BarPanel, max_workers: Optional[int] = None, objective: str = 'sharpe_ratio'):
+        """
+        Initialize the optimizer
+
+        Args:
+            panel (BarPanel): Bars with open/high/low/close fields
+            max_workers (Optional[int]): Worker processes (default: CPU count)
+            objective (str): Result metric maximized when picking the best parameters
+        """
+        self.panel = panel
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.objective = objective
+
+    def search(self, param_sets: Iterable[Dict], start: int = 0, end: Optional[int] = None,
+               trade_from: Optional[int] = None) -> pd.DataFrame:
+        """
+        Backtest every parameter set on bars [start, end)
+
+        Args:
+            param_sets (Iterable[Dict]): Parameter overrides (see grid_search / random_search)
+            start, end (int): Bar range loaded for the backtest, including indicator warm-up
+            trade_from (Optional[int]): First bar that may trade (default: start)
+
+        Returns:
+            pd.DataFrame: One row per parameter set with its parameters and RESULT_METRICS
+        """
+        end = self.panel['close'].shape[1] if end is None else end
+        trade_from = start if trade_from is None else trade_from
+        param_sets = list(param_sets)
+        if not param_sets:
+            return pd.DataFrame()
+        with self._pool() as executor:
+            return self._search(executor, [(param_sets, start, end, trade_from)])[0]
+
+    @contextmanager
+    def _pool(self) -> Iterator[ProcessPoolExecutor]:
+        """Process pool whose workers map the panel from shared memory"""
+        with SharedPanel(self.panel) as shared:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_attach_worker,
+                                     initargs=(shared.spec(),)) as executor:
+                yield executor
+
+    def _search(self, executor: ProcessPoolExecutor,
+                ranges: Sequence[Tuple[Sequence[Dict], int, int, int]]) -> List[pd.DataFrame]:
+        """
+        Backtest several (param_sets, start, end, trade_from) searches as one batch of pool tasks
+
+        Returns:
+            List[pd.DataFrame]: The search result of every range, in order
+        """
+        tasks = []
+        for param_sets, start, end, trade_from in ranges:
+            param_sets = sorted(
+                param_sets, key=lambda p: tuple(p.get(name, DEFAULT_STRATEGY_PARAMS[name]) for name in INDICATOR_PARAMS)
+            )
+            tasks.append([(task_id, params, start, end, trade_from) for task_id, params in enumerate(param_sets)])
+        flat = [task for range_tasks in tasks for task in range_tasks]
+        chunksize = max(1, len(flat) // (self.max_workers * 4))
+        rows = iter(executor.map(_evaluate, flat, chunksize=chunksize))
+        return [self._compact(pd.DataFrame([next(rows) for _ in range_tasks]).set_index('task_id').sort_index())
+                for range_tasks in tasks]
+
+    def walk_forward(self, param_sets: Sequence[Dict], train_bars: int, test_bars: int,
+                     warmup_bars: int = 100) -> pd.DataFrame:
+        """
+        Walk-forward optimization
+
+        The bars are cut into consecutive folds. For each fold every parameter
+        set is scored on the training window, and the best one (by objective)
+        is then backtested out of sample on the following test window. All
+        folds share one shared-memory panel and one process pool: the training
+        runs of every fold are submitted together, then all test runs.
+
+        Args:
+            param_sets (Sequence[Dict]): Candidate parameter overrides
+            train_bars (int): Bars in each training window
+            test_bars (int): Bars in each test window; folds advance by this much
+            warmup_bars (int): Bars before each window loaded only to warm up indicators
+
+        Returns:
+            pd.DataFrame: One row per fold with the chosen parameters, train score and test metrics
+        """
+        n_bars = self.panel['close'].shape[1]
+        starts = list(range(warmup_bars, n_bars - train_bars - test_bars + 1, test_bars))
+        if not starts or not param_sets:
+            return pd.DataFrame()
+
+        folds = []
+        with self._pool() as executor:
+            trains = self._search(executor, [
+                (param_sets, train_start - warmup_bars, train_start + train_bars, train_start) for train_start in starts
+            ])
+            best_rows, best_params = [], []
+            for train in trains:
+                best = train[self.objective].astype(float).idxmax() if train[self.objective].notna().any() else train.index[0]
+                best_rows.append(best)
+                best_params.append({name: train.loc[best, name].item()
+                                    for name in train.columns if name in DEFAULT_STRATEGY_PARAMS})
+            tests = self._search(executor, [
+                ([params], train_start + train_bars - warmup_bars, train_start + train_bars + test_bars,
+                 train_start + train_bars)
+                for train_start, params in zip(starts, best_params)
+            ])
+
+        for train_start, train, best, params, test in zip(starts, trains, best_rows, best_params, tests):
+            test_start = train_start + train_bars
+            fold = {
+                'fold': len(folds),
+                'train_start': self.panel.times[train_start],
+                'test_start': self.panel.times[test_start],
+                'test_end': self.panel.times[test_start + test_bars - 1],
+                f"train_{self.objective}": train.loc[best, self.objective],
+            }
+            fold.update(params)
+            fold.update({f"test_{name}": test.iloc[0][name] for name in RESULT_METRICS})
+            folds.append(fold)
+        return self._compact(pd.DataFrame(folds))
+
+    @staticmethod
+    def _compact(results: pd.DataFrame) -> pd.DataFrame:
+        """Downcast metric columns to keep large sweeps small; parameters keep full precision"""
+        for column in results.columns:
+            if column in DEFAULT_STRATEGY_PARAMS:
+                continue
+            if pd.api.types.is_float_dtype(results[column]):
+                results[column] = results[column].astype(np.float32)
+            elif pd.api.types.is_integer_dtype(results[column]):
+                results[column] = pd.to_numeric(results[column], downcast='integer')
+        return results
+
+    @staticmethod
+    def save_results(results: pd.DataFrame, name: str = 'search', root: str = OPTIMIZER_RESULTS_DIR) -> Path:
+        """Write a results table to data/optimizer/<name>-<timestamp>.parquet"""
+        path = Path(root)
+        path.mkdir(parents=True, exist_ok=True)
+        path = path / f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.parquet"
+        results.to_parquet(path)
+        return path
+
+if __name__ == "__main__":
+    from .stock_info import StockInfo
+    stock_info = StockInfo()
+    panel = Backtester(bar_store=stock_info.bar_store).load_panel(stock_info.symbols)
+    optimizer = StrategyOptimizer(panel)
+    results = optimizer.search(grid_search(DEFAULT_PARAM_GRID))
+    print(results.sort_values(optimizer.objective, ascending=False).head(20))
+    print(f"Results saved to {StrategyOptimizer.save_results(results)}")
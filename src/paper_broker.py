@@ -0,0 +1,580 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from .lazy import lazy_import
+from .market_calendar import MarketCalendar
+from .portfolio import Portfolio, LOT_SIZE, PRICE_UNIT
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# Order sides and types as stored in the order arrays
+SIDE_BUY = 1
+SIDE_SELL = -1
+ORDER_MARKET = 0       # Fills at the open of the next bar (ATO-like)
+ORDER_LIMIT = 1        # Buys at or below / sells at or above the price
+ORDER_STOP = 2         # Stop loss: sells once the price trades at or below the stop
+ORDER_TAKE_PROFIT = 3  # Sells once the price trades at or above the target
+ORDER_TYPE_NAMES = {ORDER_MARKET: 'MARKET', ORDER_LIMIT: 'LIMIT', ORDER_STOP: 'STOP', ORDER_TAKE_PROFIT: 'TAKE_PROFIT'}
+
+# Daily price limits around the reference (previous close) price
+PRICE_BANDS = {'HOSE': 0.07, 'HNX': 0.10, 'UPCOM': 0.15}
+# HOSE stock tick sizes in thousand VND: (price from, tick)
+HOSE_TICKS = ((0.0, 0.01), (10.0, 0.05), (50.0, 0.1))
+DEFAULT_TICK = 0.1  # HNX and UPCOM
+
+DEFAULT_COMMISSION = 0.0015  # Broker fee per side as a fraction of traded value
+DEFAULT_SELL_TAX = 0.001     # Personal income tax on the value sold
+INITIAL_BOOK_CAPACITY = 16
+PAPER_ORDERS_FILE = 'paper_orders.json'  # Saved next to the portfolio file
+
+def tick_size(price: float, exchange: str = 'HOSE') -> float:
+    """Tick size for a price in thousand VND"""
+    if exchange != 'HOSE':
+        return DEFAULT_TICK
+    tick = HOSE_TICKS[0][1]
+    for floor, step in HOSE_TICKS:
+        if price >= floor:
+            tick = step
+    return tick
+
+def round_to_tick(price: float, exchange: str = 'HOSE', direction: str = 'nearest') -> float:
+    """Round a price to a valid tick ('nearest', 'down' or 'up')"""
+    tick = tick_size(price, exchange)
+    steps = price / tick
+    steps = {'down': math.floor, 'up': math.ceil}.get(direction, round)(round(steps, 6))
+    return round(steps * tick, 2)
+
+def price_band(reference: float, exchange: str = 'HOSE'):
+    """
+    Floor and ceiling prices of a session
+
+    Returns:
+        Tuple[float, float]: (floor, ceiling), rounded inwards to valid ticks
+    """
+    band = PRICE_BANDS.get(exchange, PRICE_BANDS['HOSE'])
+    return (round_to_tick(reference * (1 - band), exchange, 'up'),
+            round_to_tick(reference * (1 + band), exchange, 'down'))
+
+class OrderBook:
+    """
+    Resting orders of one symbol as parallel NumPy arrays
+
+    Each order is one slot in fixed-width arrays (id, side, type, price,
+    shares, OCO group, attached stop loss / take profit). Arrays grow by
+    doubling and cancelled or filled slots are compacted away lazily, so
+    matching a bar against thousands of orders is a few vectorized
+    comparisons.
+    """
+
+    ARRAYS = ('order_id', 'side', 'kind', 'price', 'shares', 'oco', 'stop_loss', 'take_profit', 'active')
+
+    def __init__(self, capacity: int = INITIAL_BOOK_CAPACITY):
+        self.size = 0
+        self.live = 0
+        self.order_id = np.zeros(capacity, dtype=np.int64)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.price = np.zeros(capacity)
+        self.shares = np.zeros(capacity, dtype=np.int64)
+        self.oco = np.full(capacity, -1, dtype=np.int64)
+        self.stop_loss = np.full(capacity, np.nan)
+        self.take_profit = np.full(capacity, np.nan)
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def add(self, order_id: int, side: int, kind: int, price: float, shares: int, oco: int = -1,
+            stop_loss: float = math.nan, take_profit: float = math.nan):
+        """Append an order"""
+        if self.size == len(self.active):
+            self._resize(max(len(self.active) * 2, INITIAL_BOOK_CAPACITY))
+        i = self.size
+        self.order_id[i], self.side[i], self.kind[i], self.price[i] = order_id, side, kind, price
+        self.shares[i], self.oco[i], self.stop_loss[i], self.take_profit[i] = shares, oco, stop_loss, take_profit
+        self.active[i] = True
+        self.size += 1
+        self.live += 1
+
+    def _resize(self, capacity: int):
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def cancel(self, mask: np.ndarray) -> int:
+        """Deactivate the orders selected by a mask over the first slots"""
+        active = self.active[:mask.size]
+        cancelled = int(np.count_nonzero(mask & active))
+        active[mask] = False
+        self.live -= cancelled
+        return cancelled
+
+    def deactivate(self, row: int):
+        """Deactivate one slot"""
+        if self.active[row]:
+            self.active[row] = False
+            self.live -= 1
+
+    def has_open(self, side: int) -> bool:
+        """Whether any active order is on a side"""
+        return bool(np.any(self.active[:self.size] & (self.side[:self.size] == side)))
+
+    def compact(self):
+        """Drop inactive slots once they make up more than half of the book"""
+        if self.size - self.live <= self.size // 2:
+            return
+        keep = np.flatnonzero(self.active[:self.size])
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            array[:keep.size] = array[keep]
+        self.active[keep.size:self.size] = False
+        self.size = keep.size
+
+    def to_dict(self) -> Dict[str, List]:
+        """Active orders as JSON-serializable columns"""
+        rows = np.flatnonzero(self.active[:self.size])
+        return {name: getattr(self, name)[rows].tolist() for name in self.ARRAYS if name != 'active'}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List]) -> 'OrderBook':
+        """Rebuild a book of active orders saved with to_dict"""
+        book = cls(max(len(data['order_id']), INITIAL_BOOK_CAPACITY))
+        for values in zip(*(data[name] for name in cls.ARRAYS if name != 'active')):
+            book.add(*values)
+        return book
+
+    def orders(self) -> List[Dict]:
+        """Active orders as dicts"""
+        return [{
+            'order_id': int(self.order_id[i]),
+            'side': 'BUY' if self.side[i] == SIDE_BUY else 'SELL',
+            'type': ORDER_TYPE_NAMES[int(self.kind[i])],
+            'price': float(self.price[i]),
+            'shares': int(self.shares[i]),
+        } for i in np.flatnonzero(self.active[:self.size])]
+
+class PaperBroker:
+    """
+    Paper-trading broker filling orders against incoming bars or ticks
+
+    Orders follow the exchange rules: share counts in 100-share lots,
+    limit prices on a valid tick and inside the day's price band around
+    the reference (previous close) price. Fills on a bar follow the
+    Backtester conventions:
+
+    - market orders fill at the open
+    - limit and take-profit orders fill when the price trades through them,
+      at the open if it gaps past the level
+    - stop orders fill at the open on a gap down, otherwise at the stop
+    - if a bar touches both the stop and the target of a position, the stop wins
+
+    A filled entry with a stop loss / take profit places both exit orders
+    as a one-cancels-other pair. Fills update the Portfolio (cash, positions,
+    fees) and every closed sell is passed to
+    TradingStrategy.update_performance_metrics.
+
+    Resting orders, reference prices and the last bar seen per symbol are
+    saved next to the portfolio file (data/paper_orders.json), so they
+    survive a restart. A held position without saved exits (e.g. an older
+    portfolio file) gets its stop loss / take profit pair placed again from
+    the levels stored in the portfolio.
+    """
+
+    def __init__(self, portfolio: Optional[Portfolio] = None, strategy=None, exchange_info=None,
+                 commission: float = DEFAULT_COMMISSION, sell_tax: float = DEFAULT_SELL_TAX,
+                 lot_size: int = LOT_SIZE, orders_path: Optional[str] = None):
+        """
+        Initialize the broker
+
+        Args:
+            portfolio (Optional[Portfolio]): Account the fills are booked to (default: data/portfolio.json)
+            strategy (Optional[TradingStrategy]): Receives realized trades through update_performance_metrics
+            exchange_info (Optional[ExchangeInfo]): Looks up the exchange of a symbol (default: every symbol is HOSE)
+            commission (float): Fee per side as a fraction of traded value (default: 0.15%)
+            sell_tax (float): Tax on sells as a fraction of traded value (default: 0.1%)
+            lot_size (int): Shares per board lot (default: 100)
+            orders_path (Optional[str]): JSON file the resting orders are saved to
+                (default: paper_orders.json next to the portfolio file; not saved if the
+                portfolio is not saved either)
+        """
+        self.portfolio = portfolio if portfolio is not None else Portfolio.load()
+        self.strategy = strategy
+        self.exchange_info = exchange_info
+        self.commission = commission
+        self.sell_tax = sell_tax
+        self.lot_size = lot_size
+        self.books: Dict[str, OrderBook] = {}
+        self.trades: List[Dict] = []
+        self.reference_prices: Dict[str, float] = {}
+        self.last_bar_time: Dict[str, pd.Timestamp] = {}
+        self._exchanges: Dict[str, str] = {}
+        self._lowest: Dict[str, float] = {}  # Lowest price since entry, for the trade drawdown
+        self._next_id = 1
+        self._lock = threading.RLock()
+        if orders_path is None and self.portfolio.path:
+            orders_path = str(Path(self.portfolio.path).with_name(PAPER_ORDERS_FILE))
+        self.orders_path = orders_path
+        self.load()
+        self.restore_exits()
+
+    def load(self):
+        """Load the resting orders saved by save (nothing to load on first use)"""
+        if not self.orders_path:
+            return
+        try:
+            with open(self.orders_path, 'r') as f:
+                data = json.load(f)
+            books = {symbol: OrderBook.from_dict(book) for symbol, book in data['books'].items()}
+            last_bar_time = {symbol: pd.Timestamp(time) for symbol, time in data['last_bar_time'].items()}
+        except FileNotFoundError:
+            return
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            logging.error(f"Error loading paper orders from {self.orders_path}: {str(e)}")
+            return
+        with self._lock:
+            self.books = books
+            self.last_bar_time = last_bar_time
+            self.reference_prices = data.get('reference_prices', {})
+            self._lowest = data.get('lowest', {})
+            self._next_id = max([data.get('next_id', 1)] + [max(book.order_id[:book.size], default=0) + 1
+                                                            for book in books.values()])
+
+    def save(self):
+        """Write the resting orders to their JSON file (atomically)"""
+        if not self.orders_path:
+            return
+        with self._lock:
+            data = {
+                'next_id': self._next_id,
+                'books': {symbol: book.to_dict() for symbol, book in self.books.items() if book.live},
+                'reference_prices': self.reference_prices,
+                'last_bar_time': {symbol: pd.Timestamp(time).isoformat() for symbol, time in self.last_bar_time.items()},
+                'lowest': self._lowest,
+            }
+            Path(self.orders_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.orders_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, self.orders_path)
+
+    def restore_exits(self) -> List[int]:
+        """
+        Place the stop loss / take profit pair of held positions that have no resting sell
+
+        Returns:
+            List[int]: Ids of the orders placed
+        """
+        order_ids = []
+        with self._lock:
+            for symbol, position in self.portfolio.positions.items():
+                if position['shares'] <= 0 or self._book(symbol).has_open(SIDE_SELL):
+                    continue
+                order_ids.extend(self._place_exits(symbol, position['shares'], position.get('stop_loss'),
+                                                   position.get('take_profit'), self._new_id()))
+        if order_ids:
+            logging.info(f"Restored {len(order_ids)} paper exit orders of held positions")
+            self.save()
+        return order_ids
+
+    def _place_exits(self, symbol: str, shares: int, stop_loss: Optional[float], take_profit: Optional[float],
+                     group: int) -> List[int]:
+        """Add the exits of a position as one OCO group (levels that are None or NaN are skipped)"""
+        book, exchange = self._book(symbol), self.exchange_of(symbol)
+        order_ids = []
+        for kind, level, direction in ((ORDER_STOP, stop_loss, 'down'), (ORDER_TAKE_PROFIT, take_profit, 'up')):
+            if level is None or math.isnan(level):
+                continue
+            order_ids.append(self._new_id())
+            book.add(order_ids[-1], SIDE_SELL, kind, round_to_tick(level, exchange, direction), shares, group)
+        return order_ids
+
+    def exchange_of(self, symbol: str) -> str:
+        """Exchange whose trading rules apply to a symbol"""
+        if symbol not in self._exchanges:
+            info = self.exchange_info.get_symbol_info(symbol) if self.exchange_info is not None else None
+            self._exchanges[symbol] = (info or {}).get('exchange') or 'HOSE'
+        return self._exchanges[symbol]
+
+    def _book(self, symbol: str) -> OrderBook:
+        if symbol not in self.books:
+            self.books[symbol] = OrderBook()
+        return self.books[symbol]
+
+    def submit(self, symbol: str, side: int, shares: int, kind: int = ORDER_MARKET, price: float = math.nan,
+               stop_loss: Optional[float] = None, take_profit: Optional[float] = None, oco: int = -1) -> int:
+        """
+        Place an order
+
+        Args:
+            symbol (str): Trading symbol
+            side (int): SIDE_BUY or SIDE_SELL
+            shares (int): Number of shares, a multiple of the lot size
+            kind (int): ORDER_MARKET, ORDER_LIMIT, ORDER_STOP or ORDER_TAKE_PROFIT
+            price (float): Limit / trigger price in thousand VND (ignored for market orders)
+            stop_loss (Optional[float]): Stop loss placed when a buy fills
+            take_profit (Optional[float]): Take profit placed when a buy fills
+            oco (int): One-cancels-other group shared with another order
+
+        Returns:
+            int: Order id
+
+        Raises:
+            ValueError: If the order breaks the lot size, tick size or price band rules
+        """
+        if shares <= 0 or shares % self.lot_size:
+            raise ValueError(f"Order size for {symbol} must be a positive multiple of {self.lot_size} shares, got {shares}")
+        if kind not in ORDER_TYPE_NAMES:
+            raise ValueError(f"Invalid order type: {kind}")
+        exchange = self.exchange_of(symbol)
+        if kind != ORDER_MARKET:
+            if not price > 0:
+                raise ValueError(f"{ORDER_TYPE_NAMES[kind]} order for {symbol} needs a price")
+            # Buys round down and sells round up, so the order never trades at a worse price than asked
+            price = round_to_tick(price, exchange, 'down' if side == SIDE_BUY else 'up')
+            reference = self.reference_prices.get(symbol)
+            if kind == ORDER_LIMIT and reference is not None:
+                floor, ceiling = price_band(reference, exchange)
+                if not floor <= price <= ceiling:
+                    raise ValueError(f"Limit price {price} for {symbol} is outside the {exchange} band [{floor}, {ceiling}]")
+
+        with self._lock:
+            order_id = self._next_id
+            self._next_id += 1
+            self._book(symbol).add(
+                order_id, side, kind, price, shares, oco,
+                math.nan if stop_loss is None else stop_loss,
+                math.nan if take_profit is None else take_profit
+            )
+            self.save()
+        return order_id
+
+    def cancel(self, symbol: str, order_id: Optional[int] = None) -> int:
+        """Cancel one order, or all resting orders of a symbol; returns the number cancelled"""
+        with self._lock:
+            book = self.books.get(symbol)
+            if book is None:
+                return 0
+            mask = np.ones(book.size, dtype=bool) if order_id is None else book.order_id[:book.size] == order_id
+            cancelled = book.cancel(mask)
+            if cancelled:
+                self.save()
+            return cancelled
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
+        """Resting orders of a symbol or of all symbols"""
+        symbols = [symbol] if symbol is not None else list(self.books)
+        return [{'symbol': s, **order} for s in symbols if s in self.books for order in self.books[s].orders()]
+
+    def submit_recommendations(self, recommendations: List[Dict]) -> List[int]:
+        """
+        Turn generate_recommendations output into orders
+
+        BUY recommendations for symbols not held yet become market buys of
+        their position_size with the recommended stop loss and take profit.
+        SELL recommendations cancel the resting orders of a held symbol and
+        sell the whole position at the next open.
+        """
+        order_ids = []
+        for rec in recommendations:
+            symbol, size = rec['symbol'], int(rec.get('position_size') or 0)
+            size -= size % self.lot_size
+            # Orders placed after this close only match bars that start later
+            self.reference_prices.setdefault(symbol, rec['price'])
+            self.last_bar_time.setdefault(symbol, pd.Timestamp(datetime.now()))
+            try:
+                if (rec['signal'] == 'BUY' and size > 0 and self.portfolio.shares(symbol) == 0
+                        and not self._book(symbol).has_open(SIDE_BUY)):
+                    order_ids.append(self.submit(symbol, SIDE_BUY, size, ORDER_MARKET,
+                                                 stop_loss=rec['stop_loss'], take_profit=rec['take_profit']))
+                elif rec['signal'] == 'SELL' and self.portfolio.shares(symbol) > 0:
+                    self.cancel(symbol)
+                    order_ids.append(self.submit(symbol, SIDE_SELL, self.portfolio.shares(symbol), ORDER_MARKET))
+            except ValueError as e:
+                logging.error(f"Error placing paper order for {symbol}: {str(e)}")
+        return order_ids
+
+    def on_tick(self, symbol: str, price: float, time: Optional[datetime] = None) -> List[Dict]:
+        """Match the resting orders of a symbol against a trade at one price"""
+        return self.on_bar(symbol, price, price, price, price, time, update_reference=False)
+
+    def on_bar(self, symbol: str, open_: float, high: float, low: float, close: float,
+               time: Optional[datetime] = None, update_reference: bool = True) -> List[Dict]:
+        """
+        Match the resting orders of a symbol against one bar
+
+        Args:
+            symbol (str): Trading symbol
+            open_, high, low, close (float): Bar prices in thousand VND
+            time (Optional[datetime]): Bar time recorded on the fills (default: now)
+            update_reference (bool): Use the close as the next session's reference price
+
+        Returns:
+            List[Dict]: Fills of this bar
+        """
+        time = time if time is not None else datetime.now()
+        fills = []
+        with self._lock:
+            book = self.books.get(symbol)
+            if book is not None and book.live:
+                start = 0
+                while start < book.size:
+                    # Exits placed by an entry filled on this bar are matched against the same bar
+                    end = book.size
+                    fills.extend(self._match(symbol, book, start, open_, high, low, time))
+                    start = end
+                book.compact()
+            if self.portfolio.shares(symbol) > 0:
+                self._lowest[symbol] = min(self._lowest.get(symbol, low), low)
+            if update_reference:
+                self.reference_prices[symbol] = close
+            self.last_bar_time[symbol] = time
+        if fills:
+            self.portfolio.mark({symbol: close})
+            self.portfolio.save()
+            self.save()
+        return fills
+
+    def _match(self, symbol: str, book: OrderBook, start: int, open_: float, high: float, low: float, time) -> List[Dict]:
+        n = book.size
+        active, side, kind, price = book.active[start:n], book.side[start:n], book.kind[start:n], book.price[start:n]
+        buy = side == SIDE_BUY
+
+        # Trigger and fill price of every resting order on this bar
+        triggered = active & (
+            (kind == ORDER_MARKET)
+            | ((kind == ORDER_LIMIT) & np.where(buy, low <= price, high >= price))
+            | ((kind == ORDER_STOP) & (low <= price))
+            | ((kind == ORDER_TAKE_PROFIT) & (high >= price))
+        )
+        if not triggered.any():
+            return []
+        fill_price = np.where(
+            kind == ORDER_MARKET, open_,
+            np.where((kind == ORDER_STOP) | ((kind == ORDER_LIMIT) & buy), np.minimum(open_, price), np.maximum(open_, price))
+        )
+        # Stops first, so a bar touching both ends of an OCO pair exits at the stop
+        rows = np.flatnonzero(triggered)
+        rows = rows[np.argsort(kind[rows] != ORDER_STOP, kind='stable')]
+
+        fills = []
+        for row in rows:
+            slot = start + row
+            if not book.active[slot]:
+                continue  # Cancelled by an OCO partner filled earlier on this bar
+            book.deactivate(slot)
+            fill = self._fill(symbol, book, slot, float(fill_price[row]), time)
+            if fill is not None:
+                fills.append(fill)
+            if book.oco[slot] >= 0:
+                book.cancel(book.oco[:book.size] == book.oco[slot])
+        return fills
+
+    def _fill(self, symbol: str, book: OrderBook, row: int, price: float, time) -> Optional[Dict]:
+        shares = int(book.shares[row])
+        value = shares * price * PRICE_UNIT
+        fill = {
+            'order_id': int(book.order_id[row]),
+            'symbol': symbol,
+            'side': 'BUY' if book.side[row] == SIDE_BUY else 'SELL',
+            'type': ORDER_TYPE_NAMES[int(book.kind[row])],
+            'shares': shares,
+            'price': price,
+            'time': time,
+        }
+
+        if book.side[row] == SIDE_BUY:
+            fee = value * self.commission
+            if value + fee > self.portfolio.cash:
+                logging.warning(f"Paper buy of {shares} {symbol} rejected: not enough cash")
+                return None
+            stop_loss, take_profit = float(book.stop_loss[row]), float(book.take_profit[row])
+            self.portfolio.buy(symbol, shares, price,
+                               None if math.isnan(stop_loss) else stop_loss,
+                               None if math.isnan(take_profit) else take_profit, fee)
+            self._lowest[symbol] = price
+            # Exits of the new position cancel each other
+            self._place_exits(symbol, shares, stop_loss, take_profit, fill['order_id'])
+        else:
+            shares = min(shares, self.portfolio.shares(symbol))
+            if shares == 0:
+                return None
+            fill['shares'] = shares
+            value = shares * price * PRICE_UNIT
+            fee = value * (self.commission + self.sell_tax)
+            entry_price = self.portfolio.positions[symbol]['avg_price']
+            profit = self.portfolio.sell(symbol, shares, price, fee)
+            lowest = min(self._lowest.get(symbol, price), price)
+            drawdown = (entry_price - lowest) / entry_price if entry_price else 0.0
+            if self.portfolio.shares(symbol) == 0:
+                self._lowest.pop(symbol, None)
+                book.cancel(book.side[:book.size] == SIDE_SELL)  # Remaining exits of the closed position
+            fill.update(profit=profit, drawdown=drawdown)
+            if self.strategy is not None:
+                self.strategy.update_performance_metrics(symbol, {'profit': profit, 'drawdown': drawdown})
+
+        fill['fee'] = fee
+        self.trades.append(fill)
+        logging.info(f"Paper fill: {fill['side']} {fill['shares']} {symbol} @ {price} ({fill['type']})")
+        return fill
+
+    def _new_id(self) -> int:
+        order_id = self._next_id
+        self._next_id += 1
+        return order_id
+
+    def on_bars_from_store(self, bar_store, symbols: Optional[List[str]] = None,
+                           calendar: Optional[MarketCalendar] = None) -> List[Dict]:
+        """
+        Replay the stored daily bars of closed sessions that arrived since the last call
+
+        The bar of a session still trading is partial: replaying it would
+        advance last_bar_time past the session, so its final high/low would
+        never be matched. It is left for the first call after the close.
+
+        Args:
+            bar_store (BarStore): Source of the daily bars
+            symbols (Optional[List[str]]): Symbols to update (default: those with resting
+                orders or held in the portfolio)
+            calendar (Optional[MarketCalendar]): Decides which sessions have closed
+                (default: HOSE calendar)
+
+        Returns:
+            List[Dict]: All fills, in bar order per symbol
+        """
+        if symbols is None:
+            symbols = [s for s, book in self.books.items() if book.live]
+            symbols += [s for s in self.portfolio.positions if s not in symbols]
+        closed = (calendar if calendar is not None else MarketCalendar()).last_closed_day()
+        if closed is None:
+            return []
+        session_end = pd.Timestamp(closed) + pd.Timedelta(days=1)
+        fills = []
+        for symbol in symbols:
+            df = bar_store.read(symbol)
+            if df is None or df.empty:
+                continue
+            df = df[df['time'] < session_end]
+            if df.empty:
+                continue
+            last_time = self.last_bar_time.get(symbol)
+            if last_time is None:
+                # First sight of the symbol: the last close becomes the next session's reference price
+                self.reference_prices[symbol] = float(df['close'].iloc[-1])
+                self.last_bar_time[symbol] = df['time'].iloc[-1]
+                continue
+            new_bars = df[df['time'] > last_time]
+            for bar in new_bars.itertuples(index=False):
+                fills.extend(self.on_bar(symbol, bar.open, bar.high, bar.low, bar.close, bar.time))
+        self.save()
+        return fills
+
+    def trade_table(self) -> pd.DataFrame:
+        """All fills as a DataFrame"""
+        return pd.DataFrame(self.trades)
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_FETCH_WORKERS = 8
+
+class RateLimiter:
+    """
+    Thread-safe limiter spacing calls to a data source evenly
+
+    A limit of None (or <= 0) disables throttling.
+    """
+
+    def __init__(self, max_per_second: Optional[float] = None):
+        self.interval = 1.0 / max_per_second if max_per_second and max_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may issue the next request"""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+def fetch_in_order(fetch: Callable[[str], T], symbols: Iterable[str], max_workers: int = DEFAULT_FETCH_WORKERS) -> Iterator[Tuple[str, Optional[T]]]:
+    """
+    Run fetch(symbol) on a bounded thread pool and yield results in input order
+
+    At most ``max_workers * 2`` fetches are in flight, so memory stays bounded
+    for large universes while the consumer processes earlier results. A fetch
+    that raises yields None for its symbol; the error is logged and the
+    remaining symbols are unaffected.
+
+    Args:
+        fetch (Callable[[str], T]): Function downloading the data for one symbol
+        symbols (Iterable[str]): Symbols to fetch
+        max_workers (int): Number of concurrent fetches (1 keeps the sequential behaviour)
+
+    Yields:
+        Tuple[str, Optional[T]]: (symbol, fetched data or None)
+    """
+    max_workers = max(1, int(max_workers))
+    symbols = iter(symbols)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as executor:
+        pending = deque()
+
+        def submit_next() -> bool:
+            for symbol in symbols:
+                pending.append((symbol, executor.submit(fetch, symbol)))
+                return True
+            return False
+
+        for _ in range(max_workers * 2):
+            if not submit_next():
+                break
+
+        while pending:
+            symbol, future = pending.popleft()
+            submit_next()
+            try:
+                result = future.result()
+            except Exception as e:
+                logging.error(f"Error fetching data for {symbol}: {str(e)}")
+                result = None
+            yield symbol, result
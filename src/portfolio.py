@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from .lazy import lazy_import
+from .stock_info import DEFAULT_ACCOUNT_BALANCE
+
+np = lazy_import('numpy')
+
+PORTFOLIO_FILE = 'data/portfolio.json'
+LOT_SIZE = 100      # Board lot on HOSE/HNX/UPCOM
+PRICE_UNIT = 1000   # Vnstock VCI prices are quoted in thousand VND
+
+class Portfolio:
+    """
+    Cash and open positions of the trading account
+
+    Positions map a symbol to its share count, average entry price, last
+    marked price and optional stop loss / take profit. Prices are in the
+    quoted unit of the bars (thousand VND); cash is in VND.
+    """
+
+    def __init__(self, cash: float, positions: Optional[Dict[str, Dict]] = None, path: Optional[str] = None):
+        """
+        Initialize the portfolio
+
+        Args:
+            cash (float): Available cash in VND
+            positions (Optional[Dict[str, Dict]]): Open positions by symbol
+            path (Optional[str]): JSON file the portfolio is saved to (default: not saved)
+        """
+        self.cash = float(cash)
+        self.positions: Dict[str, Dict] = positions if positions is not None else {}
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = PORTFOLIO_FILE, initial_cash: Optional[float] = None) -> 'Portfolio':
+        """
+        Load a saved portfolio, or start a new one with initial_cash
+
+        Args:
+            path (str): JSON file written by save (default: data/portfolio.json)
+            initial_cash (Optional[float]): Cash of a new portfolio (default: 100M VND)
+        """
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return cls(data['cash'], data['positions'], path)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError) as e:
+            logging.error(f"Error loading portfolio from {path}: {str(e)}")
+        return cls(initial_cash if initial_cash is not None else DEFAULT_ACCOUNT_BALANCE, path=path)
+
+    def save(self):
+        """Write the portfolio to its JSON file (atomically)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {'cash': self.cash, 'positions': self.positions}
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, self.path)
+
+    def shares(self, symbol: str) -> int:
+        """Shares held of a symbol (0 if none)"""
+        position = self.positions.get(symbol)
+        return position['shares'] if position else 0
+
+    def buy(self, symbol: str, shares: int, price: float, stop_loss: Optional[float] = None,
+            take_profit: Optional[float] = None, fee: float = 0.0):
+        """
+        Record a filled buy, averaging into an existing position
+
+        Args:
+            symbol (str): Trading symbol
+            shares (int): Filled shares
+            price (float): Fill price in thousand VND
+            stop_loss (Optional[float]): Stop loss of the position
+            take_profit (Optional[float]): Take profit of the position
+            fee (float): Commission paid in VND
+        """
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                position = self.positions[symbol] = {'shares': 0, 'avg_price': 0.0}
+            total = position['shares'] + shares
+            position['avg_price'] = (position['avg_price'] * position['shares'] + price * shares) / total
+            position['shares'] = total
+            position['last_price'] = price
+            if stop_loss is not None:
+                position['stop_loss'] = stop_loss
+            if take_profit is not None:
+                position['take_profit'] = take_profit
+            self.cash -= shares * price * PRICE_UNIT + fee
+
+    def sell(self, symbol: str, shares: int, price: float, fee: float = 0.0) -> float:
+        """
+        Record a filled sell
+
+        Returns:
+            float: Realized profit in VND (after the fee)
+        """
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None or shares > position['shares']:
+                raise ValueError(f"Cannot sell {shares} shares of {symbol}: only {self.shares(symbol)} held")
+            position['shares'] -= shares
+            position['last_price'] = price
+            if position['shares'] == 0:
+                del self.positions[symbol]
+            self.cash += shares * price * PRICE_UNIT - fee
+            return shares * (price - position['avg_price']) * PRICE_UNIT - fee
+
+    def mark(self, prices: Dict[str, float]):
+        """Update the last price of held symbols"""
+        with self._lock:
+            for symbol, position in self.positions.items():
+                if symbol in prices:
+                    position['last_price'] = prices[symbol]
+
+    def market_values(self) -> Dict[str, float]:
+        """Market value in VND of every position at its last price"""
+        return {
+            symbol: position['shares'] * position.get('last_price', position['avg_price']) * PRICE_UNIT
+            for symbol, position in self.positions.items()
+        }
+
+    def equity(self) -> float:
+        """Cash plus the market value of all positions, in VND"""
+        return self.cash + sum(self.market_values().values())
+
+class RiskEngine:
+    """
+    Portfolio-level position sizing for many candidates at once
+
+    Every BUY candidate first gets the standalone size of
+    StockInfo.calculate_position_size, computed against the portfolio equity
+    instead of a fixed balance: ``risk_per_trade`` of equity at risk down to
+    the stop loss, and at most ``max_position_size`` of equity in one
+    symbol (counting what is already held). The desired amounts are then cut
+    so that, in priority order (highest score first):
+
+    - the value on each exchange stays under its ``exchange_caps`` share of equity
+    - the value in each ExchangeInfo.VN_EXCHANGES group (e.g. 'HNXFin') stays
+      under its ``group_caps`` share of equity
+    - the total stays within the available cash
+
+    A candidate that no longer fits is partially filled and the lower-ranked
+    ones in the same bucket get nothing. Sizes are finally rounded down to
+    the lot size. Everything is a handful of NumPy passes over the candidate
+    arrays, so re-allocating across hundreds of signals takes well under a
+    millisecond.
+    """
+
+    def __init__(self, exchange_info=None, risk_per_trade: float = 0.02, max_position_size: float = 0.1,
+                 exchange_caps: Optional[Dict[str, float]] = None, group_caps: Optional[Dict[str, float]] = None,
+                 lot_size: int = LOT_SIZE, price_unit: float = PRICE_UNIT):
+        """
+        Initialize the risk engine
+
+        Args:
+            exchange_info (Optional[ExchangeInfo]): Source of the symbol master, needed for caps
+            risk_per_trade (float): Maximum risk per trade as a percentage of equity (default: 2%)
+            max_position_size (float): Maximum position size as a percentage of equity (default: 10%)
+            exchange_caps (Optional[Dict[str, float]]): Maximum share of equity per exchange, e.g. {'UPCOM': 0.2}
+            group_caps (Optional[Dict[str, float]]): Maximum share of equity per group, e.g. {'HNXFin': 0.3}
+            lot_size (int): Shares per board lot (default: 100)
+            price_unit (float): VND per quoted price unit (default: 1000)
+        """
+        self.exchange_info = exchange_info
+        self.risk_per_trade = risk_per_trade
+        self.max_position_size = max_position_size
+        self.exchange_caps = exchange_caps or {}
+        self.group_caps = group_caps or {}
+        self.lot_size = lot_size
+        self.price_unit = price_unit
+        if (self.exchange_caps or self.group_caps) and exchange_info is None:
+            raise ValueError("Exposure caps need an ExchangeInfo to look up symbol metadata")
+
+    def allocate(self, portfolio: Portfolio, symbols: List[str], prices: np.ndarray, stop_losses: np.ndarray,
+                 scores: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Shares to buy for each candidate
+
+        Args:
+            portfolio (Portfolio): Current cash and positions
+            symbols (List[str]): Candidate symbols
+            prices (np.ndarray): Entry prices in thousand VND
+            stop_losses (np.ndarray): Stop loss prices in thousand VND
+            scores (Optional[np.ndarray]): Priority of each candidate, higher first (default: list order)
+
+        Returns:
+            np.ndarray: int64 shares per candidate, multiples of the lot size
+        """
+        prices = np.asarray(prices, dtype=float)
+        stop_losses = np.asarray(stop_losses, dtype=float)
+        if len(symbols) == 0:
+            return np.zeros(0, dtype=np.int64)
+        if scores is None:
+            scores = -np.arange(len(symbols), dtype=float)
+        priority = np.argsort(-np.asarray(scores, dtype=float), kind='stable')
+
+        values = portfolio.market_values()
+        equity = portfolio.cash + sum(values.values())
+        held = np.array([values.get(symbol, 0.0) for symbol in symbols])
+        unit_prices = prices * self.price_unit
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            by_risk = np.floor(equity * self.risk_per_trade / (np.abs(prices - stop_losses) * self.price_unit))
+            amount = np.minimum(by_risk * unit_prices, equity * self.max_position_size - held)
+        amount[~np.isfinite(amount) | (amount < 0)] = 0
+
+        if self.exchange_caps or self.group_caps:
+            master = self.exchange_info.get_symbol_master()
+            ids = master.ids(symbols)
+            held_ids = master.ids(list(values))
+            held_values = np.fromiter(values.values(), dtype=float, count=len(values))
+            if self.exchange_caps:
+                amount = self._cap_exchanges(master, ids, held_ids, held_values, amount, priority, equity)
+            for group, cap in self.group_caps.items():
+                mask = master.group_mask(group)
+                members = (ids >= 0) & mask[np.maximum(ids, 0)]
+                current = held_values[(held_ids >= 0) & mask[np.maximum(held_ids, 0)]].sum()
+                amount = np.where(members, self._fill(amount, priority, members, cap * equity - current), amount)
+
+        amount = self._fill(amount, priority, np.ones(len(symbols), dtype=bool), portfolio.cash)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lots = np.floor(amount / (unit_prices * self.lot_size))
+        lots[~np.isfinite(lots)] = 0
+        return lots.astype(np.int64) * self.lot_size
+
+    def _cap_exchanges(self, master, ids, held_ids, held_values, amount, priority, equity) -> np.ndarray:
+        """Cut amounts so every capped exchange stays under its share of equity"""
+        codes = np.where(ids >= 0, master.exchange_codes[np.maximum(ids, 0)], -1)
+        held_codes = np.where(held_ids >= 0, master.exchange_codes[np.maximum(held_ids, 0)], -1)
+        for exchange, cap in self.exchange_caps.items():
+            matches = np.flatnonzero(master.exchanges == exchange)
+            if matches.size == 0:
+                continue
+            members = codes == matches[0]
+            current = held_values[held_codes == matches[0]].sum()
+            amount = np.where(members, self._fill(amount, priority, members, cap * equity - current), amount)
+        return amount
+
+    @staticmethod
+    def _fill(amount: np.ndarray, priority: np.ndarray, members: np.ndarray, capacity: float) -> np.ndarray:
+        """
+        Fill the members' amounts in priority order until capacity is used up
+
+        Returns the capped amounts (non-members are returned unchanged).
+        """
+        ordered = priority[members[priority]]
+        cumulative = np.cumsum(amount[ordered])
+        before = cumulative - amount[ordered]
+        capped = amount.copy()
+        capped[ordered] = np.clip(max(capacity, 0.0) - before, 0, amount[ordered])
+        return capped
+
+    def allocate_recommendations(self, portfolio: Portfolio, recommendations: List[Dict]) -> List[Dict]:
+        """
+        Set the position_size of generate_recommendations / Screener output from the portfolio
+
+        BUY recommendations get their allocated shares (ranked by 'score'
+        when present, otherwise in list order), SELL recommendations the
+        shares held, and HOLD recommendations 0.
+        """
+        buys = [rec for rec in recommendations if rec['signal'] == 'BUY']
+        if buys:
+            scores = np.array([rec['score'] for rec in buys]) if all('score' in rec for rec in buys) else None
+            sizes = self.allocate(
+                portfolio,
+                [rec['symbol'] for rec in buys],
+                np.array([rec['price'] for rec in buys]),
+                np.array([rec['stop_loss'] for rec in buys]),
+                scores
+            )
+            for rec, size in zip(buys, sizes):
+                rec['position_size'] = int(size)
+        for rec in recommendations:
+            if rec['signal'] == 'SELL':
+                rec['position_size'] = portfolio.shares(rec['symbol'])
+            elif rec['signal'] != 'BUY':
+                rec['position_size'] = 0
+        return recommendations
@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from .lazy import lazy_import
+from .instrumentation import Counters
+from .pipeline import fetch_in_order, DEFAULT_FETCH_WORKERS
+from .scheduler import INTRADAY_INTERVALS, DEFAULT_BAR_CLOSE_DELAY
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+DEFAULT_TICK_CAPACITY = 256   # Quotes kept per symbol
+DEFAULT_BAR_CAPACITY = 128    # Closed bars kept per symbol
+REPLAY_BATCH_SIZE = 2000      # Quotes read from a replay file at a time
+HEARTBEAT_SECONDS = 1.0       # How often bars are closed on the source clock when no quotes arrive
+
+TICK_FIELDS = ('time', 'price', 'volume')
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+NS_PER_MINUTE = 60 * 10**9
+
+# Columnar batch of quotes: symbols (list of str), times (int64 ns, exchange local time), prices, volumes
+QuoteBatch = namedtuple('QuoteBatch', ['symbols', 'times', 'prices', 'volumes'])
+
+class QuoteSource(abc.ABC):
+    """
+    Base class of the real-time quote feeds a QuoteStream consumes
+
+    A source must yield QuoteBatch objects from ``batches`` in time order and
+    reports its current time from ``clock``, which closes bars of symbols
+    that stopped trading. Times are exchange local (naive) nanoseconds,
+    like the bars of StockInfo.get_historical_data.
+    """
+
+    async def connect(self, symbols: Sequence[str]):
+        """Subscribe to the quotes of the symbols"""
+
+    @abc.abstractmethod
+    def batches(self) -> AsyncIterator[QuoteBatch]:
+        """Quote batches until the feed ends"""
+
+    def clock(self) -> int:
+        """Current time of the feed in local nanoseconds (default: the wall clock in Vietnam)"""
+        from .market_calendar import MarketCalendar
+        return pd.Timestamp(MarketCalendar.now().replace(tzinfo=None)).value
+
+    async def close(self):
+        """Unsubscribe and release the connection"""
+
+class ReplaySource(QuoteSource):
+    """
+    Replays quotes recorded in a CSV file, for offline runs and tests
+
+    The file has a header with the columns ``time,symbol,price,volume``
+    (times like 2024-06-03 09:15:02, in exchange local time) and is sorted
+    by time; compressed files (.gz, .zip, ...) are read as well. It is read
+    in chunks, so files of any length replay in bounded memory.
+    """
+
+    def __init__(self, path: str, speed: float = 0.0, batch_size: int = REPLAY_BATCH_SIZE):
+        """
+        Initialize the replay
+
+        Args:
+            path (str): CSV file of recorded quotes
+            speed (float): Replay speed relative to the recording, e.g. 60 plays an hour
+                in a minute (default: 0, as fast as possible)
+            batch_size (int): Quotes per batch (default: 2000)
+        """
+        self.path = path
+        self.speed = speed
+        self.batch_size = batch_size
+        self.symbols: Optional[List[str]] = None
+        self._clock: Optional[int] = None
+
+    def recorded_symbols(self) -> List[str]:
+        """Symbols that appear in the file"""
+        symbols = set()
+        for chunk in pd.read_csv(self.path, usecols=['symbol'], dtype={'symbol': str}, chunksize=100000):
+            symbols.update(chunk['symbol'].unique())
+        return sorted(symbols)
+
+    async def connect(self, symbols: Sequence[str]):
+        self.symbols = list(symbols)
+
+    async def batches(self) -> AsyncIterator[QuoteBatch]:
+        wanted = set(self.symbols) if self.symbols is not None else None
+        started, first = time.monotonic(), None
+        for chunk in pd.read_csv(self.path, dtype={'symbol': str}, chunksize=self.batch_size):
+            if wanted is not None:
+                chunk = chunk[chunk['symbol'].isin(wanted)]
+            if chunk.empty:
+                continue
+            times = pd.to_datetime(chunk['time']).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            if self.speed > 0:
+                # Wait until the recording time of the batch at the replay speed
+                first = times[0] if first is None else first
+                delay = (times[0] - first) / 1e9 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            self._clock = int(times[-1])
+            yield QuoteBatch(chunk['symbol'].tolist(), times,
+                             chunk['price'].to_numpy(dtype=float), chunk['volume'].to_numpy(dtype=float))
+
+    def clock(self) -> int:
+        """Time of the last replayed quote (the recording's clock)"""
+        return self._clock if self._clock is not None else 0
+
+class RingBuffer:
+    """
+    Fixed-size ring buffers of records, one row per symbol
+
+    Every field is one (rows x capacity) NumPy array, so the memory is
+    allocated once and never grows: when a row is full the oldest record
+    is overwritten.
+    """
+
+    def __init__(self, rows: int, capacity: int, fields: Sequence[str], dtypes: Optional[Dict[str, str]] = None):
+        """
+        Allocate the buffers
+
+        Args:
+            rows (int): Number of rows (symbols)
+            capacity (int): Records kept per row
+            fields (Sequence[str]): Field names
+            dtypes (Optional[Dict[str, str]]): dtype per field (default: float64)
+        """
+        dtypes = dtypes or {}
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.data = {field: np.zeros((rows, capacity), dtype=dtypes.get(field, np.float64)) for field in fields}
+        self.heads = np.zeros(rows, dtype=np.int64)   # Slot of the next record
+        self.sizes = np.zeros(rows, dtype=np.int64)
+
+    def append(self, row: int, *values):
+        """Append one record (values in field order) to a row"""
+        head = self.heads[row]
+        for field, value in zip(self.fields, values):
+            self.data[field][row, head] = value
+        self.heads[row] = (head + 1) % self.capacity
+        if self.sizes[row] < self.capacity:
+            self.sizes[row] += 1
+
+    def extend(self, rows: np.ndarray, *columns: np.ndarray):
+        """
+        Append many records at once (columns in field order, one value per record)
+
+        Records of the same row are appended in the given order; when a row
+        gets more records than its capacity only the newest are kept.
+        """
+        if len(rows) == 0:
+            return
+        order = np.argsort(rows, kind='stable')
+        rows = rows[order]
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        counts = np.diff(np.r_[starts, len(rows)])
+        rank = np.arange(len(rows)) - np.repeat(starts, counts)
+        keep = rank >= np.repeat(counts, counts) - self.capacity
+        slots = (self.heads[rows] + rank) % self.capacity
+        for field, values in zip(self.fields, columns):
+            self.data[field][rows[keep], slots[keep]] = np.asarray(values)[order][keep]
+        unique = rows[starts]
+        self.heads[unique] = (self.heads[unique] + counts) % self.capacity
+        self.sizes[unique] = np.minimum(self.sizes[unique] + counts, self.capacity)
+
+    def latest(self, row: int, count: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """The last count records of a row (default: all kept), oldest first"""
+        size = int(self.sizes[row]) if count is None else min(count, int(self.sizes[row]))
+        slots = (self.heads[row] - size + np.arange(size)) % self.capacity
+        return {field: values[row, slots] for field, values in self.data.items()}
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.data.values()) + self.heads.nbytes + self.sizes.nbytes
+
+class BarAggregator:
+    """
+    Builds the open bar of every symbol from its quotes
+
+    Bars are aligned like timeframes.bucket_starts (to the hour), so they
+    line up with resampled historical bars. A bar closes when a quote of
+    the symbol falls into a later bar, or when ``close_due`` sees that the
+    clock passed its end.
+
+    The open bars are kept in plain lists indexed by row: they are read and
+    written one quote at a time, where list items are several times faster
+    than NumPy scalars.
+    """
+
+    def __init__(self, rows: int, minutes: int):
+        self.step = minutes * NS_PER_MINUTE
+        self.starts = [-1] * rows        # Start of the open bar, -1 if none
+        self.last_starts = [-1] * rows   # Start of the last closed bar
+        self.opens = [0.0] * rows
+        self.highs = [0.0] * rows
+        self.lows = [0.0] * rows
+        self.closes = [0.0] * rows
+        self.volumes = [0.0] * rows
+
+    def add(self, row: int, time: int, price: float, volume: float) -> Tuple[bool, Optional[Tuple]]:
+        """
+        Add a quote to the open bar of its symbol
+
+        Returns:
+            Tuple[bool, Optional[Tuple]]: Whether the quote was used (False when it belongs to
+            an already closed bar), and the bar it closed as (row, start, open, high, low, close, volume)
+        """
+        start = time - time % self.step
+        current = self.starts[row]
+        if start == current:
+            if price > self.highs[row]:
+                self.highs[row] = price
+            if price < self.lows[row]:
+                self.lows[row] = price
+            self.closes[row] = price
+            self.volumes[row] += volume
+            return True, None
+        if start < current or start <= self.last_starts[row]:
+            return False, None
+        closed = self._close(row) if current >= 0 else None
+        self.starts[row] = start
+        self.opens[row] = self.highs[row] = self.lows[row] = self.closes[row] = price
+        self.volumes[row] = volume
+        return True, closed
+
+    def _close(self, row: int) -> Tuple:
+        bar = (row, self.starts[row], self.opens[row], self.highs[row],
+               self.lows[row], self.closes[row], self.volumes[row])
+        self.last_starts[row] = self.starts[row]
+        self.starts[row] = -1
+        return bar
+
+    def close_due(self, now: Optional[int] = None) -> List[Tuple]:
+        """Close every open bar that ended at or before now (default: all open bars)"""
+        end = now - self.step if now is not None else None
+        return [self._close(row) for row, start in enumerate(self.starts)
+                if start >= 0 and (end is None or start <= end)]
+
+class QuoteStream:
+    """
+    Asyncio consumer turning a real-time quote feed into bars and signals
+
+    Quotes from a QuoteSource are written into per-symbol RingBuffers and
+    aggregated into ``interval``-minute bars. When a bar closes it is added
+    to the symbol's IndicatorState (O(1) per bar, seeded from the stored
+    history) and the strategy's rules are evaluated on it, so every bar
+    close yields a fresh signal without reloading any history.
+
+    All buffers are allocated up front for the symbol universe: memory use
+    does not grow with the length of the run. Quotes of symbols outside the
+    universe and quotes older than the bar already closed for their symbol
+    are counted and dropped. Everything runs on the event loop thread, so a
+    whole exchange is handled on one core.
+    """
+
+    def __init__(self, source: QuoteSource, symbols: Sequence[str], strategy=None, stock_info=None,
+                 interval: int = 1, on_bar: Optional[Callable[[str, Dict, Optional[Dict], str], None]] = None,
+                 tick_capacity: int = DEFAULT_TICK_CAPACITY, bar_capacity: int = DEFAULT_BAR_CAPACITY,
+                 close_delay: float = DEFAULT_BAR_CLOSE_DELAY, fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                 state_store=None):
+        """
+        Initialize the stream
+
+        Args:
+            source (QuoteSource): Feed of quotes
+            symbols (Sequence[str]): Symbol universe
+            strategy (Optional[TradingStrategy]): Rules and indicator windows (default: TradingStrategy())
+            stock_info (Optional[StockInfo]): Source of the history the indicators are seeded from
+                (default: none, indicators warm up from the stream)
+            interval (int): Bar interval in minutes, 1, 5 or 15 (default: 1)
+            on_bar (Optional[Callable]): Called as on_bar(symbol, bar, trend, signal) on every bar
+                close (default: log BUY and SELL signals)
+            tick_capacity (int): Quotes kept per symbol (default: 256)
+            bar_capacity (int): Closed bars kept per symbol (default: 128)
+            close_delay (float): Seconds after a bar's end before it is closed on the
+                source clock, for late quotes (default: 5)
+            fetch_workers (int): Number of symbols whose history is loaded concurrently (default: 8)
+            state_store (Optional[IndicatorStateStore]): Indicator states saved by an earlier run
+                of the same interval; seeding then only applies the bars after them, and the
+                states are saved again when the stream ends (default: seed from the whole history)
+        """
+        if interval not in INTRADAY_INTERVALS:
+            raise ValueError(f"Invalid interval: {interval} (expected one of {INTRADAY_INTERVALS})")
+        if strategy is None:
+            from .strategy import TradingStrategy
+            strategy = TradingStrategy()
+        self.source = source
+        self.symbols: List[str] = list(symbols)
+        self.index: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.strategy = strategy
+        self.stock_info = stock_info
+        self.interval = interval
+        self.on_bar = on_bar if on_bar is not None else self._log_signal
+        self.close_delay = int(close_delay * 1e9)
+        self.fetch_workers = fetch_workers
+        self.state_store = state_store
+
+        rows = len(self.symbols)
+        self.ticks = RingBuffer(rows, tick_capacity, TICK_FIELDS, {'time': 'int64'})
+        self.bars = RingBuffer(rows, bar_capacity, BAR_FIELDS, {'time': 'int64'})
+        self.aggregator = BarAggregator(rows, interval)
+        self.states: List = [None] * rows
+        self.signals: Dict[str, str] = {}
+        self.stats = Counters()
+
+    def seed(self):
+        """
+        Seed the indicator state of every symbol from its stored intraday history
+
+        With a state store, the state saved by the previous run is advanced
+        with the bars stored since, instead of replaying the whole history.
+        The stored history can already hold bars of today that the stream
+        delivers again; _close_bars leaves those out of the indicators.
+        """
+        from .incremental import IndicatorState
+        params = self.strategy.params
+        windows = {name: params[name] for name in ('sma_fast', 'sma_slow', 'ema_window')}
+        if self.stock_info is None:
+            self.states = [IndicatorState(**windows) for _ in self.symbols]
+            return
+        timeframe = f"{self.interval}m"
+        fetch = lambda symbol: self.stock_info.get_historical_data(symbol, interval=timeframe)
+        for symbol, df in fetch_in_order(fetch, self.symbols, self.fetch_workers):
+            state = None
+            if self.state_store is not None:
+                state = self.state_store.get(symbol, df, **windows)
+            elif df is not None and not df.empty:
+                state = IndicatorState.from_history(df, **windows)
+            self.states[self.index[symbol]] = state if state is not None else IndicatorState(**windows)
+        logging.info(f"Seeded indicators of {len(self.symbols)} symbols from {timeframe} history")
+
+    async def run(self):
+        """Consume the source until it ends, then close the open bars"""
+        if any(state is None for state in self.states):
+            await asyncio.get_running_loop().run_in_executor(None, self.seed)
+        await self.source.connect(self.symbols)
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            async for batch in self.source.batches():
+                self.ingest(batch)
+                self._close_bars(self.aggregator.close_due(int(batch.times[-1]) - self.close_delay))
+        finally:
+            heartbeat.cancel()
+            await self.source.close()
+        self._close_bars(self.aggregator.close_due())
+        self.save_states()
+
+    def save_states(self):
+        """Save the indicator state of every symbol to the state store, if any"""
+        if self.state_store is None:
+            return
+        for symbol, state in zip(self.symbols, self.states):
+            if state is not None and state.last_time is not None:
+                self.state_store.save(symbol, state)
+
+    async def _heartbeat(self):
+        """Close the bars of symbols without new quotes when the source clock passes their end"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            self._close_bars(self.aggregator.close_due(self.source.clock() - self.close_delay))
+
+    def ingest(self, batch: QuoteBatch):
+        """Write a batch of quotes into the ring buffers and bars"""
+        index, add = self.index, self.aggregator.add
+        rows = np.full(len(batch.symbols), -1, dtype=np.int64)
+        unknown = late = 0
+        closed = []
+        for i, (symbol, when, price, volume) in enumerate(zip(batch.symbols, batch.times.tolist(),
+                                                              batch.prices.tolist(), batch.volumes.tolist())):
+            row = index.get(symbol)
+            if row is None:
+                unknown += 1
+                continue
+            used, bar = add(row, when, price, volume)
+            if not used:
+                late += 1
+                continue
+            rows[i] = row
+            if bar is not None:
+                closed.append(bar)
+        used = rows >= 0
+        self.ticks.extend(rows[used], batch.times[used], batch.prices[used], batch.volumes[used])
+        self.stats.add('quotes', len(batch.symbols) - unknown - late)
+        if unknown:
+            self.stats.add('unknown_symbol_quotes', unknown)
+        if late:
+            self.stats.add('late_quotes', late)
+        self._close_bars(closed)
+
+    def _close_bars(self, closed: List[Tuple]):
+        """
+        Store closed bars, advance the indicators and evaluate the strategy
+
+        A bar at or before the last bar the indicators were seeded with is
+        already part of them; it is stored and passed to on_bar without a
+        trend, and counted as a seeded bar.
+        """
+        for row, start, open_, high, low, close, volume in closed:
+            self.bars.append(row, start, open_, high, low, close, volume)
+            symbol = self.symbols[row]
+            bar = {'time': pd.Timestamp(start), 'open': open_, 'high': high, 'low': low,
+                   'close': close, 'volume': volume}
+            trend, signal = None, 'HOLD'
+            state = self.states[row]
+            if state is not None and state.last_time is not None and bar['time'] <= state.last_time:
+                self.stats.add('seeded_bars')
+            elif state is not None:
+                try:
+                    state.update(bar)
+                    trend = self.strategy.analyze_state(state)
+                except Exception as e:
+                    logging.error(f"Error evaluating bar of {symbol}: {str(e)}")
+            if trend:
+                signal = self.strategy.signal_from_trend(trend)
+            self.signals[symbol] = signal
+            self.stats.add('bars')
+            try:
+                self.on_bar(symbol, bar, trend, signal)
+            except Exception as e:
+                logging.error(f"Error in bar callback for {symbol}: {str(e)}")
+
+    @staticmethod
+    def _log_signal(symbol: str, bar: Dict, trend: Optional[Dict], signal: str):
+        if signal != 'HOLD':
+            logging.info(f"{symbol} {signal} at {bar['time']} close={bar['close']} rsi={trend['rsi']:.2f}")
+
+    def recent_quotes(self, symbol: str, count: Optional[int] = None) -> pd.DataFrame:
+        """The last quotes kept for a symbol"""
+        data = self.ticks.latest(self.index[symbol], count)
+        data['time'] = data['time'].astype('datetime64[ns]')
+        return pd.DataFrame(data)
+
+    def recent_bars(self, symbol: str, count: Optional[int] = None) -> pd.DataFrame:
+        """The last closed bars kept for a symbol, in the get_historical_data format"""
+        data = self.bars.latest(self.index[symbol], count)
+        data['time'] = data['time'].astype('datetime64[ns]')
+        return pd.DataFrame(data)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the quote and bar buffers"""
+        return self.ticks.nbytes + self.bars.nbytes
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Replay recorded quotes through the streaming strategy')
+    parser.add_argument('file', help='CSV file with time,symbol,price,volume columns')
+    parser.add_argument('--interval', type=int, choices=INTRADAY_INTERVALS, default=1, help='bar interval in minutes (default: 1)')
+    parser.add_argument('--group', default=None, help='only replay the members of a group, e.g. HOSE (default: every symbol in the file)')
+    parser.add_argument('--speed', type=float, default=0.0, help='replay speed, e.g. 60 for an hour per minute (default: as fast as possible)')
+    parser.add_argument('--no-seed', action='store_true', help='start the indicators empty instead of from the stored history')
+    parser.add_argument('--keep-state', action='store_true',
+                        help='save the indicator states under data/indicator_state and resume from them next time')
+    args = parser.parse_args()
+
+    from .log_config import configure_logging
+    configure_logging(log_file=None)
+    source = ReplaySource(args.file, speed=args.speed)
+    stock_info = None
+    if args.group or not args.no_seed:
+        from .stock_info import StockInfo
+        stock_info = StockInfo()
+    symbols = list(stock_info._load_all_symbols_by_group(args.group)) if args.group else source.recorded_symbols()
+    state_store = None
+    if args.keep_state:
+        from .incremental import IndicatorStateStore, INDICATOR_STATE_DIR
+        state_store = IndicatorStateStore(f"{INDICATOR_STATE_DIR}/{args.interval}m")
+    stream = QuoteStream(source, symbols, stock_info=None if args.no_seed else stock_info, interval=args.interval,
+                         state_store=state_store)
+    started = time.perf_counter()
+    asyncio.run(stream.run())
+    stats = stream.stats.snapshot()
+    print(f"Replayed {stats.get('quotes', 0):.0f} quotes into {stats.get('bars', 0):.0f} bars of "
+          f"{len(symbols)} symbols in {time.perf_counter() - started:.2f}s "
+          f"({stream.nbytes / 1e6:.1f} MB of buffers)")
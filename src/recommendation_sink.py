@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import abc
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+RECOMMENDATIONS_DIR = 'data/recommendations'
+RECOMMENDATIONS_DB = 'data/recommendations.db'
+
+# Stored columns, in order (run_id is added by the sink)
+RECOMMENDATION_COLUMNS = [
+    'run_id', 'timestamp', 'symbol', 'signal', 'price', 'trend', 'momentum', 'volatility',
+    'rsi', 'stop_loss', 'take_profit', 'position_size',
+]
+CATEGORY_COLUMNS = ['signal', 'trend', 'momentum', 'volatility']
+
+def recommendations_frame(run_id: str, recommendations: List[Dict]) -> pd.DataFrame:
+    """Typed DataFrame of one run's recommendations"""
+    df = pd.DataFrame(recommendations, columns=RECOMMENDATION_COLUMNS[1:])
+    df.insert(0, 'run_id', run_id)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    for column in ('price', 'rsi', 'stop_loss', 'take_profit'):
+        df[column] = df[column].astype('float64')
+    df['position_size'] = df['position_size'].astype('int64')
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+class RecommendationSink(abc.ABC):
+    """
+    Destination for the recommendations of every run
+
+    Sinks are append-only: each run is written as one batch and earlier
+    batches are never modified. ``read`` loads stored recommendations back
+    as a DataFrame for review and backtest comparison.
+    """
+
+    @abc.abstractmethod
+    def write(self, run_id: str, recommendations: List[Dict]):
+        """Store the recommendations of one run"""
+
+    @abc.abstractmethod
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Stored recommendations with a timestamp in [start, end], optionally for some symbols"""
+
+    def close(self):
+        """Flush pending writes and release resources"""
+
+class ParquetRecommendationSink(RecommendationSink):
+    """
+    One Parquet file per run, partitioned by date
+
+    Files are written to ``data/recommendations/date=YYYY-MM-DD/`` so reads
+    over a date range only open the partitions in that range.
+    """
+
+    def __init__(self, root: str = RECOMMENDATIONS_DIR):
+        self.root = Path(root)
+
+    def write(self, run_id: str, recommendations: List[Dict]):
+        if not recommendations:
+            return
+        df = recommendations_frame(run_id, recommendations)
+        partition = self.root / f"date={df['timestamp'].iloc[0].strftime('%Y-%m-%d')}"
+        partition.mkdir(parents=True, exist_ok=True)
+        path = partition / f"run-{datetime.now().strftime('%H%M%S')}-{run_id}.parquet"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        first = pd.Timestamp(start).strftime('%Y-%m-%d') if start else None
+        last = pd.Timestamp(end).strftime('%Y-%m-%d') if end else None
+        files = []
+        for partition in sorted(self.root.glob('date=*')):
+            day = partition.name[len('date='):]
+            if (first is None or day >= first) and (last is None or day <= last):
+                files.extend(sorted(partition.glob('*.parquet')))
+        if not files:
+            return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+        filters = [('symbol', 'in', list(symbols))] if symbols else None
+        df = pd.concat([pq.read_table(path, filters=filters).to_pandas() for path in files], ignore_index=True)
+        if start:
+            df = df[df['timestamp'] >= pd.Timestamp(start)]
+        if end:
+            df = df[df['timestamp'] < pd.Timestamp(end) + pd.Timedelta(days=1)]
+        return df.reset_index(drop=True)
+
+class SQLiteRecommendationSink(RecommendationSink):
+    """Recommendations in one SQLite table, indexed by symbol and time"""
+
+    def __init__(self, path: str = RECOMMENDATIONS_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    run_id TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    symbol TEXT NOT NULL,
+                    signal TEXT NOT NULL,
+                    price REAL,
+                    trend TEXT,
+                    momentum TEXT,
+                    volatility TEXT,
+                    rsi REAL,
+                    stop_loss REAL,
+                    take_profit REAL,
+                    position_size INTEGER
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_recommendations_symbol_time ON recommendations (symbol, timestamp)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_recommendations_time ON recommendations (timestamp)"
+            )
+
+    def write(self, run_id: str, recommendations: List[Dict]):
+        rows = [
+            (run_id, rec['timestamp'], rec['symbol'], rec['signal'], float(rec['price']), rec['trend'],
+             rec['momentum'], rec['volatility'], float(rec['rsi']), float(rec['stop_loss']),
+             float(rec['take_profit']), int(rec['position_size']))
+            for rec in recommendations
+        ]
+        placeholders = ', '.join('?' * len(RECOMMENDATION_COLUMNS))
+        with self._lock, self._conn:
+            self._conn.executemany(f"INSERT INTO recommendations VALUES ({placeholders})", rows)
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        clauses, params = [], []
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d %H:%M:%S'))
+        if end:
+            clauses.append("timestamp < ?")
+            params.append((pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'))
+        if symbols:
+            clauses.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT * FROM recommendations{where} ORDER BY timestamp, symbol",
+                                   self._conn, params=params)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class QueuedRecommendationSink(RecommendationSink):
+    """
+    Writes batches to another sink on a background thread
+
+    ``write`` only enqueues the batch, so storage I/O never blocks the
+    analysis; ``close`` (or ``flush``) waits until everything is written.
+    """
+
+    def __init__(self, sink: RecommendationSink):
+        self.sink = sink
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._drain, name='recommendation-sink', daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.sink.write(*item)
+            except Exception as e:
+                logging.error(f"Error writing recommendations of run {item[0]}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def write(self, run_id: str, recommendations: List[Dict]):
+        self._queue.put((run_id, list(recommendations)))
+
+    def flush(self):
+        """Wait until all queued batches are written"""
+        self._queue.join()
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        self.flush()
+        return self.sink.read(start, end, symbols)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.sink.close()
+
+class NullRecommendationSink(RecommendationSink):
+    """Discards every batch (``--sink none``)"""
+
+    def write(self, run_id: str, recommendations: List[Dict]):
+        pass
+
+    def read(self, start: Optional[str] = None, end: Optional[str] = None,
+             symbols: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+SINKS = {
+    'parquet': ParquetRecommendationSink,
+    'sqlite': SQLiteRecommendationSink,
+    'none': NullRecommendationSink,
+}
+
+def create_sink(kind: str = 'parquet', queued: bool = True, **kwargs) -> RecommendationSink:
+    """
+    Create a recommendation sink by name
+
+    Args:
+        kind (str): 'parquet', 'sqlite' or 'none' (discard)
+        queued (bool): Write on a background thread (default: True, ignored for 'none')
+        **kwargs: Passed to the sink (root for Parquet, path for SQLite)
+    """
+    if kind not in SINKS:
+        raise ValueError(f"Invalid recommendation sink: {kind} (expected one of {', '.join(SINKS)})")
+    sink = SINKS[kind](**kwargs)
+    return QueuedRecommendationSink(sink) if queued and kind != 'none' else sink
@@ -0,0 +1,106 @@
+import logging
+import threading
+from datetime import datetime, time
+from typing import Callable, Optional
+
+from .market_calendar import MarketCalendar
+
+DAILY_RUN_TIME = time(15, 30)   # After the close and put-through deals
+INTRADAY_INTERVALS = (1, 5, 15)
+DEFAULT_BAR_CLOSE_DELAY = 5.0   # Seconds after a bar close before running, so the source has the bar
+MAX_SLEEP = 60.0                # Re-check the clock at least this often (survives suspend / clock changes)
+
+class MarketScheduler:
+    """
+    Long-lived scheduler that runs a job on market events
+
+    With ``interval=None`` the job runs once per trading day at 15:30; with
+    an intraday interval (1, 5 or 15 minutes) it runs on every bar close of
+    the trading sessions (MarketCalendar.bar_closes). Weekends and holidays
+    are skipped, and a run is also skipped when no trading happened since the
+    previous one (e.g. a restart in the evening after the daily run).
+
+    The job is a plain callable, so the caller keeps its clients and caches
+    alive between runs instead of rebuilding them.
+    """
+
+    def __init__(self, job: Callable[[], None], interval: Optional[int] = None,
+                 calendar: Optional[MarketCalendar] = None, delay: float = DEFAULT_BAR_CLOSE_DELAY):
+        """
+        Initialize the scheduler
+
+        Args:
+            job (Callable[[], None]): Work to run, e.g. TradingBot.run
+            interval (Optional[int]): Bar interval in minutes (1, 5 or 15), or None for one run per day
+            calendar (Optional[MarketCalendar]): Trading calendar (default: HOSE)
+            delay (float): Seconds to wait after a bar close before running (default: 5)
+        """
+        if interval is not None and interval not in INTRADAY_INTERVALS:
+            raise ValueError(f"Invalid interval: {interval} (expected one of {INTRADAY_INTERVALS} or None)")
+        self.job = job
+        self.interval = interval
+        self.calendar = calendar if calendar is not None else MarketCalendar()
+        self.delay = delay
+        self.last_run: Optional[datetime] = None
+        self._stop = threading.Event()
+
+    def describe(self) -> str:
+        """Human readable schedule"""
+        if self.interval is None:
+            return f"daily at {DAILY_RUN_TIME.strftime('%H:%M')} on trading days"
+        return f"every {self.interval}m bar close during {self.calendar.exchange} sessions"
+
+    def next_trigger(self, after: Optional[datetime] = None) -> datetime:
+        """Next market event the job runs on"""
+        if self.interval is None:
+            return self.calendar.next_time_on_trading_day(DAILY_RUN_TIME, after)
+        return self.calendar.next_bar_close(after, self.interval)
+
+    def should_run(self, now: Optional[datetime] = None) -> bool:
+        """Whether the market traded since the last run"""
+        if self.last_run is None:
+            return True
+        return self.calendar.traded_between(self.last_run, now or self.calendar.now())
+
+    def run_once(self, now: Optional[datetime] = None) -> bool:
+        """
+        Run the job unless nothing changed since the last run
+
+        Returns:
+            bool: Whether the job ran
+        """
+        now = now or self.calendar.now()
+        if not self.should_run(now):
+            logging.info("No trading since the last run, skipping")
+            return False
+        self.last_run = now
+        try:
+            self.job()
+        except Exception as e:
+            logging.error(f"Scheduled run failed: {str(e)}")
+        return True
+
+    def run_forever(self, run_on_start: bool = True):
+        """Run the job on every trigger until stop() is called"""
+        if run_on_start:
+            self.run_once()
+        logging.info(f"Trading bot scheduled to run {self.describe()}")
+        while not self._stop.is_set():
+            trigger = self.next_trigger(self.calendar.now())
+            logging.info(f"Next run at {trigger.strftime('%Y-%m-%d %H:%M')}")
+            if not self._sleep_until(trigger):
+                break
+            self.run_once(trigger)
+
+    def _sleep_until(self, trigger: datetime) -> bool:
+        """Sleep until delay seconds after the trigger; False if stopped"""
+        while True:
+            remaining = (trigger - self.calendar.now()).total_seconds() + self.delay
+            if remaining <= 0:
+                return True
+            if self._stop.wait(min(remaining, MAX_SLEEP)):
+                return False
+
+    def stop(self):
+        """Stop run_forever after the current run"""
+        self._stop.set()
@@ -0,0 +1,189 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .indicators import BarPanel, latest_snapshot
+from .pipeline import fetch_in_order
+from .stock_info import StockInfo
+from .strategy import TradingStrategy, SIGNAL_BUY, SIGNAL_HOLD, SIGNAL_SELL, SIGNAL_NAMES
+
+DEFAULT_TOP_N = 20
+STOCH_CONFIRMATION_BONUS = 0.5  # Added to the score when the stochastic confirms the RSI
+
+class Screener:
+    """
+    Universe-wide screener over any ExchangeInfo.VN_EXCHANGES group
+
+    All members of the group are loaded concurrently through
+    StockInfo.get_historical_data (served from the bar store, topped up from
+    the source), right-aligned into one BarPanel (each symbol on its own bar
+    sequence, like generate_recommendations) and run through a single batched
+    indicator pass. The generate_recommendations BUY/SELL rules are then
+    applied to the latest bar of every symbol at once, and only the top-N
+    candidates per side are expanded into recommendation dicts.
+
+    Candidates are ranked by a score that grows with the strength of the
+    trend (number of agreeing trend votes), how far the RSI is past its
+    threshold, and whether the stochastic confirms the RSI.
+    """
+
+    def __init__(self, stock_info: Optional[StockInfo] = None, strategy: Optional[TradingStrategy] = None):
+        """
+        Initialize the screener
+
+        Args:
+            stock_info (Optional[StockInfo]): Source of listings and bars
+            strategy (Optional[TradingStrategy]): Strategy whose rules and parameters are applied
+        """
+        self.stock_info = stock_info if stock_info is not None else StockInfo()
+        self.strategy = strategy if strategy is not None else TradingStrategy()
+
+    def load_frames(self, symbols: List[str], start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Load the bars of many symbols on the strategy's fetch pool"""
+        fetch = lambda symbol: self.stock_info.get_historical_data(symbol, start_date, end_date)
+        frames = {}
+        for symbol, df in fetch_in_order(fetch, symbols, self.strategy.fetch_workers):
+            if df is not None and not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def screen(self, group: str, top_n: int = DEFAULT_TOP_N, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """
+        Screen every member of a group
+
+        Args:
+            group (str): Group from ExchangeInfo.VN_EXCHANGES, e.g. 'HOSE' or 'VN30'
+            top_n (int): Number of candidates returned per side (default: 20)
+            start_date (Optional[str]): History start (default: strategy.history_start(),
+                long enough for its confirm_timeframe)
+            end_date (Optional[str]): History end (default: today)
+
+        Returns:
+            Dict[str, List[Dict]]: {'BUY': [...], 'SELL': [...]} recommendations in the
+            generate_recommendations format plus a 'score', best first
+        """
+        symbols = list(self.stock_info._load_all_symbols_by_group(group))
+        logging.info(f"Screening {len(symbols)} symbols of {group}...")
+        frames = self.load_frames(symbols, start_date or self.strategy.history_start(), end_date)
+        logging.info(f"Loaded bars for {len(frames)} of {len(symbols)} symbols")
+        return self.screen_frames(frames, top_n)
+
+    def screen_frames(self, frames: Dict[str, pd.DataFrame], top_n: int = DEFAULT_TOP_N) -> Dict[str, List[Dict]]:
+        """
+        Screen already loaded bars
+
+        Symbols without a bar on the latest date of all symbols (suspended or
+        delisted) and symbols with fewer than two bars are skipped. Missing
+        bars inside a symbol's history are not filled, so its signal is the one
+        generate_recommendations would give it, including the confirm_timeframe
+        filter when the strategy has one.
+        """
+        candidates = {SIGNAL_NAMES[SIGNAL_BUY]: [], SIGNAL_NAMES[SIGNAL_SELL]: []}
+        if not frames:
+            return candidates
+
+        panel = BarPanel.from_sequences(frames, fields=('high', 'low', 'close'))
+        indicators = self.strategy.compute_indicators(panel['close'], panel['high'], panel['low'])
+        latest = latest_snapshot(indicators)
+        prev = latest_snapshot(indicators, offset=1)
+
+        last_times = panel.last_times()
+        current = last_times == last_times.max()
+        eligible = current & ~np.isnan(prev['close'])
+        signals = self.strategy.generate_signal_panel(latest)
+        if self.strategy.confirm_timeframe:
+            self._confirm_higher_timeframe(panel, signals, eligible)
+        scores = self.score(latest, signals)
+        stop_loss, _ = self.strategy.risk_levels(latest)
+        position_sizes = StockInfo.calculate_position_sizes(
+            latest['close'], stop_loss,
+            self.strategy.params['risk_per_trade'],
+            self.strategy.params['max_position_size']
+        )
+
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for code in (SIGNAL_BUY, SIGNAL_SELL):
+            rows = np.flatnonzero(eligible & (signals == code))
+            rows = rows[np.argsort(-scores[rows], kind='stable')][:top_n]
+            for row in rows:
+                latest_row = {name: values[row] for name, values in latest.items()}
+                prev_row = {name: values[row] for name, values in prev.items()}
+                trend = self.strategy._build_trend(latest_row, prev_row, latest_row['atr'])
+                candidates[SIGNAL_NAMES[code]].append({
+                    'symbol': panel.symbols[row],
+                    'signal': SIGNAL_NAMES[code],
+                    'score': float(scores[row]),
+                    'price': trend['price'],
+                    'trend': trend['trend'],
+                    'momentum': trend['momentum'],
+                    'volatility': trend['volatility'],
+                    'rsi': trend['rsi'],
+                    'stop_loss': trend['stop_loss'],
+                    'take_profit': trend['take_profit'],
+                    'position_size': int(position_sizes[row]),
+                    'timestamp': timestamp
+                })
+        return candidates
+
+    def _confirm_higher_timeframe(self, panel: BarPanel, signals: np.ndarray, rows: np.ndarray):
+        """
+        Turn BUY/SELL signals against the higher timeframe trend into HOLD, in place
+
+        The panel rows are right-aligned sequences with their own times, so
+        higher_timeframe_votes runs on each signalled row's own bars and only
+        its latest vote is used.
+        """
+        close = panel['close']
+        for row in np.flatnonzero(rows & (signals != SIGNAL_HOLD)):
+            bars = ~np.isnan(close[row])
+            higher = self.strategy.higher_timeframe_votes(
+                panel.times[row, bars], close[row, bars], self.strategy.confirm_timeframe
+            )[0, -1]
+            if (signals[row] == SIGNAL_BUY and higher < 0) or (signals[row] == SIGNAL_SELL and higher > 0):
+                signals[row] = SIGNAL_HOLD
+
+    def score(self, latest: Dict[str, np.ndarray], signals: np.ndarray) -> np.ndarray:
+        """
+        Rank score of every symbol for its signal (0 for HOLD)
+
+        score = trend strength (agreeing votes / 3)
+              + RSI distance past the threshold, relative to the room beyond it
+              + STOCH_CONFIRMATION_BONUS if the stochastic is past its threshold too
+        """
+        params = self.strategy.params
+        votes = self.strategy.trend_votes(latest) / 3
+        rsi, stoch_k = latest['rsi'], latest['stoch_k']
+        with np.errstate(invalid='ignore'):
+            buy_score = (
+                votes
+                + (params['rsi_oversold'] - rsi) / params['rsi_oversold']
+                + STOCH_CONFIRMATION_BONUS * (stoch_k < params['stoch_oversold'])
+            )
+            sell_score = (
+                -votes
+                + (rsi - params['rsi_overbought']) / (100 - params['rsi_overbought'])
+                + STOCH_CONFIRMATION_BONUS * (stoch_k > params['stoch_overbought'])
+            )
+        return np.select([signals == SIGNAL_BUY, signals == SIGNAL_SELL], [buy_score, sell_score], 0.0)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Screen an exchange group for BUY/SELL candidates')
+    parser.add_argument('group', help='group from ExchangeInfo.VN_EXCHANGES, e.g. HOSE or VN30')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_N, help='candidates per side (default: 20)')
+    args = parser.parse_args()
+
+    from .log_config import configure_logging
+    configure_logging(log_file=None)
+    results = Screener().screen(args.group, args.top)
+    for side, recommendations in results.items():
+        print(f"\n{side} candidates:")
+        for rec in recommendations:
+            print(f"  {rec['symbol']:<6} score {rec['score']:.2f}  price {rec['price']:.2f}  "
+                  f"RSI {rec['rsi']:.1f}  {rec['trend']}, {rec['momentum']}, {rec['volatility']} volatility")
@@ -1,100 +1,259 @@
-import pandas as pd
-from vnstock import Vnstock
+from __future__ import annotations
+
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
-import json
 import os
 from pathlib import Path
+from .lazy import lazy_import
 from .exchange_info import ExchangeInfo
+from .bar_store import BarStore
+from .listing_cache import ListingCache
+from .pipeline import RateLimiter
+from .data_client import DataClient, DATA_SERVER_URL_ENV
+from .instrumentation import Counters
+from .timeframes import MultiTimeframeBars, DAILY_BASE, base_interval
+from .watchlist import WatchlistStore, DEFAULT_WATCHLIST
+from .market_calendar import MarketCalendar, VN_TZ
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
 
 # Load environment variables
 load_dotenv()
 
 EXCHANGE_VCI = 'VCI'
-FAVORITE_SYMBOLS_FILE = 'data/favorite_symbols.json'
-DEFAULT_FAVORITE_SYMBOLS = ['VCI', 'VNM', 'FPT', 'VHM', 'VIB']
+DEFAULT_ACCOUNT_BALANCE = 100000000  # 100M VND
+INTRADAY_BAR_STORE_DIR = 'data/bars/1m'
+DEFAULT_HISTORY_DAYS = 365
+DEFAULT_INTRADAY_HISTORY_DAYS = 30  # Default range of intraday requests (1-minute history is short)
 
 class StockInfo(ExchangeInfo):
-    def __init__(self):
-        """Initialize the stock information handler"""
-        super().__init__()
-        self.symbols = self._load_symbols()
+    def __init__(self, bar_store: Optional[BarStore] = None, requests_per_second: Optional[float] = None,
+                 listing_cache: Optional[ListingCache] = None, data_server_url: Optional[str] = None,
+                 intraday_store: Optional[BarStore] = None, watchlists: Optional[WatchlistStore] = None,
+                 watchlist: str = DEFAULT_WATCHLIST):
+        """
+        Initialize the stock information handler
+
+        Args:
+            bar_store (Optional[BarStore]): Local bar cache used by get_historical_data (default: data/bars)
+            requests_per_second (Optional[float]): Maximum request rate per data source (default: unlimited)
+            listing_cache (Optional[ListingCache]): Cache for listings and group memberships (default: data/listings)
+            data_server_url (Optional[str]): Fetch bars and listings from a running data server instead
+                of Vnstock (default: the DATA_SERVER_URL environment variable; '' forces local mode)
+            intraday_store (Optional[BarStore]): Local cache of 1-minute bars (default: data/bars/1m)
+            watchlists (Optional[WatchlistStore]): Named watchlists shared with other processes
+                (default: data/watchlists.db)
+            watchlist (str): Watchlist used as the favorites and the symbols to analyze (default: favorites)
+        """
+        super().__init__(listing_cache)
+        if data_server_url is None:
+            data_server_url = os.getenv(DATA_SERVER_URL_ENV)
+        self.data_client = DataClient(data_server_url) if data_server_url else None
         self._ensure_data_directory()
+        self.watchlists = watchlists if watchlists is not None else WatchlistStore()
+        self.watchlist = watchlist
+        self.bar_store = bar_store if bar_store is not None else BarStore()
+        self._intraday_store = intraday_store
+        self.timeframes = MultiTimeframeBars(self)
+        self.calendar = MarketCalendar()
+        self.rate_limiters: Dict[str, RateLimiter] = {
+            EXCHANGE_VCI: RateLimiter(requests_per_second)
+        }
+        # bar_cache_hits / bar_cache_misses (stored bars or not), requests, rows_fetched,
+        # bytes_fetched (in-memory size of the downloaded frames) and fetch_errors
+        self.stats = Counters()
 
     def _ensure_data_directory(self):
         """Ensure the data directory exists"""
         data_dir = Path('data')
         data_dir.mkdir(exist_ok=True)
-        if not os.path.exists(FAVORITE_SYMBOLS_FILE):
-            self._save_favorite_symbols(DEFAULT_FAVORITE_SYMBOLS)
-
-    def _load_favorite_symbols(self) -> List[str]:
-        """Load favorite symbols from file"""
-        try:
-            with open(FAVORITE_SYMBOLS_FILE, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
-    def _save_favorite_symbols(self, symbols: List[str]):
-        """Save favorite symbols to file"""
-        try:
-            with open(FAVORITE_SYMBOLS_FILE, 'w') as f:
-                json.dump(symbols, f, indent=4)
-        except Exception as e:
-            logging.error(f"Error saving favorite symbols: {str(e)}")
 
     def add_favorite_symbol(self, symbol: str) -> bool:
-        """Add a symbol to favorites"""
-        try:
-            symbols = self._load_favorite_symbols()
-            if symbol not in symbols:
-                symbols.append(symbol)
-                self._save_favorite_symbols(symbols)
-                self.symbols = symbols  # Update the current symbols list
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error adding favorite symbol: {str(e)}")
-            return False
+        """Add a symbol to the current watchlist"""
+        return self.watchlists.add(symbol, self.watchlist)
 
     def remove_favorite_symbol(self, symbol: str) -> bool:
-        """Remove a symbol from favorites"""
-        try:
-            symbols = self._load_favorite_symbols()
-            if symbol in symbols:
-                symbols.remove(symbol)
-                self._save_favorite_symbols(symbols)
-                self.symbols = symbols  # Update the current symbols list
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error removing favorite symbol: {str(e)}")
-            return False
+        """Remove a symbol from the current watchlist"""
+        return self.watchlists.remove(symbol, self.watchlist)
+
+    def is_favorite_symbol(self, symbol: str) -> bool:
+        """Whether the current watchlist holds a symbol"""
+        return self.watchlists.contains(symbol, self.watchlist)
 
     def get_favorite_symbols(self) -> List[str]:
-        """Get current list of favorite symbols"""
-        return self._load_favorite_symbols()
+        """Get the symbols of the current watchlist"""
+        return self.watchlists.symbols(self.watchlist)
 
-    def _load_symbols(self) -> List[str]:
-        """Load list of symbols to analyze from favorites"""
-        return self._load_favorite_symbols()
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols to analyze: the current watchlist, including changes made by other processes"""
+        return self.watchlists.symbols(self.watchlist)
+
+    @property
+    def is_remote(self) -> bool:
+        """Whether bars and listings come from a data server"""
+        return self.data_client is not None
+
+    def _fetch_symbols_by_group(self, group: str) -> pd.Series:
+        if self.is_remote:
+            return self.data_client.get_symbols_by_group(group)['symbol']
+        return super()._fetch_symbols_by_group(group)
+
+    def _fetch_symbols_by_exchange(self) -> pd.DataFrame:
+        if self.is_remote:
+            return self.data_client.get_symbols_by_exchange()
+        return super()._fetch_symbols_by_exchange()
     
-    def get_historical_data(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[pd.DataFrame]:
-        """Fetch historical data for a symbol"""
+    @property
+    def intraday_store(self) -> BarStore:
+        """Local cache of 1-minute bars, created on first use"""
+        if self._intraday_store is None:
+            self._intraday_store = BarStore(INTRADAY_BAR_STORE_DIR)
+        return self._intraday_store
+
+    def get_historical_data(self, symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                            interval: str = DAILY_BASE) -> Optional[pd.DataFrame]:
+        """
+        Fetch historical data for a symbol
+
+        Bars are served from the local bar store first. Only the date ranges
+        that are not stored yet are requested from Vnstock and appended to the
+        store. The last stored session is refreshed until the store holds the
+        last closed session and was written after that close. In remote mode
+        the data server does this on behalf of all its clients.
+
+        Only 1-minute and daily bars are downloaded and stored; every other
+        interval is resampled from them by ``self.timeframes``.
+
+        Args:
+            symbol (str): Trading symbol
+            start_date (Optional[str]): First date (default: one year ago, 30 days for intraday intervals)
+            end_date (Optional[str]): Last date, inclusive (default: today)
+            interval (str): One of timeframes.TIMEFRAMES: '1m', '5m', '15m', '30m', '1H', '1D', '1W', '1M'
+        """
         try:
+            base = base_interval(interval)
             if start_date is None:
-                start_date = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
+                days = DEFAULT_HISTORY_DAYS if base == DAILY_BASE else DEFAULT_INTRADAY_HISTORY_DAYS
+                start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
             if end_date is None:
                 end_date = datetime.now().strftime('%Y-%m-%d')
-                
+            if self.is_remote and interval == DAILY_BASE:
+                return self.data_client.get_bars(symbol, start_date, end_date)
+            start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+            if interval != base:
+                return self.timeframes.get_bars(symbol, interval, start, end)
+            df = self.load_base_bars(symbol, base, start, end)
+            if df is None:
+                return None
+            return self.slice_bars(df, start, end)
+        except Exception as e:
+            logging.error(f"Error fetching data for {symbol}: {str(e)}")
+            return None
+
+    def load_base_bars(self, symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """
+        Stored bars of a base interval ('1m' or '1D') after topping up [start, end]
+
+        Locally all stored bars are returned, so resampled series stay
+        cacheable across requests; in remote mode only [start, end].
+        """
+        if self.is_remote:
+            return self.data_client.get_bars(symbol, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), interval)
+        store = self.bar_store if interval == DAILY_BASE else self.intraday_store
+        with store.lock(symbol):
+            return self._top_up_bars(symbol, start, end, store, interval)
+
+    @staticmethod
+    def slice_bars(df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Select the bars from start up to and including the end date"""
+        mask = (df['time'] >= start) & (df['time'] < end + timedelta(days=1))
+        return df.loc[mask].reset_index(drop=True)
+
+    def _top_up_bars(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, store: Optional[BarStore] = None,
+                     interval: str = DAILY_BASE) -> Optional[pd.DataFrame]:
+        """Fetch the missing ranges for a symbol into the bar store and return all stored bars"""
+        store = store if store is not None else self.bar_store
+        coverage = store.coverage(symbol)
+        self.stats.add('bar_cache_misses' if coverage is None else 'bar_cache_hits')
+        if coverage is None:
+            df = self._fetch_history(symbol, start, end, interval=interval)
+            if df is None or df.empty:
+                return df
+            return store.append(symbol, df, coverage_start=start)
+
+        first, last = coverage
+        new_frames = []
+        coverage_start = None
+        if start < first.normalize():
+            head = self._fetch_history(symbol, start, first.normalize() - timedelta(days=1),
+                                       required=False, interval=interval)
+            if head is not None:
+                # Only a successful request (possibly empty) extends the coverage;
+                # after an error the range is requested again next time
+                coverage_start = start
+                new_frames.append(head)
+        tail = None
+        if end >= last.normalize() and not self._tail_is_final(store, symbol, last, end):
+            tail = self._fetch_history(symbol, last.normalize(), end, required=False, interval=interval)
+            new_frames.append(tail)
+
+        new_frames = [frame for frame in new_frames if frame is not None and not frame.empty]
+        if not new_frames:
+            if coverage_start is not None:
+                # Nothing listed before the stored range; remember that it was asked for
+                df = store.append(symbol, None, coverage_start=coverage_start)
+            else:
+                df = store.read(symbol)
+        else:
+            df = store.append(symbol, pd.concat(new_frames, ignore_index=True), coverage_start=coverage_start)
+        if tail is not None:
+            store.touch(symbol)
+        return df
+
+    def _tail_is_final(self, store: BarStore, symbol: str, last: pd.Timestamp, end: pd.Timestamp) -> bool:
+        """
+        Whether the stored bars already hold every closed session up to end
+
+        True when the last stored bar is on or after the last closed trading
+        day (up to end) and nothing has traded since the bars were written,
+        so a partial bar saved during a session is still refreshed.
+        """
+        until = min(self.calendar.now(), datetime.combine(end.date() + timedelta(days=1), time(0), VN_TZ))
+        closed = self.calendar.last_closed_day(until)
+        if closed is None or last.date() < closed:
+            return False
+        written = store.modified(symbol)
+        return written is not None and not self.calendar.traded_between(written, until)
+
+    def _fetch_history(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp, required: bool = True,
+                       interval: str = DAILY_BASE) -> Optional[pd.DataFrame]:
+        """
+        Download bars for a symbol from Vnstock
+
+        Args:
+            required (bool): Re-raise errors instead of logging them; top-up requests
+                are optional since the stored bars can still be served
+            interval (str): Vnstock interval, '1D' or '1m'
+        """
+        try:
+            self.rate_limiters[EXCHANGE_VCI].wait()
             stock = self.vnstock.stock(symbol=symbol, source=EXCHANGE_VCI)
-            df = stock.quote.history(start=start_date, end=end_date)
+            df = stock.quote.history(start=start.strftime('%Y-%m-%d'), end=end.strftime('%Y-%m-%d'), interval=interval)
+            self.stats.add('requests')
+            if df is not None:
+                self.stats.add('rows_fetched', len(df))
+                self.stats.add('bytes_fetched', int(df.memory_usage(index=True).sum()))
             return df
         except Exception as e:
-            logging.error(f"Error fetching data for {symbol}: {str(e)}")
+            self.stats.add('fetch_errors')
+            if required:
+                raise
+            logging.warning(f"Could not top up bars for {symbol}, serving stored data: {str(e)}")
             return None
 
     def calculate_position_size(self, symbol: str, price: float, stop_loss: float, risk_per_trade: float = 0.02, max_position_size: float = 0.1) -> int:
@@ -113,7 +272,7 @@ class StockInfo(ExchangeInfo):
         """
         try:
             # Get account balance (simulated for now)
-            account_balance = 100000000  # 100M VND
+            account_balance = DEFAULT_ACCOUNT_BALANCE
             
             # Calculate risk amount
             risk_amount = account_balance * risk_per_trade
@@ -131,6 +290,27 @@ class StockInfo(ExchangeInfo):
             logging.error(f"Error calculating position size for {symbol}: {str(e)}")
             return 0 
 
+    @staticmethod
+    def calculate_position_sizes(prices: np.ndarray, stop_losses: np.ndarray, risk_per_trade: float = 0.02,
+                                 max_position_size: float = 0.1, account_balance: float = DEFAULT_ACCOUNT_BALANCE) -> np.ndarray:
+        """
+        Vectorized calculate_position_size for many prices at once
+
+        Entries where calculate_position_size would fail (zero price risk,
+        missing prices) get a size of 0.
+
+        Returns:
+            np.ndarray: int64 number of shares per entry
+        """
+        prices = np.asarray(prices, dtype=float)
+        stop_losses = np.asarray(stop_losses, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            by_risk = np.floor(account_balance * risk_per_trade / np.abs(prices - stop_losses))
+            max_shares = np.floor(account_balance * max_position_size / prices)
+            sizes = np.minimum(by_risk, max_shares)
+        sizes[~np.isfinite(sizes) | (sizes < 0)] = 0
+        return sizes.astype(np.int64)
+
 if __name__ == "__main__":
     stock_info = StockInfo()
     print(stock_info._load_all_symbols_by_exchanges())
\ No newline at end of file
@@ -1,6 +1,11 @@
 from .stock_info import StockInfo
+from .watchlist import DEFAULT_WATCHLIST
+from .lazy import lazy_import
 import sys
-import pandas as pd
+
+np = lazy_import('numpy')
+
+PAGE_SIZE = 40
 
 class StockUI:
     def __init__(self):
@@ -10,67 +15,108 @@ class StockUI:
     def display_menu(self):
         """Display the main menu"""
         print("\n=== Stock Symbol Manager ===")
-        print("1. View Favorite Symbols")
+        print(f"1. View Favorite Symbols ({self.stock_info.watchlist})")
         print("2. View All Available Symbols")
         print("3. View Available Groups")
         print("4. View Symbols in Group")
         print("5. Add Symbol")
         print("6. Remove Symbol")
-        print("7. Exit")
+        print("7. Search Symbols")
+        print("8. Manage Watchlists")
+        print("9. Exit")
         print("===========================")
 
     def view_symbols(self):
         """Display current favorite symbols"""
         symbols = self.stock_info.get_favorite_symbols()
         if not symbols:
-            print("\nNo favorite symbols found.")
+            print(f"\nNo symbols in watchlist '{self.stock_info.watchlist}'.")
             return
 
-        print("\nCurrent Favorite Symbols:")
+        print(f"\nCurrent Favorite Symbols ({self.stock_info.watchlist}):")
         for i, symbol in enumerate(symbols, 1):
             print(f"{i}. {symbol}")
 
+    def _format_symbol_row(self, master, symbol_id: int) -> str:
+        info = master.info(symbol_id)
+        return (f"{master.symbol_of(symbol_id):<8} {info['exchange'] or '':<7} {info['type'] or '':<10} "
+                f"{info['organ_short_name']}")
+
+    def _browse(self, rows, title: str, header: str):
+        """
+        Page through rows (a list of already formatted lines, or of symbol IDs)
+
+        Each page is written with a single print call, so even the full
+        listing only ever puts PAGE_SIZE lines on the terminal at a time.
+        """
+        master = self.stock_info.get_symbol_master()
+        pages = max(1, -(-len(rows) // PAGE_SIZE))
+        page = 0
+        while True:
+            chunk = rows[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+            lines = [f"\n=== {title} (page {page + 1}/{pages}, {len(rows)} symbols) ===", header, "-" * 60]
+            lines.extend(row if isinstance(row, str) else self._format_symbol_row(master, row) for row in chunk)
+            print("\n".join(lines))
+            if pages == 1:
+                return
+            choice = input("\n[n]ext, [p]revious, page number, or Enter to return: ").strip().lower()
+            if choice == 'n':
+                page = min(page + 1, pages - 1)
+            elif choice == 'p':
+                page = max(page - 1, 0)
+            elif choice.isdigit() and 1 <= int(choice) <= pages:
+                page = int(choice) - 1
+            elif not choice:
+                return
+
     def view_all_symbols(self):
-        """Display all available symbols"""
+        """Display all available symbols, by exchange, one page at a time"""
         try:
             print("\nFetching all available symbols...")
-            all_symbols_df = self.stock_info._load_all_symbols_by_exchanges()
-            
-            if all_symbols_df.empty:
+            master = self.stock_info.get_symbol_master()
+            if len(master) == 0:
                 print("No symbols found.")
                 return
 
-            # Group symbols by exchange
-            symbols_by_exchange = {}
-            for _, row in all_symbols_df.iterrows():
-                exchange = row['exchange']
-                if exchange not in symbols_by_exchange:
-                    symbols_by_exchange[exchange] = []
-                symbols_by_exchange[exchange].append({
-                    'symbol': row['symbol'],
-                    'type': row['type'],
-                    'name': row['organ_short_name']
-                })
-
-            # Display symbols grouped by exchange
-            for exchange in self.stock_info.VN_EXCHANGES:
-                if exchange in symbols_by_exchange:
-                    symbols = symbols_by_exchange[exchange]
-                    print(f"\n=== {exchange} Exchange ({len(symbols)} symbols) ===")
-                    # Sort symbols alphabetically
-                    symbols.sort(key=lambda x: x['symbol'])
-                    
-                    # Display symbols in a formatted table
-                    print(f"{'Symbol':<8} {'Type':<10} {'Company Name'}")
-                    print("-" * 60)
-                    for symbol_info in symbols:
-                        print(f"{symbol_info['symbol']:<8} {symbol_info['type']:<10} {symbol_info['name']}")
-            
-            print(f"\nTotal symbols: {len(all_symbols_df)}")
-            
+            # Exchanges in the VN_EXCHANGES order, symbols alphabetically within each
+            # (the extra last rank is picked up by code -1, symbols without an exchange)
+            rank = np.array([
+                self.stock_info.VN_EXCHANGES.index(exchange) if exchange in self.stock_info.VN_EXCHANGES
+                else len(self.stock_info.VN_EXCHANGES) for exchange in master.exchanges
+            ] + [len(self.stock_info.VN_EXCHANGES)])
+            ids = np.arange(len(master))
+            counts = np.bincount(master.exchange_codes[master.exchange_codes >= 0], minlength=len(master.exchanges))
+            print("\n".join(f"{master.exchanges[code]}: {counts[code]} symbols" for code in np.argsort(rank[:-1], kind='stable')))
+            print(f"Total symbols: {len(master)}")
+
+            exchange = input("\nFilter by exchange (Enter for all): ").strip().upper()
+            if exchange:
+                ids = np.flatnonzero(master.exchange_mask(exchange))
+                if ids.size == 0:
+                    print(f"No symbols found on {exchange}.")
+                    return
+            ids = ids[np.argsort(rank[master.exchange_codes[ids]], kind='stable')]
+            self._browse(ids.tolist(), f"{exchange or 'All'} Symbols", f"{'Symbol':<8} {'Exch':<7} {'Type':<10} {'Company Name'}")
+
         except Exception as e:
             print(f"\nError fetching symbols: {str(e)}")
 
+    def search_symbols(self):
+        """Search symbols by symbol or company name"""
+        query = input("\nSearch (symbol or company name): ").strip()
+        if not query:
+            print("Search text cannot be empty.")
+            return
+        try:
+            ids = self.stock_info.get_search_index().search(query, limit=None)
+        except Exception as e:
+            print(f"\nError searching symbols: {str(e)}")
+            return
+        if not ids:
+            print(f"No symbols match '{query}'.")
+            return
+        self._browse(ids, f"Results for '{query}'", f"{'Symbol':<8} {'Exch':<7} {'Type':<10} {'Company Name'}")
+
     def view_available_groups(self):
         """Display all available groups"""
         try:
@@ -105,28 +151,56 @@ class StockUI:
                 return
 
             # Display symbols in a formatted table
-            print(f"\n=== Symbols in {group} Group ===")
-            print(f"{'Symbol':<8} {'Type':<10} {'Organization':<30}")
-            print("-" * 50)
-            for symbol_info in symbols_data:
-                print(f"{symbol_info['symbol']:<8} {symbol_info['type']:<10} {symbol_info['organ_short_name']:<30}")
-        
-            print(f"\nTotal symbols in {group}: {len(symbols_data)}")
+            rows = [f"{symbol_info['symbol']:<8} {symbol_info['type']:<10} {symbol_info['organ_short_name']:<30}"
+                    for symbol_info in symbols_data]
+            self._browse(rows, f"Symbols in {group} Group", f"{'Symbol':<8} {'Type':<10} {'Organization':<30}")
             
         except Exception as e:
             print(f"\nError fetching symbols: {str(e)}")
 
+    def _input_symbol(self, prompt: str, index) -> str:
+        """Read a symbol with Tab completion of listed symbols where readline is available"""
+        try:
+            import readline
+        except ImportError:
+            return input(prompt)
+
+        def complete(text, state):
+            matches = index.complete(text) if index is not None else []
+            return matches[state] if state < len(matches) else None
+
+        previous = readline.get_completer()
+        readline.set_completer(complete)
+        readline.parse_and_bind('tab: complete')
+        try:
+            return input(prompt)
+        finally:
+            readline.set_completer(previous)
+
     def add_symbol(self):
-        """Add a new symbol to favorites"""
-        symbol = input("\nEnter symbol to add: ").strip().upper()
+        """Add a new symbol to favorites, checking that it is listed"""
+        try:
+            index = self.stock_info.get_search_index()
+        except Exception as e:
+            print(f"\nCould not load the listing to check symbols: {str(e)}")
+            index = None
+
+        symbol = self._input_symbol("\nEnter symbol to add (Tab completes): ", index).strip().upper()
         if not symbol:
             print("Symbol cannot be empty.")
             return
 
+        if index is not None and not index.is_listed(symbol):
+            suggestions = index.suggest(symbol)
+            print(f"Symbol {symbol} is not listed.")
+            if suggestions:
+                print(f"Did you mean: {', '.join(suggestions)}?")
+            return
+
         if self.stock_info.add_favorite_symbol(symbol):
-            print(f"Successfully added {symbol} to favorites.")
+            print(f"Successfully added {symbol} to {self.stock_info.watchlist}.")
         else:
-            print(f"Symbol {symbol} is already in favorites or could not be added.")
+            print(f"Symbol {symbol} is already in {self.stock_info.watchlist} or could not be added.")
 
     def remove_symbol(self):
         """Remove a symbol from favorites"""
@@ -137,15 +211,45 @@ class StockUI:
             return
 
         if self.stock_info.remove_favorite_symbol(symbol):
-            print(f"Successfully removed {symbol} from favorites.")
+            print(f"Successfully removed {symbol} from {self.stock_info.watchlist}.")
+        else:
+            print(f"Symbol {symbol} was not found in {self.stock_info.watchlist}.")
+
+    def manage_watchlists(self):
+        """List the watchlists, switch to or create one, or delete one"""
+        watchlists = self.stock_info.watchlists
+        print("\nWatchlists:")
+        for name in watchlists.names():
+            marker = '*' if name == self.stock_info.watchlist else ' '
+            print(f"{marker} {name:<20} {len(watchlists.symbols(name))} symbols")
+
+        action = input("\n(s)witch or create, (d)elete, Enter to go back: ").strip().lower()
+        if action not in ('s', 'd'):
+            return
+        name = input("Watchlist name: ").strip()
+        if not name:
+            print("Watchlist name cannot be empty.")
+            return
+
+        if action == 's':
+            if watchlists.create(name):
+                print(f"Created watchlist {name}.")
+            self.stock_info.watchlist = name
+            print(f"Favorites now use watchlist {name}.")
+        elif name == self.stock_info.watchlist:
+            print("Switch to another watchlist before deleting this one.")
+        elif name == DEFAULT_WATCHLIST:
+            print(f"The {DEFAULT_WATCHLIST} watchlist is used by the scheduled bot and cannot be deleted.")
+        elif watchlists.delete(name):
+            print(f"Deleted watchlist {name}.")
         else:
-            print(f"Symbol {symbol} was not found in favorites.")
+            print(f"Watchlist {name} was not found.")
 
     def run(self):
         """Run the UI loop"""
         while self.running:
             self.display_menu()
-            choice = input("\nEnter your choice (1-7): ").strip()
+            choice = input("\nEnter your choice (1-9): ").strip()
 
             if choice == '1':
                 self.view_symbols()
@@ -160,6 +264,10 @@ class StockUI:
             elif choice == '6':
                 self.remove_symbol()
             elif choice == '7':
+                self.search_symbols()
+            elif choice == '8':
+                self.manage_watchlists()
+            elif choice == '9':
                 print("\nGoodbye!")
                 self.running = False
             else:
@@ -1,52 +1,312 @@
 import pandas as pd
 import numpy as np
-from ta.trend import SMAIndicator, EMAIndicator, MACD
-from ta.momentum import RSIIndicator, StochasticOscillator
-from ta.volatility import BollingerBands
+import hashlib
 import logging
-from typing import Dict, Optional, List
-from datetime import datetime
+import threading
+from typing import Dict, Optional, List, Tuple
+from datetime import datetime, timedelta
+from .pipeline import fetch_in_order, DEFAULT_FETCH_WORKERS
+from .indicators import BarPanel, INDICATOR_COLUMNS, compute_indicators, ewm_mean, latest_snapshot
+from .instrumentation import Counters, RunMetrics
+from .timeframes import bucket_starts, resample_bars
+
+# Signal codes used by the vectorized signal panel
+SIGNAL_SELL = -1
+SIGNAL_HOLD = 0
+SIGNAL_BUY = 1
+SIGNAL_NAMES = {SIGNAL_SELL: 'SELL', SIGNAL_HOLD: 'HOLD', SIGNAL_BUY: 'BUY'}
+
+# Tunable strategy parameters and their defaults
+DEFAULT_STRATEGY_PARAMS = {
+    'sma_fast': 20,              # Fast SMA window (reported as sma_20)
+    'sma_slow': 50,              # Slow SMA window (reported as sma_50)
+    'ema_window': 20,            # EMA window (reported as ema_20)
+    'rsi_overbought': 70,
+    'rsi_oversold': 30,
+    'stoch_overbought': 80,
+    'stoch_oversold': 20,
+    'bb_width_high': 0.05,       # Bollinger bandwidth above which volatility is High
+    'bb_width_medium': 0.03,     # Bollinger bandwidth above which volatility is Medium
+    'stop_loss_atr': 2.0,        # Stop loss distance in ATRs
+    'take_profit_atr': 4.0,      # Take profit distance in ATRs
+    'risk_per_trade': 0.02,      # Maximum risk per trade as a percentage of capital
+    'max_position_size': 0.1,    # Maximum position size as a percentage of capital
+}
+
+# Calendar days per bar of the confirm timeframes, to size the daily history they are resampled from
+TIMEFRAME_CALENDAR_DAYS = {'1W': 7, '1M': 31}
+HIGHER_TIMEFRAME_SPARE_BARS = 4  # Extra higher timeframe bars for weeks without a session and the open bar
+
+FINGERPRINT_TAIL_ROWS = 10  # Trailing bars hashed into the input fingerprint (a partial session changes these)
+FINGERPRINT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def bars_fingerprint(df: pd.DataFrame, tail: int = FINGERPRINT_TAIL_ROWS) -> Tuple:
+    """
+    Cheap identity of a bar history: row count, first and last time, and a hash of the last bars
+
+    Two histories with the same fingerprint give the same analysis: new
+    bars change the count or the last time, a revised last session changes
+    the hashed tail, and a moved start date changes the first time.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for column in FINGERPRINT_COLUMNS:
+        digest.update(np.ascontiguousarray(df[column].to_numpy(dtype=float)[-tail:]).tobytes())
+    times = df['time'].to_numpy()
+    return len(df), times[0], times[-1], digest.digest()
 
 class TradingStrategy:
-    def __init__(self):
-        """Initialize the trading strategy"""
+    def __init__(self, fetch_workers: int = DEFAULT_FETCH_WORKERS, params: Optional[Dict] = None,
+                 confirm_timeframe: Optional[str] = None, memoize: bool = True):
+        """
+        Initialize the trading strategy
+
+        Args:
+            fetch_workers (int): Number of symbols downloaded concurrently (default: 8)
+            params (Optional[Dict]): Overrides for DEFAULT_STRATEGY_PARAMS
+            confirm_timeframe (Optional[str]): Higher timeframe ('1W' or '1M') whose trend must
+                agree with a BUY or SELL; resampled from the daily bars (default: no confirmation)
+            memoize (bool): Reuse the last analysis of a symbol while its bars_fingerprint and
+                the parameters are unchanged (default: True)
+        """
         self.positions: Dict[str, Dict] = {}
         self.performance_metrics: Dict[str, Dict] = {}
+        self.fetch_workers = fetch_workers
+        self.params = self._resolve_params(params)
+        self.confirm_timeframe = confirm_timeframe
+        self.memoize = memoize
+        # symbol -> (input fingerprint, trend analysis); one entry per symbol, so bounded by the universe
+        self._trend_memo: Dict[str, Tuple[Tuple, Dict]] = {}
+        self._memo_lock = threading.Lock()
+        self.stats = Counters()  # memo_hits, memo_misses
+
+    @staticmethod
+    def _resolve_params(params: Optional[Dict]) -> Dict:
+        """Merge parameter overrides into the defaults, rejecting unknown names"""
+        params = params or {}
+        unknown = set(params) - set(DEFAULT_STRATEGY_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown strategy parameters: {', '.join(sorted(unknown))}")
+        return {**DEFAULT_STRATEGY_PARAMS, **params}
+
+    def compute_indicators(self, close: np.ndarray, high: np.ndarray, low: np.ndarray) -> Dict[str, np.ndarray]:
+        """Run the indicator engine with this strategy's windows"""
+        return compute_indicators(
+            close, high, low,
+            sma_fast=self.params['sma_fast'],
+            sma_slow=self.params['sma_slow'],
+            ema_window=self.params['ema_window']
+        )
         
-    def analyze_trend(self, df: pd.DataFrame) -> Optional[Dict]:
-        """Analyze trend using multiple technical indicators"""
+    def analyze_trend(self, df: pd.DataFrame, symbol: Optional[str] = None) -> Optional[Dict]:
+        """
+        Analyze trend using multiple technical indicators
+
+        With a symbol the analysis is memoized: as long as the fingerprint of
+        the bars and the parameters match the previous call for the symbol,
+        the previous analysis is returned without computing any indicator
+        (and without adding indicator columns to df).
+        """
         if df is None or df.empty:
             return None
-            
-        # Calculate technical indicators
-        sma_20 = SMAIndicator(close=df['close'], window=20)
-        sma_50 = SMAIndicator(close=df['close'], window=50)
-        ema_20 = EMAIndicator(close=df['close'], window=20)
-        rsi = RSIIndicator(close=df['close'])
-        stoch = StochasticOscillator(high=df['high'], low=df['low'], close=df['close'])
-        bb = BollingerBands(close=df['close'])
-        macd = MACD(close=df['close'])
+        key = self._memo_key(df) if symbol is not None and self.memoize else None
+        if key is not None:
+            trend = self._memo_get(symbol, key)
+            if trend is not None:
+                return trend
+        trend = self._trend_from_frame(df, self._add_indicators(df))
+        if key is not None:
+            self._memo_put(symbol, key, trend)
+        return trend
+
+    def _memo_key(self, df: pd.DataFrame) -> Tuple:
+        """Fingerprint of the inputs of an analysis: the bars, the parameters and the confirmation timeframe"""
+        return bars_fingerprint(df), tuple(sorted(self.params.items())), self.confirm_timeframe
+
+    def _memo_get(self, symbol: str, key: Tuple) -> Optional[Dict]:
+        with self._memo_lock:
+            entry = self._trend_memo.get(symbol)
+        if entry is not None and entry[0] == key:
+            self.stats.add('memo_hits')
+            return dict(entry[1])
+        self.stats.add('memo_misses')
+        return None
+
+    def _memo_put(self, symbol: str, key: Tuple, trend: Dict):
+        with self._memo_lock:
+            self._trend_memo[symbol] = (key, dict(trend))
+
+    def clear_memo(self):
+        """Forget all memoized analyses"""
+        with self._memo_lock:
+            self._trend_memo.clear()
+
+    def _add_indicators(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Calculate the indicators of one symbol and add them to its DataFrame"""
+        # Calculate technical indicators for a one-symbol panel
+        indicators = self.compute_indicators(
+            df['close'].to_numpy(dtype=float)[np.newaxis, :],
+            df['high'].to_numpy(dtype=float)[np.newaxis, :],
+            df['low'].to_numpy(dtype=float)[np.newaxis, :]
+        )
         
         # Add indicators to DataFrame
-        df['sma_20'] = sma_20.sma_indicator()
-        df['sma_50'] = sma_50.sma_indicator()
-        df['ema_20'] = ema_20.ema_indicator()
-        df['rsi'] = rsi.rsi()
-        df['stoch_k'] = stoch.stoch()
-        df['stoch_d'] = stoch.stoch_signal()
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-        
+        for column in INDICATOR_COLUMNS:
+            df[column] = indicators[column][0]
+        return indicators
+
+    def _trend_from_frame(self, df: pd.DataFrame, indicators: Dict[str, np.ndarray]) -> Dict:
+        """Build the trend analysis from the latest rows of a DataFrame with indicators"""
         # Get latest values
         latest = df.iloc[-1]
         prev = df.iloc[-2]
+        atr = indicators['atr'][0, -1]
         
+        trend = self._build_trend(latest, prev, atr)
+        if self.confirm_timeframe:
+            trend['higher_trend'] = self.higher_timeframe_trend(df, self.confirm_timeframe)
+        return trend
+
+    def history_start(self, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        First date of the daily history generate_recommendations loads
+
+        With a confirm_timeframe the history must hold sma_slow bars of that
+        timeframe (about 1 year for '1W' and 4.5 years for '1M'), otherwise
+        higher_timeframe_trend never has its slow SMA.
+
+        Returns:
+            Optional[str]: 'YYYY-MM-DD', or None for the StockInfo default (one year)
+        """
+        if not self.confirm_timeframe:
+            return None
+        bars = self.params['sma_slow'] + HIGHER_TIMEFRAME_SPARE_BARS
+        days = bars * TIMEFRAME_CALENDAR_DAYS[self.confirm_timeframe]
+        return ((now or datetime.now()) - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    def higher_timeframe_trend(self, df: pd.DataFrame, timeframe: str = '1W') -> Optional[str]:
+        """
+        'Bullish' or 'Bearish' trend of daily bars resampled to a higher timeframe
+
+        Uses the same three trend votes as _determine_trend on the resampled
+        bars. Returns None while the slow SMA of the higher timeframe is not
+        available yet (too little history), so the daily signal stands alone.
+        """
+        bars = resample_bars(df, timeframe)
+        indicators = self.compute_indicators(
+            bars['close'].to_numpy(dtype=float)[np.newaxis, :],
+            bars['high'].to_numpy(dtype=float)[np.newaxis, :],
+            bars['low'].to_numpy(dtype=float)[np.newaxis, :]
+        )
+        latest = latest_snapshot(indicators)
+        if np.isnan(latest['sma_50'][0]):
+            return None
+        return 'Bullish' if self.trend_votes(latest)[0] > 0 else 'Bearish'
+
+    def higher_timeframe_votes(self, times: np.ndarray, close: np.ndarray, timeframe: str = '1W') -> np.ndarray:
+        """
+        Trend votes of the higher timeframe as seen at every daily bar
+
+        Vectorized equivalent of higher_timeframe_trend run on the history up
+        to each bar: the bucket a bar falls into is still open, so its close
+        is that bar's close. The trend votes only use closes, so every
+        indicator of the open bucket is one step from the completed buckets
+        before it (a window sum or an EMA update).
+
+        Args:
+            times (np.ndarray): Bar times, shared by all rows (a time-aligned panel)
+            close (np.ndarray): 2-D (symbols x bars) daily closes, NaN where a symbol has no bar
+
+        Returns:
+            np.ndarray: trend_votes of the higher timeframe, NaN where higher_timeframe_trend
+            returns None (no bar, or too few buckets for the slow SMA)
+        """
+        close = np.atleast_2d(np.asarray(close, dtype=float))
+        labels_all = bucket_starts(np.asarray(times, dtype='datetime64[ns]'), timeframe)
+        fast, slow, ema_window = self.params['sma_fast'], self.params['sma_slow'], self.params['ema_window']
+        votes = np.full(close.shape, np.nan)
+        for row in range(close.shape[0]):
+            columns = np.flatnonzero(~np.isnan(close[row]))
+            if columns.size == 0:
+                continue
+            x = close[row, columns]
+            labels = labels_all[columns]
+            new_bucket = np.concatenate([[True], labels[1:] != labels[:-1]])
+            k = np.cumsum(new_bucket) - 1  # Bucket of every bar
+            ends = np.concatenate([np.flatnonzero(new_bucket)[1:] - 1, [len(x) - 1]])
+            completed = x[ends]  # Closes of the buckets (the last one is never used as completed)
+
+            def window_mean(window: int) -> np.ndarray:
+                sums = np.concatenate([[0.0], np.cumsum(completed)])
+                before = sums[k] - sums[np.maximum(k - window + 1, 0)]
+                return np.where(k >= window - 1, (before + x) / window, np.nan)
+
+            def ema_step(state: np.ndarray, alpha: float, value: np.ndarray) -> np.ndarray:
+                """EMA after the open bucket, from the EMA state of the completed buckets before it"""
+                previous = np.concatenate([[np.nan], state])[k]
+                return np.where(np.isnan(previous), value, (1.0 - alpha) * previous + alpha * value)
+
+            def ema_open(window: int) -> np.ndarray:
+                alpha = 2.0 / (window + 1)
+                state = ewm_mean(completed[np.newaxis, :], alpha, 1)[0]
+                return np.where(k >= window - 1, ema_step(state, alpha, x), np.nan)
+
+            macd_completed = (ewm_mean(completed[np.newaxis, :], 2.0 / 13, 26)[0]
+                              - ewm_mean(completed[np.newaxis, :], 2.0 / 27, 26)[0])
+            macd_line = ema_open(12) - ema_open(26)
+            signal_state = ewm_mean(macd_completed[np.newaxis, :], 0.2, 1)[0]
+            macd_signal = np.where(k >= 26 + 9 - 2, ema_step(signal_state, 0.2, macd_line), np.nan)
+
+            sma_slow = window_mean(slow)
+            with np.errstate(invalid='ignore'):
+                row_votes = (np.where(window_mean(fast) > sma_slow, 1, -1)
+                             + np.where(ema_open(ema_window) > sma_slow, 1, -1)
+                             + np.where(macd_line > macd_signal, 1, -1))
+            votes[row, columns] = np.where(np.isnan(sma_slow), np.nan, row_votes)
+        return votes
+
+    def analyze_universe(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """
+        Analyze many symbols with one batched indicator pass
+
+        Args:
+            frames (Dict[str, pd.DataFrame]): Historical bars per symbol
+
+        Returns:
+            Dict[str, Dict]: Trend analysis per symbol, in the same format as analyze_trend
+        """
+        panel = BarPanel.from_sequences(frames, fields=('high', 'low', 'close'))
+        indicators = self.compute_indicators(panel['close'], panel['high'], panel['low'])
+        latest = latest_snapshot(indicators)
+        prev = latest_snapshot(indicators, offset=1)
+
+        trends = {}
+        for row, symbol in enumerate(panel.symbols):
+            if np.isnan(prev['close'][row]):
+                continue
+            latest_row = {name: values[row] for name, values in latest.items()}
+            prev_row = {name: values[row] for name, values in prev.items()}
+            trends[symbol] = self._build_trend(latest_row, prev_row, latest_row['atr'])
+        return trends
+
+    def analyze_state(self, state) -> Optional[Dict]:
+        """
+        Analyze trend from a streaming IndicatorState instead of full history
+
+        Args:
+            state (IndicatorState): State advanced up to the latest bar
+
+        Returns:
+            Optional[Dict]: Trend analysis in the same format as analyze_trend
+        """
+        if state is None or not state.previous:
+            return None
+        return self._build_trend(state.latest, state.previous, state.latest['atr'])
+
+    def _build_trend(self, latest, prev, atr: float) -> Dict:
+        """Build the trend analysis from the latest and previous indicator values"""
         # Calculate stop loss and take profit levels
-        atr = self._calculate_atr(df)
-        stop_loss = latest['close'] - (2 * atr)  # 2 ATR for stop loss
-        take_profit = latest['close'] + (4 * atr)  # 4 ATR for take profit
+        stop_loss = latest['close'] - (self.params['stop_loss_atr'] * atr)  # 2 ATR for stop loss by default
+        take_profit = latest['close'] + (self.params['take_profit_atr'] * atr)  # 4 ATR for take profit by default
         
         # Trend analysis with multiple confirmations
         trend = {
@@ -121,13 +381,14 @@ class TradingStrategy:
 
     def _determine_momentum(self, latest: pd.Series) -> str:
         """Determine momentum using RSI and Stochastic"""
-        if latest['rsi'] > 70 and latest['stoch_k'] > 80:
+        params = self.params
+        if latest['rsi'] > params['rsi_overbought'] and latest['stoch_k'] > params['stoch_overbought']:
             return 'Strong Overbought'
-        elif latest['rsi'] > 70:
+        elif latest['rsi'] > params['rsi_overbought']:
             return 'Overbought'
-        elif latest['rsi'] < 30 and latest['stoch_k'] < 20:
+        elif latest['rsi'] < params['rsi_oversold'] and latest['stoch_k'] < params['stoch_oversold']:
             return 'Strong Oversold'
-        elif latest['rsi'] < 30:
+        elif latest['rsi'] < params['rsi_oversold']:
             return 'Oversold'
         else:
             return 'Neutral'
@@ -136,29 +397,129 @@ class TradingStrategy:
         """Determine volatility state"""
         bb_width = (latest['bb_upper'] - latest['bb_lower']) / latest['close']
         
-        if bb_width > 0.05:  # 5% bandwidth
+        if bb_width > self.params['bb_width_high']:  # 5% bandwidth by default
             return 'High'
-        elif bb_width > 0.03:  # 3% bandwidth
+        elif bb_width > self.params['bb_width_medium']:  # 3% bandwidth by default
             return 'Medium'
         else:
             return 'Low'
 
-    def generate_recommendations(self, stock_info, symbols: List[str]) -> List[Dict]:
-        """Generate trading recommendations with risk management"""
+    @staticmethod
+    def trend_votes(indicators: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Sum of the three +1/-1 trend votes of _determine_trend for whole arrays
+
+        Returns:
+            np.ndarray: Values in {-3, -1, 1, 3}; > 0 means (Strong) Bullish, 3 means Strong Bullish
+        """
+        with np.errstate(invalid='ignore'):
+            return (
+                np.where(indicators['sma_20'] > indicators['sma_50'], 1, -1)
+                + np.where(indicators['ema_20'] > indicators['sma_50'], 1, -1)
+                + np.where(indicators['macd'] > indicators['macd_signal'], 1, -1)
+            )
+
+    def generate_signal_panel(self, indicators: Dict[str, np.ndarray], times: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Apply the generate_recommendations signal rules to whole indicator arrays
+
+        Vectorized equivalent of _determine_trend, _determine_momentum,
+        _determine_volatility and the BUY/SELL/HOLD rule, evaluated at every
+        bar of every symbol at once. With a confirm_timeframe and the bar
+        times, BUY/SELL signals must also agree with the higher timeframe
+        trend at each bar (higher_timeframe_votes).
+
+        Args:
+            indicators (Dict[str, np.ndarray]): Output of indicators.compute_indicators
+            times (Optional[np.ndarray]): Times of the indicator columns (a time-aligned
+                panel of daily bars); needed to apply confirm_timeframe
+
+        Returns:
+            np.ndarray: int8 array of SIGNAL_BUY / SIGNAL_SELL / SIGNAL_HOLD codes
+        """
+        trend_votes = self.trend_votes(indicators)
+        with np.errstate(invalid='ignore'):
+            oversold = indicators['rsi'] < self.params['rsi_oversold']
+            overbought = indicators['rsi'] > self.params['rsi_overbought']
+            bb_width = (indicators['bb_upper'] - indicators['bb_lower']) / indicators['close']
+            not_high_volatility = ~(bb_width > self.params['bb_width_high'])
+
+        signals = np.full(trend_votes.shape, SIGNAL_HOLD, dtype=np.int8)
+        buy = (trend_votes > 0) & oversold & not_high_volatility
+        sell = (trend_votes < 0) & overbought & not_high_volatility
+        if self.confirm_timeframe and times is not None:
+            higher = self.higher_timeframe_votes(times, indicators['close'], self.confirm_timeframe)
+            with np.errstate(invalid='ignore'):
+                buy &= ~(higher < 0)
+                sell &= ~(higher > 0)
+        signals[buy] = SIGNAL_BUY
+        signals[sell] = SIGNAL_SELL
+        return signals
+
+    def risk_levels(self, indicators: Dict[str, np.ndarray]):
+        """
+        Stop loss and take profit levels for whole indicator arrays
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (stop_loss, take_profit) at stop_loss_atr / take_profit_atr ATRs from the close
+        """
+        close, atr = indicators['close'], indicators['atr']
+        return close - self.params['stop_loss_atr'] * atr, close + self.params['take_profit_atr'] * atr
+
+    def generate_recommendations(self, stock_info, symbols: List[str], metrics: Optional[RunMetrics] = None) -> List[Dict]:
+        """
+        Generate trading recommendations with risk management
+
+        Historical data is downloaded on a bounded thread pool while the
+        results are analyzed in the original symbol order. The history starts
+        at history_start, so it is long enough for the confirm_timeframe.
+
+        Args:
+            stock_info (StockInfo): Source of historical data and position sizing
+            symbols (List[str]): Symbols to analyze
+            metrics (Optional[RunMetrics]): Records the fetch, memo, indicators, signal and
+                position_sizing stage times per symbol
+
+        Symbols whose bars are unchanged since the previous call (same
+        bars_fingerprint and parameters) reuse their analysis and skip the
+        indicators and signal stages.
+        """
+        metrics = metrics if metrics is not None else RunMetrics()
         recommendations = []
+        start_date = self.history_start()
+
+        def fetch(symbol: str) -> Optional[pd.DataFrame]:
+            with metrics.stage('fetch', symbol):
+                return stock_info.get_historical_data(symbol, start_date)
         
-        for symbol in symbols:
-            logging.info(f"Analyzing {symbol}...")
-            df = stock_info.get_historical_data(symbol)
-            trend = self.analyze_trend(df)
+        for symbol, df in fetch_in_order(fetch, symbols, self.fetch_workers):
+            if df is None or df.empty:
+                continue
+            # Symbols whose bars did not change since the last run reuse their analysis
+            trend, key = None, None
+            if self.memoize:
+                with metrics.stage('memo', symbol):
+                    key = self._memo_key(df)
+                    trend = self._memo_get(symbol, key)
+            if trend is None:
+                logging.info(f"Analyzing {symbol}...")
+                with metrics.stage('indicators', symbol):
+                    indicators = self._add_indicators(df)
+                with metrics.stage('signal', symbol):
+                    trend = self._trend_from_frame(df, indicators)
+                if key is not None:
+                    self._memo_put(symbol, key, trend)
             
             if trend:
                 # Calculate position size
-                position_size = stock_info.calculate_position_size(
-                    symbol,
-                    trend['price'],
-                    trend['stop_loss']
-                )
+                with metrics.stage('position_sizing', symbol):
+                    position_size = stock_info.calculate_position_size(
+                        symbol,
+                        trend['price'],
+                        trend['stop_loss'],
+                        self.params['risk_per_trade'],
+                        self.params['max_position_size']
+                    )
                 
                 recommendation = {
                     'symbol': symbol,
@@ -174,22 +535,34 @@ class TradingStrategy:
                 }
                 
                 # Generate trading signal with multiple confirmations
-                if (trend['trend'] in ['Strong Bullish', 'Bullish'] and 
-                    trend['momentum'] in ['Strong Oversold', 'Oversold'] and
-                    trend['volatility'] != 'High'):
-                    recommendation['signal'] = 'BUY'
-                elif (trend['trend'] in ['Strong Bearish', 'Bearish'] and 
-                      trend['momentum'] in ['Strong Overbought', 'Overbought'] and
-                      trend['volatility'] != 'High'):
-                    recommendation['signal'] = 'SELL'
-                else:
-                    recommendation['signal'] = 'HOLD'
+                recommendation['signal'] = self.signal_from_trend(trend)
                 
                 recommendations.append(recommendation)
-                logging.info(f"Recommendation for {symbol}: {recommendation['signal']}")
         
         return recommendations
 
+    @staticmethod
+    def signal_from_trend(trend: Dict) -> str:
+        """
+        BUY, SELL or HOLD for a trend analysis of analyze_trend / analyze_state
+
+        A BUY needs a bullish trend, oversold momentum, volatility that is not
+        High and a higher timeframe trend (when analyzed) that is not Bearish;
+        a SELL is the mirror image.
+        """
+        higher_trend = trend.get('higher_trend')
+        if (trend['trend'] in ['Strong Bullish', 'Bullish'] and 
+            trend['momentum'] in ['Strong Oversold', 'Oversold'] and
+            trend['volatility'] != 'High' and
+            higher_trend != 'Bearish'):
+            return 'BUY'
+        if (trend['trend'] in ['Strong Bearish', 'Bearish'] and 
+            trend['momentum'] in ['Strong Overbought', 'Overbought'] and
+            trend['volatility'] != 'High' and
+            higher_trend != 'Bullish'):
+            return 'SELL'
+        return 'HOLD'
+
     def update_performance_metrics(self, symbol: str, trade_data: Dict):
         """Update performance metrics for a symbol"""
         if symbol not in self.performance_metrics:
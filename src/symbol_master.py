@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+class SymbolMaster:
+    """
+    Compact array-backed symbol universe with dense integer IDs
+
+    Symbols are sorted and numbered 0..N-1. Exchange and security type are
+    stored as categorical codes, so the whole universe takes a few hundred KB
+    and per-symbol attributes can be gathered for many IDs with one NumPy
+    indexing operation.
+
+    Lookups work both ways in O(1): ``id_of`` through a dict, ``symbol_of``
+    by array indexing. Group membership (any ExchangeInfo.VN_EXCHANGES group)
+    is exposed as boolean masks over the IDs, loaded on first use and kept
+    until the version of the group's membership changes.
+    """
+
+    def __init__(self, listing: pd.DataFrame, group_loader: Optional[Callable[[str], Iterable[str]]] = None,
+                 group_version: Optional[Callable[[str], object]] = None):
+        """
+        Build the symbol master from an exchange listing
+
+        Args:
+            listing (pd.DataFrame): Output of ExchangeInfo._load_all_symbols_by_exchanges
+            group_loader (Optional[Callable[[str], Iterable[str]]]): Returns the member
+                symbols of a group (e.g. ExchangeInfo._load_all_symbols_by_group)
+            group_version (Optional[Callable[[str], object]]): Version of a group's membership
+                (e.g. ListingCache.version); a cached mask is rebuilt when it changes
+                (default: masks are kept for the life of the master)
+        """
+        df = listing.drop_duplicates(subset='symbol', keep='last').sort_values('symbol')
+        self.symbols = df['symbol'].to_numpy(dtype=str)
+        self._ids: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        exchange = pd.Categorical(df['exchange'])
+        security_type = pd.Categorical(df['type'])
+        self.exchange_codes = exchange.codes.astype(np.int8)
+        self.exchanges = np.asarray(exchange.categories, dtype=str)
+        self.type_codes = security_type.codes.astype(np.int8)
+        self.types = np.asarray(security_type.categories, dtype=str)
+        self.short_names = df['organ_short_name'].fillna('').to_numpy(dtype=str)
+        self.names = df['organ_name'].fillna('').to_numpy(dtype=str)
+
+        self._group_loader = group_loader
+        self._group_version = group_version
+        self._group_masks: Dict[str, Tuple[np.ndarray, object]] = {}  # group -> (mask, version)
+        self._infos: Optional[List[Dict[str, Optional[str]]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    def id_of(self, symbol: str) -> int:
+        """Integer ID of a symbol, or -1 if it is not listed"""
+        return self._ids.get(symbol, -1)
+
+    def ids(self, symbols: Iterable[str]) -> np.ndarray:
+        """Integer IDs for many symbols (-1 for unknown ones)"""
+        return np.fromiter((self._ids.get(symbol, -1) for symbol in symbols), dtype=np.int32)
+
+    def symbol_of(self, symbol_id: int) -> str:
+        """Symbol for an integer ID"""
+        return str(self.symbols[symbol_id])
+
+    def symbols_of(self, ids: np.ndarray) -> np.ndarray:
+        """Symbols for an array of integer IDs"""
+        return self.symbols[np.asarray(ids)]
+
+    def info(self, symbol_id: int) -> Dict[str, str]:
+        """Symbol info in the format of ExchangeInfo.get_symbol_info"""
+        infos = self._infos
+        if infos is None:
+            infos = self._build_infos()
+        return dict(infos[symbol_id])
+
+    def _build_infos(self) -> List[Dict[str, Optional[str]]]:
+        """Info dicts of all IDs, built once with a few column-wise conversions"""
+        with self._lock:
+            if self._infos is None:
+                columns = zip(self._categories(self.exchanges, self.exchange_codes),
+                              self._categories(self.types, self.type_codes),
+                              self.short_names.tolist(), self.names.tolist())
+                self._infos = [
+                    {'exchange': exchange, 'type': security_type, 'organ_short_name': short_name, 'organ_name': name}
+                    for exchange, security_type, short_name, name in columns
+                ]
+            return self._infos
+
+    @staticmethod
+    def _categories(categories: np.ndarray, codes: np.ndarray) -> List[Optional[str]]:
+        """Category names for codes (None for missing values, code -1)"""
+        names = categories.tolist() + [None]
+        return [names[code] for code in codes.tolist()]
+
+    def exchange_mask(self, exchange: str) -> np.ndarray:
+        """Boolean mask of the symbols listed on an exchange code from the listing"""
+        matches = np.flatnonzero(self.exchanges == exchange)
+        if matches.size == 0:
+            return np.zeros(len(self), dtype=bool)
+        return self.exchange_codes == matches[0]
+
+    def group_mask(self, group: str) -> np.ndarray:
+        """
+        Boolean mask of the members of a group, e.g. 'VN30' or 'HOSE'
+
+        The membership is fetched through the group loader and cached until
+        its version changes (e.g. the listing cache refreshed it).
+        """
+        version = self._group_version(group) if self._group_version is not None else None
+        with self._lock:
+            cached = self._group_masks.get(group)
+        if cached is not None and cached[1] == version:
+            return cached[0]
+        if self._group_loader is None:
+            raise ValueError(f"No group loader available to resolve group {group}")
+
+        member_ids = self.ids(self._group_loader(group))
+        mask = np.zeros(len(self), dtype=bool)
+        mask[member_ids[member_ids >= 0]] = True
+        mask.setflags(write=False)
+        with self._lock:
+            self._group_masks[group] = (mask, version)
+        return mask
+
+    def group_ids(self, group: str) -> np.ndarray:
+        """Sorted integer IDs of the members of a group"""
+        return np.flatnonzero(self.group_mask(group))
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the arrays (excluding the id dict)"""
+        arrays = [self.symbols, self.exchange_codes, self.exchanges, self.type_codes,
+                  self.types, self.short_names, self.names, *(mask for mask, _ in self._group_masks.values())]
+        return sum(array.nbytes for array in arrays)
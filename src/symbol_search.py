@@ -0,0 +1,126 @@
+import bisect
+import difflib
+import re
+import unicodedata
+from typing import List, Optional
+
+from .symbol_master import SymbolMaster
+
+DEFAULT_SEARCH_LIMIT = 20
+FUZZY_CUTOFF = 0.6  # difflib similarity below which a fuzzy match is ignored
+
+def normalize_text(text: str) -> str:
+    """Lowercase text with Vietnamese diacritics removed ('Sữa Việt Nam' -> 'sua viet nam')"""
+    text = text.replace('Đ', 'D').replace('đ', 'd')
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+class SymbolSearchIndex:
+    """
+    Search over the symbols and company names of a SymbolMaster
+
+    Built once per listing. Symbols are already sorted in the master, so a
+    symbol prefix is one bisect over them. Every word of the short and full
+    company names (lowercased, without diacritics) is kept in a sorted word
+    list next to the ID it belongs to, which answers name prefixes the same
+    way. Queries with no prefix hit fall back to difflib fuzzy matching, so
+    typos like 'VMN' still find 'VNM'.
+
+    Results are symbol IDs of the master, best first: exact symbol, symbol
+    prefix, company name word prefix, then fuzzy matches.
+    """
+
+    def __init__(self, master: SymbolMaster):
+        """
+        Build the index
+
+        Args:
+            master (SymbolMaster): Symbol universe to index
+        """
+        self.master = master
+        self.symbols: List[str] = [str(symbol) for symbol in master.symbols]
+
+        words = set()
+        for symbol_id, (short_name, name) in enumerate(zip(master.short_names, master.names)):
+            for word in re.findall(r'\w+', normalize_text(f"{short_name} {name}")):
+                words.add((word, symbol_id))
+        pairs = sorted(words)
+        self.words: List[str] = [word for word, _ in pairs]
+        self.word_ids: List[int] = [symbol_id for _, symbol_id in pairs]
+        self._distinct_words: List[str] = sorted(set(self.words))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def is_listed(self, symbol: str) -> bool:
+        """Whether a symbol is in the listing"""
+        return symbol.upper() in self.master
+
+    def complete(self, prefix: str) -> List[str]:
+        """All symbols starting with a prefix, in order"""
+        prefix = prefix.upper()
+        start = bisect.bisect_left(self.symbols, prefix)
+        end = bisect.bisect_left(self.symbols, prefix + '￿')
+        return self.symbols[start:end]
+
+    def _prefix_ids(self, prefix: str) -> List[int]:
+        """IDs of the symbols starting with a prefix"""
+        prefix = prefix.upper()
+        return list(range(bisect.bisect_left(self.symbols, prefix),
+                          bisect.bisect_left(self.symbols, prefix + '￿')))
+
+    def _name_ids(self, prefix: str) -> List[int]:
+        """IDs of the symbols with a company name word starting with a prefix"""
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + '￿')
+        return self.word_ids[start:end]
+
+    def suggest(self, text: str, limit: int = 5) -> List[str]:
+        """Listed symbols that look like a mistyped symbol"""
+        return difflib.get_close_matches(text.upper(), self.symbols, n=limit, cutoff=FUZZY_CUTOFF)
+
+    def search(self, query: str, limit: Optional[int] = DEFAULT_SEARCH_LIMIT, exchange: Optional[str] = None) -> List[int]:
+        """
+        Symbol IDs matching a query on symbol or company name
+
+        Every word of a multi-word query must match a word of the company
+        name (by prefix), e.g. 'sua viet' finds Vinamilk.
+
+        Args:
+            query (str): Symbol, symbol prefix or company name words
+            limit (Optional[int]): Maximum number of results (default: 20, None for all)
+            exchange (Optional[str]): Only return symbols listed on this exchange
+
+        Returns:
+            List[int]: Symbol IDs, best match first
+        """
+        terms = re.findall(r'\w+', normalize_text(query))
+        if not terms:
+            return []
+        allowed = self.master.exchange_mask(exchange) if exchange else None
+        results, seen = [], set()
+
+        def extend(ids):
+            for symbol_id in ids:
+                if symbol_id in seen or (allowed is not None and not allowed[symbol_id]):
+                    continue
+                seen.add(symbol_id)
+                results.append(symbol_id)
+
+        if len(terms) == 1:
+            exact = self.master.id_of(terms[0].upper())
+            extend([exact] if exact >= 0 else [])
+            extend(self._prefix_ids(terms[0]))
+        # Name matches: symbols matching every term, ordered by symbol
+        matches = set(self._name_ids(terms[0]))
+        for term in terms[1:]:
+            matches &= set(self._name_ids(term))
+        extend(sorted(matches))
+
+        if not results:
+            if len(terms) == 1:
+                extend(self.master.id_of(symbol) for symbol in self.suggest(terms[0], limit or DEFAULT_SEARCH_LIMIT))
+            for term in terms:
+                for word in difflib.get_close_matches(term, self._distinct_words, n=3, cutoff=FUZZY_CUTOFF):
+                    extend(self._name_ids(word))
+        return results[:limit] if limit else results
@@ -0,0 +1,206 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .pipeline import RateLimiter
+
+DEFAULT_SCREENER = 'vietnam'
+TA_MAX_BATCH_SIZE = 200          # Symbols per get_multiple_analysis request
+TA_BATCH_WINDOW = 0.05           # Seconds single-symbol requests wait to be batched together
+TA_MISSING_TTL = 15              # Seconds a symbol missing from a response is cached as None
+
+# Seconds a snapshot stays fresh, per tradingview_ta interval. The analysis of
+# the forming bar changes continuously, so short intervals expire quickly.
+TA_INTERVAL_TTL = {
+    '1m': 15,
+    '5m': 60,
+    '15m': 180,
+    '30m': 300,
+    '1h': 600,
+    '2h': 900,
+    '4h': 1800,
+    '1d': 3600,
+    '1W': 4 * 3600,
+    '1M': 12 * 3600,
+}
+DEFAULT_TA_TTL = 300
+
+# (screener, interval, exchange, symbol)
+SnapshotKey = Tuple[str, str, str, str]
+
+class TASnapshotService:
+    """
+    Batched, cached TradingView technical-analysis snapshots
+
+    Requests are cached per (symbol, exchange, interval) with a TTL that
+    follows the interval (TA_INTERVAL_TTL); a symbol TradingView returned no
+    analysis for is cached for missing_ttl only, and a failed request is not
+    cached at all. Cache misses are collected and sent through
+    get_multiple_analysis in batches of up to max_batch_size symbols: a
+    get_many call sends its misses at once. A single-symbol get is sent at
+    once when nothing else of its interval is queued or being fetched;
+    otherwise it waits up to batch_window seconds so concurrent calls from
+    other threads can share one request. A key that is already being fetched
+    is never requested again; every caller waits on the same in-flight result.
+    """
+
+    def __init__(self, fetch: Optional[Callable[..., Dict]] = None, batch_window: float = TA_BATCH_WINDOW,
+                 max_batch_size: int = TA_MAX_BATCH_SIZE, requests_per_second: Optional[float] = None,
+                 ttls: Optional[Dict[str, float]] = None, missing_ttl: float = TA_MISSING_TTL):
+        """
+        Initialize the snapshot service
+
+        Args:
+            fetch (Optional[Callable[..., Dict]]): Batch fetcher with the signature of
+                TradingView_TA.get_multiple_analysis (default: that wrapper)
+            batch_window (float): Seconds single requests wait to be batched (default: 0.05)
+            max_batch_size (int): Maximum symbols per request (default: 200)
+            requests_per_second (Optional[float]): Maximum batch request rate (default: unlimited)
+            ttls (Optional[Dict[str, float]]): Overrides for TA_INTERVAL_TTL
+            missing_ttl (float): Seconds a symbol without analysis is cached as None
+                (default: 15, capped by the interval's TTL)
+        """
+        if fetch is None:
+            from .utils import TradingView_TA
+            fetch = TradingView_TA.get_multiple_analysis
+        self._fetch = fetch
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.ttls = {**TA_INTERVAL_TTL, **(ttls or {})}
+        self.missing_ttl = missing_ttl
+
+        self._cache: Dict[SnapshotKey, Tuple[float, object]] = {}
+        self._in_flight: Dict[SnapshotKey, Future] = {}
+        self._pending: Dict[Tuple[str, str], List[SnapshotKey]] = {}
+        self._timers: Dict[Tuple[str, str], threading.Timer] = {}
+        self._sending: Dict[Tuple[str, str], int] = {}  # Requests of a group being fetched right now
+        self._lock = threading.Lock()
+
+    def ttl(self, interval: str) -> float:
+        """Seconds a snapshot of this interval stays fresh"""
+        return self.ttls.get(interval, DEFAULT_TA_TTL)
+
+    def get(self, symbol: str, exchange: str, interval: str, screener: str = DEFAULT_SCREENER,
+            timeout: Optional[float] = None):
+        """
+        Get the analysis of one symbol
+
+        Returns:
+            Analysis: tradingview_ta Analysis, or None if TradingView has no data for the symbol
+        """
+        key = (screener, interval, exchange.upper(), symbol.upper())
+        future, is_new = self._request(key)
+        if is_new:
+            self._flush_later((screener, interval))
+        return future.result(timeout)
+
+    def get_many(self, symbols: List[str], exchange: str, interval: str, screener: str = DEFAULT_SCREENER,
+                 timeout: Optional[float] = None) -> Dict[str, object]:
+        """
+        Get the analyses of many symbols on one exchange
+
+        Returns:
+            Dict[str, Analysis]: Analysis (or None) per symbol
+        """
+        futures = {}
+        requested = False
+        for symbol in symbols:
+            futures[symbol], is_new = self._request((screener, interval, exchange.upper(), symbol.upper()))
+            requested |= is_new
+        if requested:
+            self._flush((screener, interval))
+        return {symbol: future.result(timeout) for symbol, future in futures.items()}
+
+    def get_summary(self, symbol: str, exchange: str, interval: str, screener: str = DEFAULT_SCREENER) -> Optional[dict]:
+        """Consensus rating of one symbol (Analysis.summary)"""
+        analysis = self.get(symbol, exchange, interval, screener)
+        return analysis.summary if analysis is not None else None
+
+    def get_indicators(self, symbol: str, exchange: str, interval: str, screener: str = DEFAULT_SCREENER) -> Optional[dict]:
+        """Indicator values of one symbol (Analysis.indicators)"""
+        analysis = self.get(symbol, exchange, interval, screener)
+        return analysis.indicators if analysis is not None else None
+
+    def invalidate(self):
+        """Drop all cached snapshots"""
+        with self._lock:
+            self._cache.clear()
+
+    def _request(self, key: SnapshotKey) -> Tuple[Future, bool]:
+        """Future for a key: cached, already in flight, or newly queued (is_new)"""
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                future = Future()
+                future.set_result(cached[1])
+                return future, False
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self._pending.setdefault(key[:2], []).append(key)
+            return future, True
+
+    def _flush_later(self, group: Tuple[str, str]):
+        """
+        Send the pending requests of a group after the batch window
+
+        They are sent now if the batch is full, or if the only pending key is
+        the caller's and no request of the group is being fetched: there is
+        nothing to batch it with, so waiting would only add latency.
+        """
+        with self._lock:
+            pending = len(self._pending.get(group, []))
+            idle = pending == 1 and not self._sending.get(group) and group not in self._timers
+            send_now = idle or pending >= self.max_batch_size
+            if not send_now and group not in self._timers:
+                timer = threading.Timer(self.batch_window, self._flush, args=(group,))
+                timer.daemon = True
+                self._timers[group] = timer
+                timer.start()
+        if send_now:
+            self._flush(group)
+
+    def _flush(self, group: Tuple[str, str]):
+        """Send all pending requests of a (screener, interval) group"""
+        with self._lock:
+            keys = self._pending.pop(group, [])
+            timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        for start in range(0, len(keys), self.max_batch_size):
+            self._send(group, keys[start:start + self.max_batch_size])
+
+    def _send(self, group: Tuple[str, str], keys: List[SnapshotKey]):
+        screener, interval = group
+        tickers = [f"{exchange}:{symbol}" for _, _, exchange, symbol in keys]
+        with self._lock:
+            self._sending[group] = self._sending.get(group, 0) + 1
+        try:
+            self.rate_limiter.wait()
+            results = self._fetch(screener=screener, interval=interval, symbols=tickers) or {}
+        except Exception as e:
+            logging.error(f"Error fetching TradingView analysis for {len(keys)} symbols: {str(e)}")
+            with self._lock:
+                futures = [self._in_flight.pop(key) for key in keys]
+            for future in futures:
+                future.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._sending[group] -= 1
+
+        now = time.monotonic()
+        ttl = self.ttl(interval)
+        with self._lock:
+            futures = []
+            for key, ticker in zip(keys, tickers):
+                analysis = results.get(ticker)
+                self._cache[key] = (now + (ttl if analysis is not None else min(ttl, self.missing_ttl)), analysis)
+                futures.append((self._in_flight.pop(key), analysis))
+        for future, analysis in futures:
+            future.set_result(analysis)
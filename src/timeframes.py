@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from .lazy import lazy_import
+from .instrumentation import Counters
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+INTRADAY_BASE = '1m'
+DAILY_BASE = '1D'
+
+# Timeframe -> (stored base interval it is resampled from, bucket size in minutes for intraday)
+TIMEFRAMES: Dict[str, Tuple[str, Optional[int]]] = {
+    '1m': (INTRADAY_BASE, None),
+    '5m': (INTRADAY_BASE, 5),
+    '15m': (INTRADAY_BASE, 15),
+    '30m': (INTRADAY_BASE, 30),
+    '1H': (INTRADAY_BASE, 60),
+    '1D': (DAILY_BASE, None),
+    '1W': (DAILY_BASE, None),
+    '1M': (DAILY_BASE, None),
+}
+DEFAULT_CACHE_ENTRIES = 512  # Resampled (symbol, timeframe) series kept in memory
+EPOCH_MONDAY = 4             # 1970-01-05, the first Monday after the epoch, in days
+
+def base_interval(timeframe: str) -> str:
+    """Stored interval a timeframe is built from ('1m' or '1D')"""
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Invalid timeframe: {timeframe} (expected one of {', '.join(TIMEFRAMES)})")
+    return TIMEFRAMES[timeframe][0]
+
+def bucket_starts(times: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Start of the timeframe bucket every timestamp falls into
+
+    Intraday buckets are aligned to the hour, weeks start on Monday and
+    months on the first day of the month.
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    minutes = TIMEFRAMES[timeframe][1]
+    if timeframe == '1M':
+        return times.astype('datetime64[M]').astype('datetime64[ns]')
+    if timeframe == '1W':
+        days = times.astype('datetime64[D]').astype(np.int64)
+        return (days - (days - EPOCH_MONDAY) % 7).astype('datetime64[D]').astype('datetime64[ns]')
+    if timeframe == '1D':
+        return times.astype('datetime64[D]').astype('datetime64[ns]')
+    step = minutes or 1
+    stamps = times.astype('datetime64[m]').astype(np.int64)
+    return (stamps - stamps % step).astype('datetime64[m]').astype('datetime64[ns]')
+
+def resample_bars(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate time-sorted OHLCV bars into a coarser timeframe
+
+    Every bucket is labelled with its start time and gets the first open,
+    highest high, lowest low, last close and total volume of its bars. The
+    bars are split at the bucket boundaries and reduced with NumPy
+    ``reduceat``, so the cost is a few passes over the input.
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
+    labels = bucket_starts(df['time'].to_numpy(), timeframe)
+    starts = np.concatenate([[0], np.flatnonzero(labels[1:] != labels[:-1]) + 1])
+    ends = np.concatenate([starts[1:], [len(labels)]]) - 1
+    volume = df['volume'].to_numpy()
+    return pd.DataFrame({
+        'time': labels[starts],
+        'open': df['open'].to_numpy(dtype=float)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=float), starts),
+        'close': df['close'].to_numpy(dtype=float)[ends],
+        'volume': np.add.reduceat(volume, starts),
+    })
+
+class _Resampled:
+    """Cached resampled series and where its last (still open) bucket starts in the base bars"""
+
+    __slots__ = ('frame', 'first_time', 'tail_index', 'tail_time', 'base_rows', 'base_last_time')
+
+    def __init__(self, frame, first_time, tail_index, tail_time, base_rows, base_last_time):
+        self.frame = frame
+        self.first_time = first_time
+        self.tail_index = tail_index
+        self.tail_time = tail_time
+        self.base_rows = base_rows
+        self.base_last_time = base_last_time
+
+class MultiTimeframeBars:
+    """
+    Bars of any timeframe, resampled from the finest stored resolution
+
+    Only two resolutions are downloaded and stored per symbol: 1-minute bars
+    (data/bars/1m, recent history only) and daily bars (data/bars, long
+    history). 5m/15m/30m/1H bars are resampled from the 1-minute bars and
+    weekly/monthly bars from the daily ones, so asking for another timeframe
+    never triggers another download or file.
+
+    Resampled series are cached per (symbol, timeframe). When new base bars
+    arrive only the last bucket of the cached series (which may still have
+    been open) and the buckets after it are recomputed; a change further
+    back in the base bars (e.g. a backfill) rebuilds the series.
+    """
+
+    def __init__(self, stock_info, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        """
+        Initialize the resampler
+
+        Args:
+            stock_info (StockInfo): Source of the stored base bars
+            max_entries (int): Resampled series kept in memory, least recently used dropped first
+        """
+        self.stock_info = stock_info
+        self.max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        # hits (cached series still current), incremental (tail recomputed), rebuilds
+        self.stats = Counters()
+
+    def get_bars(self, symbol: str, timeframe: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """
+        Bars of a symbol in a timeframe from start up to and including the end date
+
+        The first bucket is widened to its full length (e.g. the whole week
+        containing start), so it is never built from a partial set of bars.
+        """
+        base = base_interval(timeframe)
+        bucket_start = pd.Timestamp(bucket_starts(np.array([start.to_datetime64()]), timeframe)[0])
+        base_df = self.stock_info.load_base_bars(symbol, base, bucket_start, end)
+        if base_df is None or base_df.empty or timeframe == base:
+            return self.stock_info.slice_bars(base_df, bucket_start, end) if base_df is not None else None
+        return self.stock_info.slice_bars(self.resample(symbol, timeframe, base_df), bucket_start, end)
+
+    def resample(self, symbol: str, timeframe: str, base_df: pd.DataFrame) -> pd.DataFrame:
+        """Resample base bars, reusing the cached result for everything before its last bucket"""
+        times = base_df['time'].to_numpy()
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+
+        reusable = (
+            entry is not None
+            and len(times) > entry.tail_index
+            and times[0] == entry.first_time
+            and times[entry.tail_index] == entry.tail_time
+        )
+        if reusable and len(times) == entry.base_rows and times[-1] == entry.base_last_time:
+            self.stats.add('hits')
+            return entry.frame
+
+        if reusable:
+            self.stats.add('incremental')
+            offset = entry.tail_index
+            tail = resample_bars(base_df.iloc[offset:], timeframe)
+            frame = pd.concat([entry.frame.iloc[:-1], tail], ignore_index=True)
+        else:
+            self.stats.add('rebuilds')
+            offset = 0
+            frame = resample_bars(base_df, timeframe)
+
+        # Where the last bucket starts, so the next update can recompute from there
+        labels = bucket_starts(times[offset:], timeframe)
+        tail_index = offset + int(np.searchsorted(labels, labels[-1]))
+        entry = _Resampled(frame, times[0], tail_index, times[tail_index], len(times), times[-1])
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return frame
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """Drop the cached series of a symbol, or of all symbols"""
+        with self._lock:
+            if symbol is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == symbol]:
+                    del self._cache[key]
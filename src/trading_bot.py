@@ -1,58 +1,180 @@
 import logging
 from datetime import datetime
-from stock_info import StockInfo
-from strategy import TradingStrategy
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from typing import Dict, List, Optional, Union
+from .stock_info import StockInfo
+from .watchlist import DEFAULT_WATCHLIST
+from .strategy import TradingStrategy
+from .pipeline import DEFAULT_FETCH_WORKERS
+from .screener import Screener, DEFAULT_TOP_N
+from .instrumentation import RunMetrics, RUN_METRICS_FILE
+from .recommendation_sink import RecommendationSink, create_sink
+from .portfolio import Portfolio, RiskEngine
+from .paper_broker import PaperBroker
+from .correlation import CorrelationService
 
 class TradingBot:
-    def __init__(self, risk_per_trade: float = 0.02, max_position_size: float = 0.1):
+    def __init__(self, risk_per_trade: float = 0.02, max_position_size: float = 0.1,
+                 fetch_workers: int = DEFAULT_FETCH_WORKERS, requests_per_second: Optional[float] = None,
+                 metrics_file: Optional[str] = RUN_METRICS_FILE, prometheus_file: Optional[str] = None,
+                 sink: Optional[RecommendationSink] = None, portfolio: Optional[Portfolio] = None,
+                 exchange_caps: Optional[Dict[str, float]] = None, group_caps: Optional[Dict[str, float]] = None,
+                 paper_trading: bool = False, confirm_timeframe: Optional[str] = None,
+                 dedupe_threshold: Optional[float] = None, correlation_group: Optional[str] = None,
+                 watchlist: str = DEFAULT_WATCHLIST):
         """
         Initialize the trading bot with risk management parameters
         
         Args:
             risk_per_trade (float): Maximum risk per trade as a percentage of capital (default: 2%)
             max_position_size (float): Maximum position size as a percentage of capital (default: 10%)
+            fetch_workers (int): Number of symbols downloaded concurrently (default: 8)
+            requests_per_second (Optional[float]): Maximum request rate per data source (default: unlimited)
+            metrics_file (Optional[str]): JSON lines file receiving a timing summary per run
+                (default: data/metrics/runs.jsonl, None disables it)
+            prometheus_file (Optional[str]): Prometheus text file rewritten after every run (default: none)
+            sink (Optional[RecommendationSink]): Where the recommendations of every run are stored
+                (default: queued Parquet files under data/recommendations)
+            portfolio (Optional[Portfolio]): Cash and open positions that new positions are sized against
+                (default: data/portfolio.json, or 100M VND of cash)
+            exchange_caps (Optional[Dict[str, float]]): Maximum share of equity per exchange, e.g. {'UPCOM': 0.2}
+            group_caps (Optional[Dict[str, float]]): Maximum share of equity per group, e.g. {'HNXFin': 0.3}
+            paper_trading (bool): Place the recommendations as orders with a PaperBroker booking
+                fills to the portfolio (default: False)
+            confirm_timeframe (Optional[str]): Only keep BUY/SELL signals that agree with the
+                trend of this higher timeframe, '1W' or '1M' (default: no confirmation)
+            dedupe_threshold (Optional[float]): Drop BUY signals whose return correlation with a
+                stronger BUY or a held position reaches this value (default: no de-duplication)
+            correlation_group (Optional[str]): Group from ExchangeInfo.VN_EXCHANGES the correlation
+                matrix covers (default: the favorite and held symbols)
+            watchlist (str): Watchlist in data/watchlists.db whose symbols are analyzed on every
+                run (default: favorites)
         """
-        self.stock_info = StockInfo()
-        self.strategy = TradingStrategy()
+        self.stock_info = StockInfo(requests_per_second=requests_per_second, watchlist=watchlist)
+        self.strategy = TradingStrategy(fetch_workers=fetch_workers, confirm_timeframe=confirm_timeframe)
         self.risk_per_trade = risk_per_trade
         self.max_position_size = max_position_size
+        self.metrics_file = metrics_file
+        self.prometheus_file = prometheus_file
+        self.last_metrics: Optional[RunMetrics] = None
+        self.sink = sink if sink is not None else create_sink('parquet')
+        self.portfolio = portfolio if portfolio is not None else Portfolio.load()
+        self.strategy.positions = self.portfolio.positions
+        self.risk_engine = RiskEngine(self.stock_info, risk_per_trade, max_position_size, exchange_caps, group_caps)
+        self.broker = PaperBroker(self.portfolio, self.strategy, self.stock_info) if paper_trading else None
+        self.correlation_group = correlation_group
+        self.last_signals: Dict[str, str] = {}  # Signal of every symbol in the previous run
+        self.correlation = None
+        if dedupe_threshold is not None:
+            self.correlation = CorrelationService(self.stock_info, correlation_group or [], threshold=dedupe_threshold,
+                                                  fetch_workers=fetch_workers)
 
     def run(self):
         """Main execution method"""
         logging.info("Starting trading bot analysis...")
+        metrics = RunMetrics()
+        metrics.watch('bars', self.stock_info.stats)
+        metrics.watch('listings', self.stock_info.listing_cache.stats)
+        metrics.watch('strategy', self.strategy.stats)
+        if self.stock_info.is_remote:
+            metrics.watch('data_server', self.stock_info.data_client.stats)
+
         recommendations = self.strategy.generate_recommendations(
             self.stock_info,
-            self.stock_info.symbols
+            self.stock_info.symbols,
+            metrics
         )
+
+        # Fill resting paper orders against the bars stored since the last run
+        if self.broker is not None:
+            with metrics.stage('paper_trading'):
+                self.broker.on_bars_from_store(self.stock_info.bar_store, calendar=self.stock_info.calendar)
+
+        # Keep one BUY per cluster of correlated symbols
+        if self.correlation is not None:
+            with metrics.stage('correlation'):
+                universe = self.correlation_group or sorted(set(self.stock_info.symbols) | set(self.portfolio.positions))
+                self._deduplicate(recommendations, universe)
+
+        # Size all signals together against the portfolio's cash and exposure
+        with metrics.stage('allocation'):
+            self.portfolio.mark({rec['symbol']: rec['price'] for rec in recommendations})
+            self.risk_engine.allocate_recommendations(self.portfolio, recommendations)
+
+        if self.broker is not None:
+            with metrics.stage('paper_trading'):
+                self.broker.submit_recommendations(recommendations)
         
-        # Log recommendations with detailed analysis
+        # Store every recommendation (queued sinks return immediately), but only log signal changes
+        with metrics.stage('sink'):
+            self.sink.write(metrics.run_id, recommendations)
+        changed = 0
         for rec in recommendations:
-            logging.info(f"""
-            Symbol: {rec['symbol']}
-            Signal: {rec['signal']}
-            Price: {rec['price']}
-            Trend: {rec['trend']}
-            Momentum: {rec['momentum']}
-            Volatility: {rec['volatility']}
-            RSI: {rec['rsi']:.2f}
-            Stop Loss: {rec['stop_loss']:.2f}
-            Take Profit: {rec['take_profit']:.2f}
-            Position Size: {rec['position_size']}
-            Time: {rec['timestamp']}
-            """)
+            previous = self.last_signals.get(rec['symbol'])
+            self.last_signals[rec['symbol']] = rec['signal']
+            if previous == rec['signal']:
+                continue
+            changed += 1
+            with metrics.stage('logging', rec['symbol']):
+                self._log_recommendation(rec, previous)
+        logging.info(f"{changed} signal changes, {len(recommendations) - changed} unchanged")
         
+        metrics.finish()
+        self.last_metrics = metrics
+        if self.metrics_file:
+            metrics.write_jsonl(self.metrics_file)
+        if self.prometheus_file:
+            metrics.write_prometheus(self.prometheus_file)
+        metrics.log_summary()
         logging.info("Trading bot analysis completed.")
 
+    @staticmethod
+    def _log_recommendation(rec: Dict, previous: Optional[str] = None):
+        signal = f"{previous}->{rec['signal']}" if previous else rec['signal']
+        logging.info(f"{rec['symbol']} {signal} price={rec['price']} trend={rec['trend']} "
+                     f"momentum={rec['momentum']} volatility={rec['volatility']} rsi={rec['rsi']:.2f} "
+                     f"stop_loss={rec['stop_loss']:.2f} take_profit={rec['take_profit']:.2f} "
+                     f"position_size={rec['position_size']}")
+
+    def _deduplicate(self, recommendations: List[Dict], universe: Union[str, List[str]]):
+        """Refresh the correlation matrix of a universe and turn duplicate BUY signals into HOLD"""
+        self.correlation.universe = universe
+        self.correlation.refresh()
+        self.correlation.deduplicate(recommendations, held=list(self.portfolio.positions))
+
+    def close(self):
+        """Flush and close the recommendation sink"""
+        self.sink.close()
+
+    def screen(self, group: str, top_n: int = DEFAULT_TOP_N):
+        """
+        Screen a whole exchange group instead of the favorites
+
+        Args:
+            group (str): Group from ExchangeInfo.VN_EXCHANGES, e.g. 'HOSE'
+            top_n (int): Number of BUY and SELL candidates to report (default: 20)
+
+        Returns:
+            Dict[str, List[Dict]]: Ranked 'BUY' and 'SELL' recommendations
+        """
+        logging.info(f"Starting screener for {group}...")
+        results = Screener(self.stock_info, self.strategy).screen(group, top_n)
+        if self.correlation is not None:
+            buys = results['BUY']
+            self._deduplicate(buys, self.correlation_group or group)
+            results['BUY'] = [rec for rec in buys if rec['signal'] == 'BUY']
+        for recommendations in results.values():
+            self.risk_engine.allocate_recommendations(self.portfolio, recommendations)
+        for side, recommendations in results.items():
+            for rec in recommendations:
+                logging.info(f"{side} {rec['symbol']} score={rec['score']:.2f} price={rec['price']} "
+                             f"rsi={rec['rsi']:.2f} stop_loss={rec['stop_loss']:.2f} "
+                             f"take_profit={rec['take_profit']:.2f} position_size={rec['position_size']}")
+        logging.info("Screener completed.")
+        return results
+
 if __name__ == "__main__":
+    from .log_config import configure_logging
+    configure_logging()
     bot = TradingBot()
-    bot.run() 
\ No newline at end of file
+    bot.run()
+    bot.close()
\ No newline at end of file
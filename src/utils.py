@@ -1,6 +1,28 @@
-from tradingview_ta import TA_Handler, Interval, Exchange, get_multiple_analysis
-from tvDatafeed import TvDatafeed, Interval as TVInterval
+from __future__ import annotations
+
+import logging
+import threading
 import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from .lazy import lazy_import
+
+if TYPE_CHECKING:
+    from tradingview_ta import TA_Handler, Interval
+    from tvDatafeed import TvDatafeed, Interval as TVInterval
+    from .bar_store import BarStore
+    from .ta_snapshots import TASnapshotService
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+tradingview_ta = lazy_import('tradingview_ta')
+tvDatafeed = lazy_import('tvDatafeed')
+
+TV_MAX_RETRIES = 5
+TV_RETRY_BASE_DELAY = 0.05  # Seconds before the first retry, doubled after every attempt
+TV_RETRY_MAX_DELAY = 2.0
+TV_PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+# TradingView quotes Vietnamese stocks in VND, the bar store (Vnstock VCI) in thousand VND
+TV_PRICE_SCALE = 0.001
 
 class bcolors:
     HEADER = '\033[95m'
@@ -14,40 +36,39 @@ class bcolors:
     UNDERLINE = '\033[4m'
 
 class TradingView_TA:
+    _snapshots = None
+    _snapshots_lock = threading.Lock()
+
+    @staticmethod
+    def snapshots() -> TASnapshotService:
+        """Batched, cached snapshot service shared by the single-symbol methods, created on first use"""
+        with TradingView_TA._snapshots_lock:
+            if TradingView_TA._snapshots is None:
+                # Imported here to keep importing this module cheap (see benchmarks/import_time.py)
+                from .ta_snapshots import TASnapshotService
+                TradingView_TA._snapshots = TASnapshotService()
+            return TradingView_TA._snapshots
+
+    # Served from the snapshot cache; concurrent calls are batched into one request
     @staticmethod
     def get_analysis(symbol: str, screener: str, exchange: str, interval: Interval) -> TA_Handler:
-        handler = TA_Handler(
-            symbol=symbol,
-            screener=screener,
-            exchange=exchange,
-            interval=interval,
-        )
-        return handler.get_analysis()
+        analysis = TradingView_TA.snapshots().get(symbol, exchange, interval, screener)
+        if analysis is None:
+            raise ValueError(f"Exchange or symbol not found: {exchange}:{symbol}")
+        return analysis
 
     @staticmethod
     def get_summary(symbol: str, screener: str, exchange: str, interval: Interval) -> dict:
-        handler = TA_Handler(
-            symbol=symbol,
-            screener=screener,
-            exchange=exchange,
-            interval=interval,
-        )
-        return handler.get_analysis().summary
+        return TradingView_TA.get_analysis(symbol, screener, exchange, interval).summary
 
     @staticmethod
     def get_indicators(symbol: str, screener: str, exchange: str, interval: Interval) -> dict:
-        handler = TA_Handler(
-            symbol=symbol,
-            screener=screener,
-            exchange=exchange,
-            interval=interval,
-        )
-        return handler.get_analysis().indicators
+        return TradingView_TA.get_analysis(symbol, screener, exchange, interval).indicators
     
     # Format: {"EXCHANGE:SYMBOL": Analysis}
     @staticmethod
     def get_multiple_analysis(screener: str, interval: Interval, symbols: list) -> dict:
-        return get_multiple_analysis(screener=screener, interval=interval, symbols=symbols)
+        return tradingview_ta.get_multiple_analysis(screener=screener, interval=interval, symbols=symbols)
 
 class Singleton(type):
     _instances = {}
@@ -57,18 +78,141 @@ class Singleton(type):
         return cls._instances[cls]
 
 class TVData:
-    tv = TvDatafeed()
+    tv = None
+    _tv_lock = threading.Lock()
 
     @staticmethod
-    def get_tvdata_hist(symbol: str, exchange: str, interval: TVInterval, n_bars: int) -> list:
-        hist = TVData.tv.get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=n_bars)
-        if hist is None:
-            time.sleep(0.05)
-            return TVData.get_tvdata_hist(symbol, exchange, interval, n_bars)
-        dt = hist.to_csv().splitlines()
-        for i in range(len(dt)):
-            dt[i] = dt[i].split(',')
-        return dt
+    def client() -> TvDatafeed:
+        """TvDatafeed session shared by all calls, created on first use"""
+        with TVData._tv_lock:
+            if TVData.tv is None:
+                TVData.tv = tvDatafeed.TvDatafeed()
+            return TVData.tv
+
+    @staticmethod
+    def close():
+        """Close the shared TvDatafeed session; the next call opens a new one"""
+        with TVData._tv_lock:
+            tv, TVData.tv = TVData.tv, None
+        if tv is not None:
+            TVData._close_session(tv)
+
+    @staticmethod
+    def _close_session(tv: TvDatafeed):
+        """Close the websocket a TvDatafeed session keeps open after get_hist"""
+        ws = getattr(tv, 'ws', None)
+        if ws is None:
+            return
+        try:
+            ws.close()
+        except Exception as e:
+            logging.warning(f"Error closing TradingView session: {str(e)}")
+
+    @staticmethod
+    def get_tvdata_hist(symbol: str, exchange: str, interval: TVInterval, n_bars: int,
+                        max_retries: int = TV_MAX_RETRIES, tv: Optional[TvDatafeed] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Download bars from TradingView as typed columns
+
+        TvDatafeed returns None when a request fails; the request is retried up
+        to max_retries times with exponential backoff.
+
+        Args:
+            symbol (str): Symbol, e.g. 'VNM'
+            exchange (str): TradingView exchange, e.g. 'HOSE'
+            interval (TVInterval): Bar interval
+            n_bars (int): Number of bars to download
+            max_retries (int): Retries after a failed request (default: 5)
+            tv (Optional[TvDatafeed]): Session to use (default: the shared one)
+
+        Returns:
+            Optional[Dict[str, np.ndarray]]: 'time' (datetime64[ns]) and float64 open, high,
+            low, close and volume columns, or None if every attempt failed
+        """
+        tv = tv if tv is not None else TVData.client()
+        delay = TV_RETRY_BASE_DELAY
+        for attempt in range(max_retries + 1):
+            try:
+                hist = tv.get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=n_bars)
+            except Exception as e:
+                logging.warning(f"TradingView request for {exchange}:{symbol} failed: {str(e)}")
+                hist = None
+            if hist is not None:
+                columns = {'time': hist.index.to_numpy(dtype='datetime64[ns]')}
+                for column in TV_PRICE_COLUMNS:
+                    columns[column] = hist[column].to_numpy(dtype=np.float64)
+                return columns
+            if attempt < max_retries:
+                time.sleep(delay)
+                delay = min(delay * 2, TV_RETRY_MAX_DELAY)
+        logging.error(f"No TradingView data for {exchange}:{symbol} after {max_retries + 1} attempts")
+        return None
+
+    @staticmethod
+    def get_tvdata_hist_bulk(symbols: List[str], exchange: str, interval: TVInterval, n_bars: int,
+                             max_workers: Optional[int] = None) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Download bars for many symbols concurrently
+
+        Every worker thread uses its own TvDatafeed session (get_hist keeps
+        its socket on the instance); the sessions are closed once all symbols
+        are downloaded. Symbols without data are left out of the result.
+
+        Args:
+            max_workers (Optional[int]): Concurrent downloads (default: DEFAULT_FETCH_WORKERS)
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: Typed columns per symbol (see get_tvdata_hist)
+        """
+        # Imported here to keep importing this module cheap (see benchmarks/import_time.py)
+        from .pipeline import fetch_in_order, DEFAULT_FETCH_WORKERS
+        local = threading.local()
+        sessions: List[TvDatafeed] = []
+        sessions_lock = threading.Lock()
+
+        def worker_client() -> TvDatafeed:
+            tv = getattr(local, 'tv', None)
+            if tv is None:
+                tv = local.tv = tvDatafeed.TvDatafeed()
+                with sessions_lock:
+                    sessions.append(tv)
+            return tv
+
+        fetch = lambda symbol: TVData.get_tvdata_hist(symbol, exchange, interval, n_bars, tv=worker_client())
+        try:
+            return {
+                symbol: columns
+                for symbol, columns in fetch_in_order(fetch, symbols, max_workers or DEFAULT_FETCH_WORKERS)
+                if columns is not None
+            }
+        finally:
+            for tv in sessions:
+                TVData._close_session(tv)
+
+    @staticmethod
+    def ingest_daily_bars(bar_store: BarStore, symbols: List[str], exchange: str = 'HOSE', n_bars: int = 250,
+                          max_workers: Optional[int] = None, price_scale: float = TV_PRICE_SCALE) -> List[str]:
+        """
+        Load daily bars from TradingView into the bar store used by StockInfo.get_historical_data
+
+        Bar times are truncated to the date and prices scaled to the store's
+        unit (thousand VND by default), so TradingView bars merge with, and
+        replace, the Vnstock bars of the same sessions. A missing volume is
+        stored as 0.
+
+        Returns:
+            List[str]: Symbols that were written
+        """
+        bulk = TVData.get_tvdata_hist_bulk(symbols, exchange, tvDatafeed.Interval.in_daily, n_bars, max_workers)
+        for symbol, columns in bulk.items():
+            df = pd.DataFrame({
+                'time': pd.DatetimeIndex(columns['time']).normalize(),
+                **{column: columns[column] * price_scale for column in ('open', 'high', 'low', 'close')},
+                'volume': np.rint(np.nan_to_num(columns['volume'], nan=0.0)).astype(np.int64),
+            })
+            with bar_store.lock(symbol):
+                bar_store.append(symbol, df)
+        return list(bulk)
     
 class BinanceInstance:
     pass
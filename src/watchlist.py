@@ -0,0 +1,244 @@
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+WATCHLIST_DB = 'data/watchlists.db'
+DEFAULT_WATCHLIST = 'favorites'
+FAVORITE_SYMBOLS_FILE = 'data/favorite_symbols.json'  # Single list used before the watchlist store
+DEFAULT_FAVORITE_SYMBOLS = ['VCI', 'VNM', 'FPT', 'VHM', 'VIB']
+SCHEMA_VERSION = 1
+BUSY_TIMEOUT = 5.0  # Seconds a writer waits for another process's transaction
+
+class WatchlistStore:
+    """
+    Named watchlists of symbols in one SQLite database
+
+    The database runs in WAL mode, so the scheduled bot and the interactive
+    UI can read and write it at the same time: every change is one short
+    transaction, and readers never block writers.
+
+    Each watchlist keeps its symbols in insertion order, plus a set for O(1)
+    membership checks. Both are cached in memory. Changes made through this
+    store update the cache directly. Changes committed by another connection
+    or process bump SQLite's ``PRAGMA data_version``, which is checked
+    (a few microseconds) before the cache is used and before every change.
+
+    The default watchlist (``favorites``) is read by the scheduled bot and
+    cannot be deleted.
+
+    A new database is seeded from the old data/favorite_symbols.json list,
+    or the default favorites when that file does not exist.
+    """
+
+    def __init__(self, path: str = WATCHLIST_DB, legacy_file: Optional[str] = FAVORITE_SYMBOLS_FILE):
+        """
+        Open (and create if needed) the watchlist database
+
+        Args:
+            path (str): SQLite database file (default: data/watchlists.db)
+            legacy_file (Optional[str]): JSON favorites list imported into the 'favorites'
+                watchlist when the database is new (default: data/favorite_symbols.json)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._cache: Dict[str, Tuple[List[str], Set[str]]] = {}
+        self._names: Optional[List[str]] = None
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS watchlists (
+                    name TEXT PRIMARY KEY,
+                    created TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS watchlist_symbols (
+                    watchlist TEXT NOT NULL REFERENCES watchlists (name) ON DELETE CASCADE,
+                    symbol TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    added TEXT NOT NULL,
+                    PRIMARY KEY (watchlist, symbol)
+                ) WITHOUT ROWID
+            """)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._migrate(legacy_file)
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._data_version = self._version()
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction that takes the database lock up front (BEGIN IMMEDIATE)"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _migrate(self, legacy_file: Optional[str]):
+        """Seed the favorites watchlist from the legacy JSON file (inside the schema transaction)"""
+        symbols = DEFAULT_FAVORITE_SYMBOLS
+        if legacy_file:
+            try:
+                with open(legacy_file, 'r') as f:
+                    symbols = json.load(f)
+                logging.info(f"Imported {len(symbols)} favorite symbols from {legacy_file} into {self.path}")
+            except FileNotFoundError:
+                pass
+            except json.JSONDecodeError as e:
+                logging.error(f"Error reading {legacy_file}, starting with the default favorites: {str(e)}")
+        self._insert(DEFAULT_WATCHLIST, symbols)
+
+    def _insert(self, name: str, symbols: List[str]) -> int:
+        """Create a watchlist if needed and append the symbols it does not hold yet"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._conn.execute("INSERT OR IGNORE INTO watchlists VALUES (?, ?)", (name, now))
+        last = self._conn.execute(
+            "SELECT COALESCE(MAX(position), 0) FROM watchlist_symbols WHERE watchlist = ?", (name,)
+        ).fetchone()[0]
+        added = 0
+        for symbol in symbols:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO watchlist_symbols VALUES (?, ?, ?, ?)", (name, symbol, last + added + 1, now)
+            )
+            added += cursor.rowcount
+        return added
+
+    def _version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _add_name(self, name: str):
+        """Add a created watchlist to the cached names (call with the lock held)"""
+        if self._names is not None and name not in self._names:
+            self._names = sorted(self._names + [name])
+
+    def _check_version(self):
+        """Drop the cache if another connection committed a change (call with the lock held)"""
+        version = self._version()
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+            self._names = None
+
+    def _entry(self, name: str) -> Tuple[List[str], Set[str]]:
+        """Cached (ordered symbols, symbol set) of a watchlist (call with the lock held)"""
+        self._check_version()
+        entry = self._cache.get(name)
+        if entry is None:
+            rows = self._conn.execute(
+                "SELECT symbol FROM watchlist_symbols WHERE watchlist = ? ORDER BY position", (name,)
+            ).fetchall()
+            symbols = [row[0] for row in rows]
+            entry = self._cache[name] = (symbols, set(symbols))
+        return entry
+
+    def names(self) -> List[str]:
+        """Names of all watchlists, alphabetically"""
+        with self._lock:
+            self._check_version()
+            if self._names is None:
+                self._names = [row[0] for row in self._conn.execute("SELECT name FROM watchlists ORDER BY name")]
+            return list(self._names)
+
+    def symbols(self, name: str = DEFAULT_WATCHLIST) -> List[str]:
+        """Symbols of a watchlist in the order they were added (empty if it does not exist)"""
+        with self._lock:
+            return list(self._entry(name)[0])
+
+    def contains(self, symbol: str, name: str = DEFAULT_WATCHLIST) -> bool:
+        """Whether a watchlist holds a symbol"""
+        with self._lock:
+            return symbol in self._entry(name)[1]
+
+    def create(self, name: str) -> bool:
+        """Create an empty watchlist; False if it already exists"""
+        try:
+            with self._lock:
+                self._check_version()
+                with self._transaction():
+                    created = self._conn.execute(
+                        "INSERT OR IGNORE INTO watchlists VALUES (?, ?)",
+                        (name, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                    ).rowcount
+                self._add_name(name)
+                return bool(created)
+        except sqlite3.Error as e:
+            logging.error(f"Error creating watchlist {name}: {str(e)}")
+            return False
+
+    def delete(self, name: str) -> bool:
+        """
+        Delete a watchlist and its symbols; False if it does not exist
+
+        Raises:
+            ValueError: If name is the default watchlist
+        """
+        if name == DEFAULT_WATCHLIST:
+            raise ValueError(f"The default watchlist {DEFAULT_WATCHLIST} cannot be deleted")
+        try:
+            with self._lock:
+                self._check_version()
+                with self._transaction():
+                    self._conn.execute("DELETE FROM watchlist_symbols WHERE watchlist = ?", (name,))
+                    deleted = self._conn.execute("DELETE FROM watchlists WHERE name = ?", (name,)).rowcount
+                self._cache.pop(name, None)
+                if self._names is not None and name in self._names:
+                    self._names = [other for other in self._names if other != name]
+                return bool(deleted)
+        except sqlite3.Error as e:
+            logging.error(f"Error deleting watchlist {name}: {str(e)}")
+            return False
+
+    def add(self, symbol: str, name: str = DEFAULT_WATCHLIST) -> bool:
+        """
+        Append a symbol to a watchlist, creating the watchlist if needed
+
+        Returns:
+            bool: False if the symbol was already in the watchlist or the write failed
+        """
+        try:
+            with self._lock:
+                # Drops the cache if another process changed a list since it was cached
+                self._check_version()
+                with self._transaction():
+                    added = self._insert(name, [symbol])
+                entry = self._cache.get(name)
+                if added and entry is not None:
+                    entry[0].append(symbol)
+                    entry[1].add(symbol)
+                self._add_name(name)
+                return bool(added)
+        except sqlite3.Error as e:
+            logging.error(f"Error adding {symbol} to watchlist {name}: {str(e)}")
+            return False
+
+    def remove(self, symbol: str, name: str = DEFAULT_WATCHLIST) -> bool:
+        """Remove a symbol from a watchlist; False if it was not in it"""
+        try:
+            with self._lock:
+                self._check_version()
+                with self._transaction():
+                    removed = self._conn.execute(
+                        "DELETE FROM watchlist_symbols WHERE watchlist = ? AND symbol = ?", (name, symbol)
+                    ).rowcount
+                entry = self._cache.get(name)
+                if removed and entry is not None:
+                    entry[0].remove(symbol)
+                    entry[1].discard(symbol)
+                return bool(removed)
+        except sqlite3.Error as e:
+            logging.error(f"Error removing {symbol} from watchlist {name}: {str(e)}")
+            return False
+
+    def close(self):
+        with self._lock:
+            self._conn.close()